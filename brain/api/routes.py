@@ -1,8 +1,9 @@
-```
 from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import httpx
+import json
 import logging
 
 from core.config import config
@@ -55,25 +56,16 @@ async def request_action(req: ActionRequest):
     # but strictly speaking the Body should also respect the global safety config.
     # Here we trust the Body to handle execution, but we pass the intent.
     
-    # Body URL (Local Kernel) - assuming port 8001 based on typical setup
-    BODY_URL = "http://localhost:8001/action/run" 
+    # Body (Local Kernel) via the shared pooled client; the Body queues
+    # actions, wait=True returns the outcome
+    from core.kernel_client import kernel_client
     
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "action": req.action,
-                "params": req.params,
-                "mode": mode # Pass the mode to Body
-            }
-            resp = await client.post(BODY_URL, json=payload, timeout=10.0)
-            
-            if resp.status_code == 200:
-                result = resp.json()
-                # Log to DB (TODO: use db.py)
-                return {"status": "executed", "result": result}
-            else:
-                return {"status": "error", "detail": resp.text}
-                
+        result = await kernel_client.run_action(req.action, req.params, mode, wait=True)
+        # Log to DB (TODO: use db.py)
+        return {"status": "executed", "result": result}
+    except httpx.HTTPStatusError as e:
+        return {"status": "error", "detail": e.response.text}
     except Exception as e:
         logger.error(f"Bridge connection error: {e}")
         return {"status": "error", "detail": f"Failed to contact Body: {e}"}
@@ -107,14 +99,41 @@ async def analyze_vision(payload: Dict[str, Any] = Body(...)):
     result = await vision_engine.analyze(capture=capture)
     return result
 
+@router.get("/vision/find")
+async def find_on_screen(text: str, min_conf: float = 0.0, refresh: bool = False):
+    """
+    Locate on-screen text in the last analyzed frame (word layout index).
+    refresh=true captures and analyzes a new frame first.
+    """
+    from core.vision.vision_engine import vision_engine
+    if refresh or await vision_engine.current_layout() is None:
+        result = await vision_engine.analyze(capture=True)
+        if "error" in result:
+            raise HTTPException(status_code=503, detail=result["error"])
+
+    layout = await vision_engine.current_layout()
+    matches = layout.find_text(text, min_conf) if layout else []
+    return {
+        "text": text,
+        "matches": [{"x": x, "y": y, "w": w, "h": h} for x, y, w, h in matches],
+        "frame_ts": layout.timestamp if layout else None,
+    }
+
 
 
 @router.post("/agent/deep-research/run")
-async def run_deep_research(query: str):
+async def run_deep_research(query: str, stream: bool = False):
     """
     Trigger Deep Research Agent.
+    stream=true answers with NDJSON events (plan, each step as it
+    finishes, then the report) instead of waiting for the report.
     """
     from core.agents.deep_research_agent import deep_research_agent
+    if stream:
+        async def events():
+            async for event in deep_research_agent.stream(query):
+                yield json.dumps(event) + "\n"
+        return StreamingResponse(events(), media_type="application/x-ndjson")
     result = await deep_research_agent.run(query)
     return result
 
@@ -138,6 +157,14 @@ async def transcribe_voice(file: UploadFile = File(...)):
     
     return result
 
+@router.get("/voice/status")
+async def voice_status():
+    """
+    Speech model diagnostics: load state and time, process RSS.
+    """
+    from core.voice.voice_engine import voice_engine
+    return {**voice_engine.diagnostics(), **voice_engine.stats()}
+
 @router.get("/tools")
 async def list_tools():
     """List available tools."""
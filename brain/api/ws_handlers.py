@@ -2,7 +2,13 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import List, Dict
 from core.llm_service import llm_service
 from core.memory_service import memory_service
+from core.llm_scheduler import llm_scheduler
+from core.voice.voice_engine import voice_engine
+from core.vision.vision_engine import vision_engine
+import asyncio
 import json
+import time
+from collections import deque
 
 router = APIRouter()
 
@@ -30,17 +36,44 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+async def _run_until_disconnect(websocket: WebSocket, coro, backlog: list):
+    """
+    Awaits `coro` while watching the socket. If the client disconnects first,
+    the work is cancelled (queued LLM calls leave the scheduler queue) and
+    WebSocketDisconnect is raised. Messages arriving meanwhile go to `backlog`.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            recv = asyncio.ensure_future(websocket.receive())
+            done, _ = await asyncio.wait({task, recv}, return_when=asyncio.FIRST_COMPLETED)
+            if recv in done:
+                msg = recv.result()
+                if msg["type"] == "websocket.disconnect":
+                    task.cancel()
+                    raise WebSocketDisconnect(msg.get("code", 1000))
+                if msg.get("text") is not None:
+                    backlog.append(msg["text"])
+            else:
+                recv.cancel()
+            if task in done:
+                return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     session_id = "default" # TODO: Extract from headers or query param
+    backlog = [] # Messages received while a reply was being generated
     
     try:
         while True:
             # Keep-alive Ping (Server -> Client) could be implemented here with asyncio.create_task 
             # or rely on client-side pings which we handle below.
 
-            data = await websocket.receive_text()
+            data = backlog.pop(0) if backlog else await websocket.receive_text()
             
             # Parse message
             try:
@@ -115,7 +148,12 @@ async def websocket_endpoint(websocket: WebSocket):
 
             # Process chat
             history = memory_service.get_history(user_id)
-            response_text = await llm_service.generate_response(content, history)
+            with llm_scheduler.context(user_id=user_id):
+                response_text = await _run_until_disconnect(
+                    websocket,
+                    llm_service.generate_response(content, history, user_id=user_id),
+                    backlog
+                )
             
             # Store context
             memory_service.add_message(user_id, "user", content)
@@ -141,3 +179,84 @@ async def websocket_endpoint(websocket: WebSocket):
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+
+kernel_state = {"telemetry": None, "connected": False, "last_seen": None}
+_kernel_seen = deque(maxlen=512)  # ids already dispatched; resends are only re-acked
+
+@router.websocket("/ws/kernel")
+async def kernel_channel_endpoint(websocket: WebSocket):
+    """
+    Persistent channel from the local kernel (local_kernel/brain_channel.py).
+    Envelope: {"id", "type", "payload", "ts", "ack"}; acked by id.
+    """
+    await websocket.accept()
+    kernel_state["connected"] = True
+    try:
+        while True:
+            try:
+                msg = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            kernel_state["last_seen"] = time.time()
+            msg_id = msg.get("id")
+            if msg.get("ack") and msg_id:
+                await websocket.send_text(json.dumps({"type": "ack", "id": msg_id}))
+            if msg_id in _kernel_seen:
+                continue
+            _kernel_seen.append(msg_id)
+
+            msg_type = msg.get("type")
+            payload = msg.get("payload", {})
+            if msg_type == "telemetry":
+                kernel_state["telemetry"] = payload
+            elif msg_type == "screenshots.evicted":
+                await asyncio.to_thread(vision_engine.forget_screenshots, payload.get("paths", []))
+            elif msg_type in ("wake.trigger", "action.progress", "action.result"):
+                # Relay to UI clients on /ws; a dead UI socket must not drop the kernel
+                try:
+                    await manager.broadcast_json({"type": msg_type, "payload": payload})
+                except Exception:
+                    pass
+    except WebSocketDisconnect:
+        pass
+    finally:
+        kernel_state["connected"] = False
+
+@router.websocket("/ws/audio")
+async def audio_stream_endpoint(websocket: WebSocket, sample_rate: int = 16000):
+    """
+    Streaming STT. Binary frames are 16-bit mono PCM at `sample_rate`;
+    a text {"type": "audio.end"} closes the current utterance, and so
+    does a pause detected by the VAD.
+    Replies: {"type": "stt.partial" | "stt.final", "text": ...}.
+    """
+    await websocket.accept()
+    stream = voice_engine.open_stream(sample_rate) if await voice_engine.ensure_model() else None
+    if stream is None:
+        await websocket.send_text(json.dumps({"type": "error", "content": "Speech model not loaded."}))
+        await websocket.close()
+        return
+
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+
+            if msg.get("bytes") is not None:
+                results = await stream.feed(msg["bytes"])
+            else:
+                try:
+                    msg_type = json.loads(msg.get("text") or "{}").get("type")
+                except ValueError:
+                    msg_type = None
+                if msg_type != "audio.end":
+                    continue
+                results = await stream.finish()
+
+            for result in results:
+                await websocket.send_text(json.dumps({"type": f"stt.{result['type']}", "text": result["text"]}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream.close()
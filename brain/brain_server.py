@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import os
 import psutil
@@ -9,6 +10,14 @@ import logging
 from core.config import config
 from core.llm_service import llm_service
 from core.local_model_engine import local_engine
+from core.model_lifecycle import model_lifecycle
+from core.llm_scheduler import llm_scheduler
+from core.ollama_pool import ollama_pool
+from core.vision.screen_watcher import screen_watcher
+from core.vision.incremental_ocr import incremental_ocr
+from core.vision.ocr_engine import ocr_engine
+from core.voice.voice_engine import voice_engine
+from core.kernel_client import kernel_client
 
 # Load environment variables
 load_dotenv()
@@ -35,13 +44,36 @@ class ChatMessage(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     logger.info("AI engine: LOCAL MODE ACTIVE")
-    logger.info(f"LLM: Ollama ({config.LOCAL_LLM_MODEL}) at {config.OLLAMA_URL}")
+    logger.info(f"LLM: Ollama ({config.LOCAL_LLM_MODEL}) at {', '.join(config.OLLAMA_URLS)}")
     logger.info("Embeddings: sentence-transformers (local)")
+    ollama_pool.start()
+    if config.WARMUP_ON_STARTUP:
+        logger.info("Warming up models in background...")
+        model_lifecycle.start()
+    if config.SCREEN_WATCHER_ENABLED:
+        screen_watcher.start()
+    if config.VOICE_WARMUP:
+        voice_engine.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await screen_watcher.stop()
+    await model_lifecycle.stop()
+    await ollama_pool.close()
+    await kernel_client.close()
 
 @app.get("/ping")
 async def ping():
     return {"ok": True, "msg": "Brain (Offline) here ✅"}
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe. 503 until the models are warm.
+    """
+    state = model_lifecycle.readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
 @app.get("/reply")
 async def reply(text: str = Query(..., description="user text")):
     text = text.strip()
@@ -74,11 +106,21 @@ async def local_intelligence():
     """
     mem = psutil.virtual_memory()
     return {
-        "status": "active",
+        "status": "active" if local_engine.available else "degraded",
         "mode": "local",
         "llm_model": config.LOCAL_LLM_MODEL,
         "ollama_url": config.OLLAMA_URL,
+        "ollama_backends": config.OLLAMA_URLS,
         "embedding_model": "all-MiniLM-L6-v2",
+        "ollama": ollama_pool.status(),
+        "prompt_cache": local_engine.prompt_cache.stats(),
+        "lifecycle": model_lifecycle.readiness(),
+        "scheduler": llm_scheduler.stats(),
+        "vision_ocr": incremental_ocr.stats(),
+        "ocr_cache": ocr_engine.cache.stats(),
+        "screen_watcher": screen_watcher.stats(),
+        "voice": voice_engine.stats(),
+        "kernel": kernel_client.stats(),
         "memory_usage": {
             "total": mem.total,
             "available": mem.available,
@@ -147,14 +189,8 @@ async def unload_model(req: ModelRequest):
     """
     Unload a model from memory via keep_alive=0.
     """
-    import httpx
     try:
-        async with httpx.AsyncClient() as client:
-            # Send a request to unload (keep_alive 0)
-            await client.post(
-                f"{config.OLLAMA_URL}/api/generate",
-                json={"model": req.model, "prompt": "", "keep_alive": 0}
-            )
+        await model_lifecycle.unload(req.model)
         return {"status": "unloaded", "msg": f"Requested unload for {req.model}"}
     except Exception as e:
         return {"error": str(e)}
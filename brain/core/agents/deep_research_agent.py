@@ -2,91 +2,189 @@
 import logging
 import json
 import asyncio
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
+from core.config import config
 from core.local_model_engine import local_engine
+from core.llm_scheduler import llm_scheduler, Priority
 from core.tools.registry import registry
 from core.memory_service import memory_service
+from core.vector_store import vector_store
 
 logger = logging.getLogger("deep_research")
 
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
 class DeepResearchAgent:
-    def __init__(self):
+    def __init__(self, concurrency: int = 3):
         self.max_steps = 5
+        self.concurrency = concurrency
+
+    async def run(self, query: str, on_event: Optional[Callable[[Dict], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """
+        Executes a deep research task and returns the final report.
+        `on_event` is awaited with each partial result (see `stream`).
+        """
+        report: Dict[str, Any] = {}
+        async for event in self.stream(query):
+            if on_event:
+                await on_event(event)
+            if event["type"] == "research.result":
+                report = event["report"]
+        return report
 
-    async def run(self, query: str) -> Dict[str, Any]:
+    async def stream(self, query: str) -> AsyncIterator[Dict[str, Any]]:
         """
-        Executes a deep research task.
-        1. Break down query into steps.
-        2. Execute steps (Search/Tools).
+        Executes a deep research task, yielding events as they happen:
+        research.plan, one research.step per step as it finishes, then
+        research.result with the report.
+        1. Break down query into steps with dependencies.
+        2. Execute steps (Search/Tools), independent ones concurrently.
         3. Synthesize answer.
+        All LLM calls run as background work so interactive chat goes first.
         """
+        events: asyncio.Queue = asyncio.Queue()
+        with llm_scheduler.context(priority=Priority.BACKGROUND):
+            task = asyncio.create_task(self._run_safe(query, events.put_nowait))
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if event["type"] == "research.result":
+                    return
+        finally:
+            task.cancel()  # Consumer gone: drop queued LLM calls
+
+    async def _run_safe(self, query: str, emit: Callable[[Dict], None]):
+        try:
+            await self._run(query, emit)
+        except Exception as e:
+            logger.error(f"Deep Research failed: {e}")
+            emit({"type": "research.result", "report": {"error": str(e)}})
+
+    async def _run(self, query: str, emit: Callable[[Dict], None]):
         logger.info(f"Starting Deep Research for: {query}")
-        
+        start = time.perf_counter()
+
         # 1. Plan
         plan = await self._plan_task(query)
-        steps = plan.get("steps", [])
+        steps = self._build_dag(plan)
+        plan_ms = _ms(start)
         logger.info(f"Plan: {steps}")
+        emit({"type": "research.plan", "steps": steps})
 
-        results = []
+        # 2. Execute Steps: each waits only for its dependencies
+        results: Dict[int, Dict[str, Any]] = {}
         citations = []
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: Dict[int, asyncio.Task] = {}
 
-        # 2. Execute Steps
-        for step in steps:
-            logger.info(f"Executing Step: {step}")
-            # Decide tool vs vector search vs generic llm
-            # Simple heuristic: If "search" or "find file", use tools.
-            # If "concept" or "history", use vector search.
-            
-            step_result = ""
-            if "search" in step.lower() or "find" in step.lower():
-                # Try to use a tool?
-                # For now, let's assume "file_search" is the main research tool available or web if we had it.
-                # Use LLM to pick tool?
-                tools_avail = registry.list_tools()
-                # Simplified: just use vector search for now as "Research" often implies knowledge base.
-                # But user wants "Tools usage".
-                
-                # Check Vector Store first
-                vectors = memory_service.vector_store.search(step, limit=3)
-                if vectors:
-                   step_result += f"Found in memory: {vectors}"
-                   citations.extend([v['metadata'] for v in vectors if 'metadata' in v])
-                else:
-                   step_result += "No memory found."
-            else:
-                # Ask LLM for insight
-                context = await local_engine.generate(f"Research step: {step}. Provide insight.")
-                step_result = context
+        async def run_step(step):
+            if step["depends_on"]:
+                await asyncio.gather(*(tasks[d] for d in step["depends_on"]))
+            async with slots:
+                started = time.perf_counter()
+                context = [results[d] for d in step["depends_on"]]
+                result, sources = await self._execute_step(step, context)
+            citations.extend(sources)
+            results[step["id"]] = {
+                "id": step["id"],
+                "step": step["step"],
+                "result": result,
+                "started_ms": round((started - start) * 1000, 1),
+                "duration_ms": _ms(started),
+            }
+            emit({"type": "research.step", **results[step["id"]]})
 
-            results.append({"step": step, "result": step_result})
+        for step in steps:
+            tasks[step["id"]] = asyncio.create_task(run_step(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        ordered = [results[s["id"]] for s in steps]
 
         # 3. Synthesize
         final_prompt = f"""
         Research Goal: {query}
-        Executed Steps: {json.dumps(results)}
-        
+        Executed Steps: {json.dumps([{"step": r["step"], "result": r["result"]} for r in ordered])}
+
         Synthesize a final report answering the goal.
         Include 'steps', 'citations', 'final_answer'.
         Format as JSON.
         """
-        
+
         try:
+            synth_start = time.perf_counter()
             final_json_str = await local_engine.generate(final_prompt)
             # Try to parse or just return string if fails
             # We enforce JSON structure in prompt but local models are flaky.
             # We'll return a dict construction.
-            return {
-                "steps": [r['step'] for r in results],
+            report = {
+                "steps": [r['step'] for r in ordered],
                 "citations": citations,
-                "final_answer": final_json_str # Raw text for now unless we enforce JSON parser
+                "final_answer": final_json_str, # Raw text for now unless we enforce JSON parser
+                "timings": {
+                    "plan_ms": plan_ms,
+                    "steps": [{k: r[k] for k in ("id", "step", "started_ms", "duration_ms")} for r in ordered],
+                    "synthesis_ms": _ms(synth_start),
+                    "total_ms": _ms(start),
+                },
             }
         except Exception as e:
-            return {"error": str(e)}
+            report = {"error": str(e)}
+        emit({"type": "research.result", "report": report})
+
+    async def _execute_step(self, step: Dict[str, Any], context: List[Dict[str, Any]]):
+        """Runs one step; returns (result text, citations)."""
+        text = step["step"]
+        logger.info(f"Executing Step: {text}")
+        # Decide tool vs vector search vs generic llm
+        # Simple heuristic: If "search" or "find file", use tools.
+        # If "concept" or "history", use vector search.
+        try:
+            if "search" in text.lower() or "find" in text.lower():
+                # Simplified: just use vector search for now as "Research" often implies knowledge base.
+                # Off the loop so parallel retrievals don't block each other.
+                vectors = await asyncio.to_thread(vector_store.search, text, k=3)
+                if vectors:
+                    return f"Found in memory: {vectors}", [{k: v for k, v in match.items() if k != "score"} for match in vectors]
+                return "No memory found.", []
+
+            # Ask LLM for insight, given what the steps it depends on found
+            prompt = f"Research step: {text}. Provide insight."
+            if context:
+                prompt += f"\nEarlier findings: {json.dumps([{'step': c['step'], 'result': c['result']} for c in context])}"
+            return await local_engine.generate(prompt), []
+        except Exception as e:
+            logger.warning(f"Step failed ({text}): {e}")
+            return f"Step failed: {e}", []
+
+    def _build_dag(self, plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Normalizes planner output to [{"id", "step", "depends_on"}]. Plain
+        string steps are independent; a step may only depend on earlier
+        steps, so the graph can't have cycles.
+        """
+        steps = []
+        for i, raw in enumerate(plan.get("steps", [])[:self.max_steps], start=1):
+            if isinstance(raw, dict):
+                text = str(raw.get("step") or raw.get("task") or "")
+                deps = raw.get("depends_on") or []
+            else:
+                text, deps = str(raw), []
+            deps = sorted({int(d) for d in deps if str(d).isdigit() and 0 < int(d) < i})
+            steps.append({"id": i, "step": text, "depends_on": deps})
+        return steps
 
-    async def _plan_task(self, query: str) -> Dict[str, List[str]]:
+    async def _plan_task(self, query: str) -> Dict[str, List]:
         prompt = f"""
         Break down this research question into 3-5 distinct steps: "{query}"
-        Return JSON: {{ "steps": ["step 1", "step 2"] }}
+        Number steps from 1. List in "depends_on" the earlier steps whose
+        results a step needs; leave it empty for steps that can run independently.
+        Return JSON: {{ "steps": [{{"step": "step 1", "depends_on": []}}, {{"step": "step 2", "depends_on": [1]}}] }}
         """
         try:
             resp = await local_engine.generate(prompt)
@@ -100,4 +198,4 @@ class DeepResearchAgent:
         except:
             return {"steps": [query]}
 
-deep_research_agent = DeepResearchAgent()
+deep_research_agent = DeepResearchAgent(concurrency=config.RESEARCH_CONCURRENCY)
@@ -2,6 +2,7 @@
 from typing import List, Dict, Any
 import json
 from .base_agent import BaseAgent
+from core.config import config
 from core.local_model_engine import local_engine
 
 class TaskAgent(BaseAgent):
@@ -55,10 +56,21 @@ class TaskAgent(BaseAgent):
         For v1.8, 'execution' basically means validating the step 
         and preparing it for the Bridge (routes.py will handle dispatch).
         """
-        return {
+        action, params = step.get("action"), step.get("params")
+        result = {
             "agent": self.name,
             "step": "prepare_action",
-            "action": step.get("action"),
-            "params": step.get("params"),
+            "action": action,
+            "params": params,
             "status": "pending_approval" # Actions default to pending
         }
+
+        # Click targets by label: resolve against the screen's word layout (re-captured if stale)
+        if action in ("CLICK", "CLICK_ICON") and isinstance(params, str) and params:
+            from core.vision.vision_engine import vision_engine
+            matches = await vision_engine.find_text(params, max_age=config.VISION_LAYOUT_MAX_AGE)
+            if matches:
+                x, y, w, h = matches[0]
+                result["action"] = "CLICK"
+                result["params"] = {"x": x + w // 2, "y": y + h // 2, "label": params}
+        return result
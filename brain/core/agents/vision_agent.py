@@ -1,6 +1,7 @@
 
 from core.agents.base_agent import BaseAgent
 from core.vision.vision_engine import vision_engine
+from core.vision.screen_watcher import screen_watcher
 from core.llm_service import llm_service
 import json
 
@@ -14,8 +15,10 @@ class VisionAgent(BaseAgent):
         pass
 
     async def run(self, query: str):
-        # 1. Analyze Screen
-        analysis = await vision_engine.analyze()
+        # 1. Analyze Screen (precomputed by the watcher when it is running)
+        analysis = screen_watcher.fresh_context()
+        if analysis is None:
+            analysis = await vision_engine.analyze()
         if "error" in analysis:
             return f"I couldn't see the screen: {analysis['error']}"
 
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("circuit_breaker")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that is known to be down."""
+
+
+class CircuitBreaker:
+    """
+    Health-tracking breaker for a backend like Ollama.
+
+    CLOSED: calls go through. After `failure_threshold` consecutive failures
+    the breaker OPENs and callers fail fast. A background probe then checks
+    the backend with exponential backoff (HALF_OPEN while probing) and closes
+    the breaker again on the first successful probe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, probe: Optional[Callable[[], Awaitable[bool]]] = None,
+                 failure_threshold: int = 3, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.opened_at: Optional[float] = None
+        self.next_probe_in: Optional[float] = None
+        self.probes = 0
+        self.fast_failures = 0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        self.fast_failures += 1
+        return False
+
+    def check(self):
+        """Raise CircuitOpenError if calls should not be attempted."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} unavailable ({self.last_error})")
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} recovered, closing circuit.")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.next_probe_in = None
+
+    def record_failure(self, error: Exception):
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        logger.warning(f"{self.name} failed {self.consecutive_failures}x, opening circuit ({self.last_error})")
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        if self.probe is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = loop.create_task(self._probe_loop())
+
+    async def _probe_loop(self):
+        delay = self.base_backoff
+        while self.state != self.CLOSED:
+            self.next_probe_in = delay
+            await asyncio.sleep(delay)
+            self.state = self.HALF_OPEN
+            self.probes += 1
+            try:
+                ok = await self.probe()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                ok = False
+            if ok:
+                self.record_success()
+                return
+            self.state = self.OPEN
+            delay = min(delay * 2, self.max_backoff)
+
+    async def close(self):
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def status(self) -> Dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "available": self.state == self.CLOSED,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "open_for_s": round(time.time() - self.opened_at, 1) if self.opened_at else None,
+            "next_probe_in_s": self.next_probe_in,
+            "probes": self.probes,
+            "fast_failures": self.fast_failures,
+        }
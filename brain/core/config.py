@@ -16,7 +16,97 @@ class Config:
     
     # Ollama Configuration
     OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+    # Several instances (e.g. pinned to different cores): comma-separated list.
+    # Raise LLM_MAX_CONCURRENCY accordingly so all of them get work.
+    OLLAMA_URLS = [u.strip() for u in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()]
+    OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", 15.0))
     LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "mistral") # Updated to match installed model
+    # -1 pins the model (and its prompt KV cache) in RAM; the lifecycle
+    # manager unloads idle models itself when the machine runs short on memory.
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+    
+    # Ollama Circuit Breaker (fail fast while the backend is down)
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 2.0))
+    OLLAMA_FAILURE_THRESHOLD = int(os.getenv("OLLAMA_FAILURE_THRESHOLD", 3))
+    OLLAMA_PROBE_MAX_BACKOFF = float(os.getenv("OLLAMA_PROBE_MAX_BACKOFF", 60.0))
+    
+    # Model Lifecycle (warm-up at startup, idle unload under memory pressure)
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    WARMUP_MODELS = [m.strip() for m in os.getenv("WARMUP_MODELS", LOCAL_LLM_MODEL).split(",") if m.strip()]
+    IDLE_UNLOAD_SECONDS = int(os.getenv("IDLE_UNLOAD_SECONDS", 600))
+    MEMORY_PRESSURE_PERCENT = float(os.getenv("MEMORY_PRESSURE_PERCENT", 85.0))
+    LIFECYCLE_CHECK_INTERVAL = int(os.getenv("LIFECYCLE_CHECK_INTERVAL", 30))
+    WARMUP_RETRY_INTERVAL = int(os.getenv("WARMUP_RETRY_INTERVAL", 120))  # seconds between retries of failed warm-ups
+    
+    # LLM Scheduler (max parallel Ollama calls from this brain)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 2))
+    
+    # Prompt Context Reuse (Ollama `context` tokens per session)
+    PROMPT_CACHE_MAX_TOKENS = int(os.getenv("PROMPT_CACHE_MAX_TOKENS", 3072))
+    PROMPT_CACHE_MAX_SESSIONS = int(os.getenv("PROMPT_CACHE_MAX_SESSIONS", 64))
+    
+    # Deep Research (independent plan steps run in parallel, still through the LLM scheduler)
+    RESEARCH_CONCURRENCY = int(os.getenv("RESEARCH_CONCURRENCY", 3))
+
+    # Task Plans ("step": confirm each step, "plan": confirm once, run via the kernel's /action/batch)
+    PLAN_CONFIRM_MODE = os.getenv("PLAN_CONFIRM_MODE", "step").lower()
+    
+    # Local Kernel Client (one pooled keep-alive connection, see core/kernel_client.py)
+    KERNEL_URL = os.getenv("KERNEL_URL", "http://localhost:8001")
+    KERNEL_UDS = os.getenv("KERNEL_UDS", "")  # kernel's Unix socket; KERNEL_URL then only sets the Host header
+    KERNEL_TIMEOUT = float(os.getenv("KERNEL_TIMEOUT", 10.0))
+    KERNEL_MAX_CONNECTIONS = int(os.getenv("KERNEL_MAX_CONNECTIONS", 10))
+    
+    # Vision Capture ("raw": grayscale pixels from /vision/frame, "png": legacy base64 JSON)
+    VISION_CAPTURE_MODE = os.getenv("VISION_CAPTURE_MODE", "raw").lower()
+    VISION_MAX_WIDTH = int(os.getenv("VISION_MAX_WIDTH", 1200))
+    VISION_STORE_SCREENSHOTS = os.getenv("VISION_STORE_SCREENSHOTS", "false").lower() == "true"  # color copy in the kernel store; adds resize/SHA-1/WebP per frame
+    
+    # App signatures for screen tagging (JSON: {"Tag": {"window": [...], "text": [...]}})
+    VISION_SIGNATURES_PATH = os.getenv(
+        "VISION_SIGNATURES_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "vision", "app_signatures.json")
+    )
+    
+    # Screen Watcher (opt-in: keep OCR/tags of the current screen precomputed)
+    SCREEN_WATCHER_ENABLED = os.getenv("SCREEN_WATCHER_ENABLED", "false").lower() == "true"
+    SCREEN_WATCHER_INTERVAL = float(os.getenv("SCREEN_WATCHER_INTERVAL", 1.0))
+    SCREEN_CONTEXT_MAX_AGE = float(os.getenv("SCREEN_CONTEXT_MAX_AGE", 10.0))
+    VISION_LAYOUT_MAX_AGE = float(os.getenv("VISION_LAYOUT_MAX_AGE", 5.0))  # re-capture before resolving click labels
+    
+    # Incremental OCR (re-read only tiles that changed since the last frame)
+    VISION_INCREMENTAL_OCR = os.getenv("VISION_INCREMENTAL_OCR", "true").lower() == "true"
+    VISION_DIFF_THRESHOLD = int(os.getenv("VISION_DIFF_THRESHOLD", 24))  # per-pixel gray delta
+    VISION_DIRTY_PIXELS = int(os.getenv("VISION_DIRTY_PIXELS", 8))  # changed pixels before a tile is re-read
+    VISION_MAX_TILE_HEIGHT = int(os.getenv("VISION_MAX_TILE_HEIGHT", 160))
+    VISION_TILE_OVERLAP = int(os.getenv("VISION_TILE_OVERLAP", 24))  # context rows OCR'd around a forced tile cut
+    
+    # OCR Result Cache (perceptual hash of the OCR input, Hamming tolerance as a fraction of its bits)
+    OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", 128))
+    OCR_CACHE_HASH_CELL = int(os.getenv("OCR_CACHE_HASH_CELL", 2))  # px per hash cell
+    OCR_CACHE_TOLERANCE = float(os.getenv("OCR_CACHE_TOLERANCE", 0))  # fraction of hash bits; 0 = exact hits only, 0.000125 ~ cursor + clock but also a changed digit
+    
+    # Tiled OCR (overlapping bands OCR'd in parallel, one Tesseract per core)
+    OCR_TILED = os.getenv("OCR_TILED", "false").lower() == "true"
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 2))
+    OCR_BAND_OVERLAP = int(os.getenv("OCR_BAND_OVERLAP", 24))
+    OCR_MIN_BAND_HEIGHT = int(os.getenv("OCR_MIN_BAND_HEIGHT", 160))
+
+    # Speech Recognition (Vosk)
+    VOSK_MODEL_PATH = os.getenv(
+        "VOSK_MODEL_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "vosk-model-small-en-us-0.15")
+    )
+    VOICE_WARMUP = os.getenv("VOICE_WARMUP", "false").lower() == "true"  # load in background at startup
+    # Load at import time, i.e. in the gunicorn master with --preload, so forked workers share the pages
+    VOICE_PRELOAD = os.getenv("VOICE_PRELOAD", "false").lower() == "true"
+    VOICE_WORKERS = int(os.getenv("VOICE_WORKERS", 2))  # decoder threads
+    VOICE_POOL_SIZE = int(os.getenv("VOICE_POOL_SIZE", 4))  # idle recognizers kept per sample rate
+    VOICE_VAD = os.getenv("VOICE_VAD", "true").lower() == "true"  # skip silence before decoding
+    VOICE_VAD_FRAME_MS = int(os.getenv("VOICE_VAD_FRAME_MS", 30))
+    VOICE_VAD_ENERGY = float(os.getenv("VOICE_VAD_ENERGY", 300))  # int16 RMS, about -40 dBFS
+    VOICE_VAD_PADDING_MS = int(os.getenv("VOICE_VAD_PADDING_MS", 300))
+    VOICE_VAD_PAUSE_MS = int(os.getenv("VOICE_VAD_PAUSE_MS", 700))  # silence that finalizes an utterance
     
     # Legacy flag mapped to local mode for backward compatibility if needed, 
     # but strictly we are "local_llm" now.
@@ -24,5 +114,6 @@ class Config:
     
     PORT = int(os.getenv("PORT", 8000))
     HOST = os.getenv("HOST", "0.0.0.0")
+    UDS = os.getenv("BRAIN_UDS", "")  # extra Unix socket listener for the kernel and audio clients
 
 config = Config()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from core.config import config
+
+logger = logging.getLogger("kernel_client")
+
+
+class KernelClient:
+    """
+    The brain's one HTTP client for the local kernel.
+
+    Holds a pooled keep-alive httpx.AsyncClient (optionally over a Unix
+    domain socket) instead of a new client and TCP handshake per call, and
+    records latency per endpoint. The pool is rebuilt if the event loop
+    changes (tests, reloads), since connections belong to a loop.
+    """
+
+    def __init__(self, base_url: str, uds: Optional[str] = None, timeout: float = 10.0,
+                 max_connections: int = 10, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.uds = uds or None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            transport = self._transport
+            if transport is None and self.uds:
+                transport = httpx.AsyncHTTPTransport(uds=self.uds, limits=limits)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=limits,
+                transport=transport
+            )
+            self._loop = loop
+        return self._client
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    # --- Transport ---
+
+    def _record(self, name: str, elapsed: float, error: bool = False):
+        s = self._latency.setdefault(name, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        ms = elapsed * 1000
+        s["count"] += 1
+        s["errors"] += int(error)
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+        s["last_ms"] = round(ms, 2)
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """One call on the shared pool; raises for HTTP errors."""
+        name = f"{method.upper()} {path}"
+        start = time.perf_counter()
+        try:
+            resp = await getattr(self.client, method.lower())(path, **kwargs)
+            resp.raise_for_status()
+        except Exception:
+            self._record(name, time.perf_counter() - start, error=True)
+            raise
+        self._record(name, time.perf_counter() - start)
+        return resp
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs):
+        name = f"{method.upper()} {path}"
+        start = time.perf_counter()
+        error = False
+        try:
+            async with self.client.stream(method, path, **kwargs) as resp:
+                resp.raise_for_status()
+                yield resp
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(name, time.perf_counter() - start, error)
+
+    # --- Kernel API ---
+
+    async def screenshot(self) -> Dict[str, Any]:
+        """Legacy PNG/WebP base64 capture (`/vision/screenshot`)."""
+        return (await self.request("GET", "/vision/screenshot", timeout=5.0)).json()
+
+    async def frame(self, max_width: int = 0, store: bool = False) -> httpx.Response:
+        """Raw L8 frame (`/vision/frame`): pixels in the body, geometry in headers."""
+        return await self.request("GET", "/vision/frame", params={"max_width": max_width, "store": store}, timeout=5.0)
+
+    async def run_action(self, action: str, params: Any = None, mode: str = "SIMULATED",
+                         wait: bool = False, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Queue an action; with wait=True the kernel answers with its result."""
+        payload = {"action": action, "params": params, "mode": mode, "wait": wait}
+        return (await self.request("POST", "/action/run", json=payload, timeout=timeout or self.timeout)).json()
+
+    async def run_batch(self, steps: List[Dict], mode: str = "REAL") -> AsyncIterator[Dict[str, Any]]:
+        """Run a plan via `/action/batch`; yields step updates as the kernel streams them."""
+        payload = {"steps": steps, "mode": mode, "stream": True}
+        async with self.stream("POST", "/action/batch", json=payload,
+                               timeout=httpx.Timeout(self.timeout, read=None)) as resp:
+            async for line in resp.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def telemetry(self) -> Dict[str, Any]:
+        """Cached telemetry snapshot (`/stream`)."""
+        return (await self.request("GET", "/stream", timeout=2.0)).json()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "uds": self.uds,
+            "endpoints": {
+                name: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 2),
+                    "last_ms": s["last_ms"],
+                }
+                for name, s in self._latency.items()
+            },
+        }
+
+
+kernel_client = KernelClient(
+    config.KERNEL_URL,
+    uds=config.KERNEL_UDS,
+    timeout=config.KERNEL_TIMEOUT,
+    max_connections=config.KERNEL_MAX_CONNECTIONS
+)
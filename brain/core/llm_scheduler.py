@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+
+from core.config import config
+
+logger = logging.getLogger("llm_scheduler")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0     # chat / search / task answers the user is waiting on
+    CLASSIFICATION = 1  # intent detection
+    BACKGROUND = 2      # deep research, self-check verification, warm-up
+
+
+# Request-scoped defaults, so agents deep in the call stack don't have to
+# thread user/priority through every local_engine.generate call.
+_current_user: contextvars.ContextVar[str] = contextvars.ContextVar("llm_user", default="user")
+_current_priority: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar("llm_priority", default=None)
+
+
+class LLMScheduler:
+    """
+    Concurrency limiter in front of Ollama.
+
+    At most `max_concurrency` calls run at once. Waiters are served by
+    priority class first, then round-robin across users inside a class so one
+    user's long research run can't starve another user's chat. A waiter that
+    gets cancelled (client went away) is simply dropped from the queue.
+    """
+
+    def __init__(self, max_concurrency: int = 2):
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        # {priority: OrderedDict{user_id: deque[Future]}}
+        self._queues: Dict[Priority, "OrderedDict[str, deque]"] = {p: OrderedDict() for p in Priority}
+        self._stats = {
+            p: {"started": 0, "cancelled": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for p in Priority
+        }
+
+    # --- Request context ---
+
+    @contextmanager
+    def context(self, user_id: Optional[str] = None, priority: Optional[Priority] = None):
+        """
+        Set default user / priority for LLM calls made inside this block
+        (and in tasks created inside it).
+        """
+        user_token = _current_user.set(user_id) if user_id is not None else None
+        prio_token = _current_priority.set(priority) if priority is not None else None
+        try:
+            yield
+        finally:
+            if prio_token is not None:
+                _current_priority.reset(prio_token)
+            if user_token is not None:
+                _current_user.reset(user_token)
+
+    def resolve(self, priority: Optional[Priority] = None, user_id: Optional[str] = None):
+        if priority is None:
+            priority = _current_priority.get()
+        if priority is None:
+            priority = Priority.INTERACTIVE
+        return Priority(priority), user_id or _current_user.get()
+
+    # --- Slots ---
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None, user_id: Optional[str] = None):
+        priority, user_id = self.resolve(priority, user_id)
+        await self._acquire(priority, user_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority, user_id: str):
+        start = time.monotonic()
+        if self._active < self.max_concurrency and not self.queued():
+            self._active += 1
+            self._record_wait(priority, start)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(user_id, deque()).append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over right as we got cancelled
+                self._release()
+            else:
+                self._remove(priority, user_id, fut)
+            self._stats[priority]["cancelled"] += 1
+            raise
+        self._record_wait(priority, start)
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency:
+            fut = self._next_waiter()
+            if fut is None:
+                return
+            self._active += 1
+            fut.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in Priority:
+            users = self._queues[priority]
+            while users:
+                # Take the head user, move them to the back (round-robin)
+                user_id, waiters = users.popitem(last=False)
+                fut = None
+                while waiters:
+                    candidate = waiters.popleft()
+                    if not candidate.done():
+                        fut = candidate
+                        break
+                if waiters:
+                    users[user_id] = waiters
+                if fut is not None:
+                    return fut
+        return None
+
+    def _remove(self, priority: Priority, user_id: str, fut: asyncio.Future):
+        waiters = self._queues[priority].get(user_id)
+        if not waiters:
+            return
+        try:
+            waiters.remove(fut)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._queues[priority][user_id]
+
+    # --- Metrics ---
+
+    def _record_wait(self, priority: Priority, start: float):
+        wait_ms = (time.monotonic() - start) * 1000
+        s = self._stats[priority]
+        s["started"] += 1
+        s["wait_ms_total"] += wait_ms
+        s["wait_ms_max"] = max(s["wait_ms_max"], wait_ms)
+
+    def queued(self, priority: Optional[Priority] = None) -> int:
+        prios = [priority] if priority is not None else list(Priority)
+        return sum(
+            sum(1 for f in waiters if not f.done())
+            for p in prios for waiters in self._queues[p].values()
+        )
+
+    def stats(self) -> Dict:
+        classes = {}
+        for p in Priority:
+            s = self._stats[p]
+            classes[p.name.lower()] = {
+                "queued": self.queued(p),
+                "started": s["started"],
+                "cancelled": s["cancelled"],
+                "wait_ms_avg": round(s["wait_ms_total"] / s["started"], 2) if s["started"] else 0.0,
+                "wait_ms_max": round(s["wait_ms_max"], 2),
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queued": self.queued(),
+            "classes": classes,
+        }
+
+
+llm_scheduler = LLMScheduler(max_concurrency=config.LLM_MAX_CONCURRENCY)
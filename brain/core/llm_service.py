@@ -1,5 +1,7 @@
 
 from core.local_model_engine import local_engine
+from core.config import config
+from core.llm_scheduler import Priority
 from core.memory_service import memory_service
 from core.agents.search_agent import SearchAgent
 from core.agents.task_agent import TaskAgent
@@ -9,13 +11,17 @@ import asyncio
 
 
 # Templates
-PROMPT_CHAT = """
+# Static preambles come first so Ollama can reuse their evaluated prefix
+# (keep_alive + `context`) instead of re-processing them on every request.
+PROMPT_CHAT_PREAMBLE = """
 System: You are Sentient OS, a helpful and intelligent AI assistant. 
 You strictly follow these rules:
 1. Be concise and friendly.
 2. Use context from memory if relevant.
 3. If unsure, admit it.
+"""
 
+PROMPT_CHAT = PROMPT_CHAT_PREAMBLE + """
 Context:
 {context}
 
@@ -26,6 +32,16 @@ User: {query}
 Assistant:
 """
 
+# Follow-up turn sent on top of a cached session context
+# (preamble and history are already in the model's KV state).
+PROMPT_CHAT_FOLLOWUP = """
+Context:
+{context}
+
+User: {query}
+Assistant:
+"""
+
 PROMPT_SEARCH = """
 System: You are a Research Assistant. Synthesize the provided Search Results to answer the user's question.
 If the results do not contain the answer, say "I couldn't find that information locally."
@@ -46,6 +62,20 @@ User: {query}
 Output JSON ONLY.
 """
 
+PROMPT_INTENT = """
+Classify the user intent.
+- SEARCH: asking for facts, history, or information retrieval.
+- TASK: asking to perform an action (open app, type, click, plan).
+- CHAT: casual conversation, greeting, philosophy.
+- VISION: asking about screen content, what you see.
+- TOOL: asking for time, searching files, utilities.
+
+Respond with ONLY one word: CHAT, SEARCH, TASK, VISION, or TOOL.
+
+Query: {query}
+Intent:
+"""
+
 class LLMService:
     def __init__(self):
         self._search_agent = SearchAgent()
@@ -89,14 +119,26 @@ class LLMService:
             
         return "\n".join([f"- {txt[:200]}" for txt in filtered])
 
+    def _retrieval_only(self, text: str) -> str:
+        """
+        Degraded answer while the local model is down: memory matches only.
+        """
+        from core.vector_store import vector_store
+        context = self._filter_context(vector_store.search(text, k=3))
+        if not context:
+            return "My local model is currently unavailable and I found nothing relevant in memory."
+        return f"My local model is currently unavailable. Here is what I found in memory:\n{context}"
+
     async def _self_check(self, question: str, answer: str) -> bool:
         """
         Lightweight check: Does answer match question?
         """
+        if not local_engine.available:
+            return True # Nothing to verify with
         prompt = f"Question: {question}\nAnswer: {answer}\nDoes the answer directly address the question? YES or NO."
         try:
             # Very short timeout for check
-            check = await asyncio.wait_for(local_engine.generate(prompt), timeout=10.0)
+            check = await asyncio.wait_for(local_engine.generate(prompt, template="self_check", priority=Priority.BACKGROUND), timeout=10.0)
             return "YES" in check.upper()
         except:
             return True # Fallback to trusting generation on timeout
@@ -106,21 +148,10 @@ class LLMService:
         if text in self._intent_cache:
             return self._intent_cache[text]
 
-        prompt = f"""
-        Classify the user intent.
-        - SEARCH: asking for facts, history, or information retrieval.
-        - TASK: asking to perform an action (open app, type, click, plan).
-        - CHAT: casual conversation, greeting, philosophy.
-        - VISION: asking about screen content, what you see.
-        - TOOL: asking for time, searching files, utilities.
-        
-        Query: {text}
-        
-        Respond with ONLY one word: CHAT, SEARCH, TASK, VISION, or TOOL.
-        """
+        prompt = PROMPT_INTENT.format(query=text)
         try:
             # Short timeout for classification
-            response = await asyncio.wait_for(local_engine.generate(prompt), timeout=5.0)
+            response = await asyncio.wait_for(local_engine.generate(prompt, template="intent", priority=Priority.CLASSIFICATION), timeout=5.0)
             intent = response.strip().upper()
         except asyncio.TimeoutError:
             print("Intent detection timeout, defaulting to CHAT")
@@ -141,13 +172,17 @@ class LLMService:
         
         return final_intent
 
-    async def generate_response(self, text: str, history: list = None, stream: bool = False) -> str:
+    async def generate_response(self, text: str, history: list = None, stream: bool = False, user_id: str = "user") -> str:
+        # Ollama known down (circuit open): answer from memory right away
+        if not local_engine.available:
+            return self._retrieval_only(text)
+
         # 0. Deep Research Check (v1.9)
         research_keywords = ["research", "investigate", "analyze deeply", "full report"]
         if any(k in text.lower() for k in research_keywords):
              print(f"DEBUG: Routing to Deep Research Agent: {text}")
              from core.agents.deep_research_agent import deep_research_agent
-             res = await deep_research_agent.run(text)
+             res = await deep_research_agent.run(text, on_event=self._broadcast_research)
              return f"**Deep Research Report**\n\n{res.get('final_answer', str(res))}\n\n*Sources: {len(res.get('citations', []))}*"
 
         # 1. Detect Intent
@@ -174,12 +209,12 @@ class LLMService:
                 context_str = self._filter_context(raw_list)
                 prompt = PROMPT_SEARCH.format(context=context_str, query=text)
                 
-                response = await local_engine.generate(prompt)
+                response = await local_engine.generate(prompt, template="search")
                 
                 # Self Check
                 if not await self._self_check(text, response):
                     print("Self-check failed. Regenerating...")
-                    response = await local_engine.generate(prompt + "\nRefine the answer to be more direct.")
+                    response = await local_engine.generate(prompt + "\nRefine the answer to be more direct.", template="search")
                     
                 return response
             else:
@@ -196,7 +231,9 @@ class LLMService:
             self._active_plans[plan_id] = plan
             self._plan_progress[plan_id] = 0
             
-            if plan:
+            if plan and config.PLAN_CONFIRM_MODE == "plan":
+                await self._request_plan_confirmation(plan_id)
+            elif plan:
                 await self._trigger_step(plan_id)
 
             return f"I have created a plan with {len(plan)} steps.\n\n```json\n{steps_str}\n```\n\n(Follow instructions on screen)"
@@ -213,7 +250,7 @@ class LLMService:
             # CHAT
             # Get Context (Vector Search + Memory)
             # 1. Memory Service (Short Term)
-            recent_msgs = memory_service.get_history("user", limit=5)
+            recent_msgs = memory_service.get_history(user_id, limit=5)
             history_str = "\n".join([f"{m['role']}: {m['content']}" for m in recent_msgs])
             
             # 2. Vector Search (Long Term) - NOT in original CHAT logic, adding it for v1.9
@@ -231,11 +268,18 @@ class LLMService:
             if stream:
                 return local_engine.generate_stream(full_prompt)
             else:
-                response = await local_engine.generate(full_prompt)
+                followup_prompt = PROMPT_CHAT_FOLLOWUP.format(context=long_term_ctx, query=text)
+                response = await local_engine.generate_session(
+                    user_id, "chat", full_prompt, followup_prompt, recent_msgs, text, window=5
+                )
                 # Self Check for Chat
                 if not await self._self_check(text, response):
-                     # Retry once
-                     response = await local_engine.generate(full_prompt + "\nSystem: Previous answer was off-topic. Try again.")
+                     # Retry once (reuses the same base context)
+                     retry_suffix = "\nSystem: Previous answer was off-topic. Try again."
+                     response = await local_engine.generate_session(
+                         user_id, "chat", full_prompt + retry_suffix, followup_prompt + retry_suffix,
+                         recent_msgs, text, window=5
+                     )
                 return response
 
     async def _trigger_step(self, plan_id):
@@ -278,6 +322,64 @@ class LLMService:
             }
         })
 
+    async def _broadcast_research(self, event):
+        """Partial deep research results (plan, finished steps) for the UI."""
+        if event["type"] == "research.result":
+            return  # The report is the chat reply
+        from api.ws_handlers import manager
+        await manager.broadcast_json({"type": event["type"], "payload": event})
+
+    async def _request_plan_confirmation(self, plan_id):
+        """
+        "plan" confirm mode: one confirmation for every step of the plan.
+        """
+        plan = self._active_plans.get(plan_id)
+        import uuid
+        action_id = str(uuid.uuid4())
+        self._pending_actions[action_id] = {"plan": plan, "plan_id": plan_id}
+
+        steps = "; ".join(f"{i+1}. {a.get('action')} {a.get('params')}" for i, a in enumerate(plan))
+        summary = f"Allow plan of {len(plan)} steps: {steps}?"
+        if len(plan) > 3:
+            summary = "[ELEVATED] " + summary
+
+        from api.ws_handlers import manager
+        await manager.broadcast_json({
+            "type": "action.confirmation",
+            "payload": {
+                "action_id": action_id,
+                "intent": "PLAN",
+                "summary": summary,
+                "execution_data": {"steps": plan},
+                "sequence_id": plan_id
+            }
+        })
+
+    async def _run_batch(self, steps):
+        """Posts the whole plan to the kernel; yields its streamed step updates."""
+        from core.kernel_client import kernel_client
+        async for update in kernel_client.run_batch(steps, mode="REAL"):
+            yield update
+
+    async def _execute_plan(self, plan_id, plan):
+        from api.ws_handlers import manager
+        steps = [{"action": a.get("action"), "params": a.get("params"), "wait": a.get("wait")} for a in plan]
+        summary = {"status": "failed", "steps_run": 0}
+        try:
+            async for update in self._run_batch(steps):
+                if update.get("type") == "batch.result":
+                    summary = update["result"]
+                    continue
+                self._plan_progress[plan_id] = update["index"] + 1
+                await manager.broadcast_json({
+                    "type": "action.step_result",
+                    "payload": {**update, "sequence_id": plan_id, "total": len(plan)}
+                })
+        except Exception as e:
+            print(f"Execution Error: {e}")
+
+        return f"Executed {summary.get('steps_run', 0)}/{len(plan)} steps ({summary.get('status')})"
+
     async def confirm_action(self, action_id: str):
         """
         Called when user confirms an action via UI.
@@ -286,22 +388,22 @@ class LLMService:
             return "Action expired or unknown."
             
         data = self._pending_actions.pop(action_id)
-        action = data['action']
         plan_id = data['plan_id']
+        if "plan" in data:
+            return await self._execute_plan(plan_id, data["plan"])
+        action = data['action']
         
         # Execute
         print(f"Executing Action: {action}")
-        import httpx
+        from core.kernel_client import kernel_client
         try:
-             async with httpx.AsyncClient() as client:
-                 await client.post("http://localhost:8001/action/run", json={
-                     "action": action.get("action"),
-                     "params": action.get("params"),
-                     "mode": "REAL"
-                 })
-                 
+            # Wait for the kernel's result so the user sees what actually happened
+            result = await kernel_client.run_action(action.get("action"), action.get("params"), "REAL", wait=True)
+            status = result.get("status", "unknown")
+            reason = result.get("reason")
         except Exception as e:
             print(f"Execution Error: {e}")
+            status, reason = "error", str(e)
             
         # Increment Step
         if plan_id in self._plan_progress:
@@ -309,6 +411,6 @@ class LLMService:
             # Trigger next
             await self._trigger_step(plan_id)
             
-        return "Executed"
+        return f"Executed ({status}: {reason})" if reason else f"Executed ({status})"
 
 llm_service = LLMService()
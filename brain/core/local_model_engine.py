@@ -1,15 +1,15 @@
 import httpx
 import json
 import logging
-from typing import Iterator, List, Optional
-from PIL import Image
-import pytesseract
+from typing import Dict, Iterator, List, Optional
 from sentence_transformers import SentenceTransformer
-from functools import lru_cache
-import io
-import hashlib
 
 from core.config import config
+from core.prompt_cache import PromptCache
+from core.model_lifecycle import model_lifecycle
+from core.llm_scheduler import llm_scheduler, Priority
+from core.circuit_breaker import CircuitOpenError
+from core.ollama_pool import ollama_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,6 +19,14 @@ class LocalModelEngine:
         self.ollama_url = config.OLLAMA_URL
         self.model_name = config.LOCAL_LLM_MODEL
         self.embedding_model = None
+        self.prompt_cache = PromptCache(
+            max_tokens=config.PROMPT_CACHE_MAX_TOKENS,
+            max_sessions=config.PROMPT_CACHE_MAX_SESSIONS
+        )
+        # Short connect timeout: a dead Ollama should fail in seconds, not 60s
+        self._timeout = httpx.Timeout(60.0, connect=config.OLLAMA_CONNECT_TIMEOUT)
+        # Backends with per-instance circuit breakers (see core/ollama_pool.py)
+        self.pool = ollama_pool
         
         # Lazy load embeddings to avoid startup delay
         self._load_embedding_model_async()
@@ -39,33 +47,96 @@ class LocalModelEngine:
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
 
-    async def generate(self, text: str) -> str:
+    @property
+    def available(self) -> bool:
+        """False while every Ollama backend's circuit breaker is open."""
+        return self.pool.available
+
+    async def _post_generate(self, payload: dict, priority: Optional[Priority] = None,
+                             user_id: Optional[str] = None) -> dict:
+        """
+        Raw non-streamed /api/generate call. Returns the full Ollama JSON.
+        Waits for a slot in the LLM scheduler first.
+        Raises CircuitOpenError without touching the network while Ollama is down.
+        """
+        payload.setdefault("model", self.model_name)
+        payload.setdefault("stream", False)
+        payload.setdefault("keep_alive", config.OLLAMA_KEEP_ALIVE)
+
+        self.pool.check()
+        async with llm_scheduler.slot(priority, user_id):
+            # Backends may have gone down while we were queued
+            backend = self.pool.pick(payload["model"])
+            model_lifecycle.touch(payload["model"])
+            async with backend.lease(payload["model"]):
+                try:
+                    async with httpx.AsyncClient() as client:
+                        response = await client.post(f"{backend.url}/api/generate", json=payload, timeout=self._timeout)
+                        response.raise_for_status()
+                        data = response.json()
+                except Exception as e:
+                    backend.track(e)
+                    raise
+                backend.track()
+            return data
+
+    async def generate(self, text: str, template: str = "default", priority: Optional[Priority] = None) -> str:
         """
         Generates text using the local Ollama instance.
+        `template` only labels prompt-eval stats; `priority` defaults to the
+        scheduler context (interactive if unset).
         """
         if config.MOCK_LLM:
              return f"Local Mock: {text}"
 
-        url = f"{self.ollama_url}/api/generate"
-        payload = {
-            "model": self.model_name,
-            "prompt": text,
-            "stream": False
-        }
-        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=60.0)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("response", "")
+            data = await self._post_generate({"prompt": text}, priority=priority)
+            self.prompt_cache.record_eval(template, data)
+            return data.get("response", "")
+        except CircuitOpenError as e:
+            return f"Error: Local model unavailable ({e})."
+        except httpx.ConnectError:
+            return "Error: Could not connect to local Ollama instance at 127.0.0.1:11434. Is it running?"
+        except Exception as e:
+            logger.error(f"Local generation error: {e}")
+            return f"Error regenerating text locally: {e}"
+
+    async def generate_session(self, session_id: str, template: str, full_prompt: str,
+                               followup_prompt: str, history: List[Dict], query: str,
+                               window: int = 5) -> str:
+        """
+        Session-aware generation.
+        Sends `followup_prompt` on top of the cached Ollama context when the
+        session history still matches it, otherwise the full prompt.
+        """
+        if config.MOCK_LLM:
+            return f"Local Mock: {full_prompt}"
+
+        context = self.prompt_cache.lookup(session_id, template, history)
+        payload = {"prompt": followup_prompt if context else full_prompt}
+        if context:
+            payload["context"] = context
+
+        try:
+            data = await self._post_generate(payload, priority=Priority.INTERACTIVE, user_id=session_id)
+        except CircuitOpenError as e:
+            return f"Error: Local model unavailable ({e})."
         except httpx.ConnectError:
             return "Error: Could not connect to local Ollama instance at 127.0.0.1:11434. Is it running?"
         except Exception as e:
             logger.error(f"Local generation error: {e}")
+            self.prompt_cache.invalidate(session_id, template)
             return f"Error regenerating text locally: {e}"
 
-    async def generate_stream(self, text: str) -> Iterator[str]:
+        response = data.get("response", "")
+        self.prompt_cache.record_eval(template, data, reused_tokens=len(context) if context else 0)
+        self.prompt_cache.store(
+            session_id, template, history, query, response,
+            base_context=context, context=data.get("context"), window=window
+        )
+        return response
+
+    async def generate_stream(self, text: str, priority: Optional[Priority] = None) -> Iterator[str]:
         """
         Stream generation from Ollama.
         """
@@ -73,27 +144,37 @@ class LocalModelEngine:
             yield f"Mock stream: {text}"
             return
 
-        url = f"{self.ollama_url}/api/generate"
         payload = {
             "model": self.model_name,
             "prompt": text,
-            "stream": True
+            "stream": True,
+            "keep_alive": config.OLLAMA_KEEP_ALIVE
         }
 
+        backend = None
         try:
-            async with httpx.AsyncClient() as client:
-                async with client.stream("POST", url, json=payload, timeout=60.0) as response:
-                    async for line in response.aiter_lines():
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                if "response" in data:
-                                    yield data["response"]
-                                if data.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                continue
+            self.pool.check()
+            async with llm_scheduler.slot(priority):
+                backend = self.pool.pick(self.model_name)
+                model_lifecycle.touch(self.model_name)
+                async with backend.lease(self.model_name):
+                    async with httpx.AsyncClient() as client:
+                        async with client.stream("POST", f"{backend.url}/api/generate", json=payload, timeout=self._timeout) as response:
+                            response.raise_for_status()
+                            backend.track()
+                            async for line in response.aiter_lines():
+                                if line:
+                                    try:
+                                        data = json.loads(line)
+                                        if "response" in data:
+                                            yield data["response"]
+                                        if data.get("done", False):
+                                            break
+                                    except json.JSONDecodeError:
+                                        continue
         except Exception as e:
+            if backend:
+                backend.track(e)
             logger.error(f"Stream error: {e}")
             yield f"[Stream Error: {e}]"
 
@@ -118,7 +199,10 @@ class LocalModelEngine:
     def ocr(self, image_path_or_bytes) -> str:
         """
         Performs OCR on an image using local Tesseract.
+        Shares the perceptual-hash result cache with the vision pipeline.
         """
+        from core.vision.ocr_engine import ocr_engine
+
         try:
             # If path, read bytes
             if isinstance(image_path_or_bytes, str):
@@ -127,19 +211,9 @@ class LocalModelEngine:
             else:
                 img_bytes = image_path_or_bytes
 
-            return self._ocr_cached(img_bytes)
+            return ocr_engine.extract_text(img_bytes)
         except Exception as e:
             logger.error(f"OCR error: {e}")
             return ""
 
-    @lru_cache(maxsize=32)
-    def _ocr_cached(self, img_bytes: bytes) -> str:
-        try:
-            image = Image.open(io.BytesIO(img_bytes))
-            text = pytesseract.image_to_string(image)
-            return text.strip()
-        except Exception as e:
-            logger.error(f"OCR processing error: {e}")
-            return ""
-
 local_engine = LocalModelEngine()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import psutil
+
+from core.config import config
+from core.llm_scheduler import llm_scheduler, Priority
+from core.ollama_pool import ollama_pool, normalize_model
+
+logger = logging.getLogger("model_lifecycle")
+
+
+class ModelLifecycle:
+    """
+    Background warm-up and keep-alive management for the local models.
+
+    On startup the configured Ollama models are loaded with a one-token
+    generation and pinned via `keep_alive`, the SentenceTransformer gets a
+    batch encode and Tesseract a tiny OCR run, so the first real request
+    doesn't pay any cold start. A monitor loop unloads idle Ollama models
+    while psutil reports memory pressure and retries failed warm-ups every
+    WARMUP_RETRY_INTERVAL seconds. OCR is optional: it shows up in
+    `readiness()` but doesn't gate it.
+    """
+
+    OPTIONAL_COMPONENTS = ("ocr",)
+
+    def __init__(self):
+        self.components: Dict[str, Dict] = {
+            "llm": {"state": "pending"},
+            "embeddings": {"state": "pending"},
+            "ocr": {"state": "pending"},
+        }
+        # {model: {"loaded": bool, "last_used": ts, "load_ms": float}}
+        self.models: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+        self._last_warmup = 0.0
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    # --- Usage tracking ---
+
+    def touch(self, model: str):
+        """Called by the engine whenever a model serves a request."""
+        info = self.models.setdefault(model, {"loaded": False, "last_used": 0.0})
+        info["loaded"] = True
+        info["last_used"] = time.time()
+
+    # --- Startup ---
+
+    def start(self):
+        """Schedule warm-up and the idle monitor on the running loop."""
+        if self._warmup_task is None:
+            self.started_at = time.time()
+            self._warmup_task = asyncio.create_task(self.warmup())
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self._monitor_loop())
+
+    def skip_warmup(self):
+        """Warm-up disabled: models load on first use, so nothing to wait for."""
+        for name, component in self.components.items():
+            if component["state"] == "pending":
+                self.components[name] = {"state": "skipped"}
+
+    async def stop(self):
+        for task in (self._warmup_task, self._monitor_task):
+            if task and not task.done():
+                task.cancel()
+        self._warmup_task = None
+        self._monitor_task = None
+
+    async def warmup(self):
+        self._last_warmup = time.time()
+        await self._warm_llm(config.WARMUP_MODELS)
+        await self._run_component("embeddings", self._warm_embeddings)
+        await self._run_component("ocr", self._warm_ocr)
+        logger.info(f"Warm-up finished. Ready: {self.is_ready()}")
+
+    async def retry_failed(self):
+        """Warm up again whatever failed last time (e.g. Ollama started late)."""
+        self._last_warmup = time.time()
+        llm = self.components["llm"]
+        if llm["state"] == "failed":
+            await self._warm_llm(list(llm.get("error") or config.WARMUP_MODELS))
+        if self.components["embeddings"]["state"] == "failed":
+            await self._run_component("embeddings", self._warm_embeddings)
+        if self.components["ocr"]["state"] == "failed":
+            await self._run_component("ocr", self._warm_ocr)
+
+    async def _run_component(self, name: str, fn):
+        self.components[name] = {"state": "warming"}
+        start = time.time()
+        try:
+            await asyncio.to_thread(fn)
+            self.components[name] = {"state": "ready", "warmup_ms": round((time.time() - start) * 1000, 1)}
+        except Exception as e:
+            logger.error(f"Warm-up of {name} failed: {e}")
+            self.components[name] = {"state": "failed", "error": str(e)}
+
+    async def _warm_llm(self, models: List[str]):
+        if config.MOCK_LLM:
+            self.components["llm"] = {"state": "skipped"}
+            return
+
+        self.components["llm"] = {"state": "warming"}
+        errors = {}
+        for model in models:
+            try:
+                await self.preload(model)
+            except Exception as e:
+                logger.error(f"Preloading {model} failed: {e}")
+                errors[model] = str(e)
+
+        if errors:
+            self.components["llm"] = {"state": "failed", "error": errors}
+        else:
+            self.components["llm"] = {"state": "ready"}
+
+    async def preload(self, model: str):
+        """
+        Load `model` with a one-token generation and pin it with keep_alive.
+        """
+        start = time.time()
+        async with llm_scheduler.slot(Priority.BACKGROUND, user_id="system"):
+            backend = ollama_pool.pick(model)
+            async with backend.lease(model), httpx.AsyncClient() as client:
+                resp = await client.post(
+                    f"{backend.url}/api/generate",
+                    json={
+                        "model": model,
+                        "prompt": "ping",
+                        "stream": False,
+                        "keep_alive": config.OLLAMA_KEEP_ALIVE,
+                        "options": {"num_predict": 1},
+                    },
+                    timeout=300.0,  # First load reads the whole model from disk
+                )
+                resp.raise_for_status()
+
+        load_ms = round((time.time() - start) * 1000, 1)
+        self.touch(model)
+        self.models[model]["load_ms"] = load_ms
+        logger.info(f"Model {model} preloaded on {backend.url} in {load_ms} ms (keep_alive={config.OLLAMA_KEEP_ALIVE})")
+
+    def _warm_embeddings(self):
+        from core.local_model_engine import local_engine
+
+        if not local_engine.embedding_model:
+            local_engine._load_embedding_model_async()
+        if not local_engine.embedding_model:
+            raise RuntimeError("Embedding model not available")
+        local_engine.embedding_model.encode(
+            ["warm-up", "Sentient OS embedding warm-up batch", "hello world", "screen context"],
+            batch_size=4
+        )
+
+    def _warm_ocr(self):
+        import pytesseract
+        from PIL import Image, ImageDraw
+
+        img = Image.new("L", (160, 40), 255)
+        ImageDraw.Draw(img).text((10, 12), "warm up", fill=0)
+        pytesseract.image_to_string(img)
+
+    # --- Idle unload ---
+
+    async def unload(self, model: str):
+        """Ask every Ollama backend holding `model` to drop it (keep_alive=0)."""
+        backends = ollama_pool.backends_with(model) or ollama_pool.backends
+        async with httpx.AsyncClient() as client:
+            for backend in backends:
+                await client.post(
+                    f"{backend.url}/api/generate",
+                    json={"model": model, "prompt": "", "keep_alive": 0},
+                    timeout=10.0,
+                )
+                backend.loaded_models.discard(normalize_model(model))
+        info = self.models.setdefault(model, {"last_used": 0.0})
+        info["loaded"] = False
+        logger.info(f"Model {model} unloaded.")
+
+    def idle_models(self, now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        return [
+            m for m, info in self.models.items()
+            if info.get("loaded") and now - info.get("last_used", 0.0) >= config.IDLE_UNLOAD_SECONDS
+        ]
+
+    async def check_memory_pressure(self) -> List[str]:
+        """
+        Unload idle models if RAM usage is above the configured threshold.
+        Returns the models that were unloaded.
+        """
+        mem = psutil.virtual_memory()
+        if mem.percent < config.MEMORY_PRESSURE_PERCENT:
+            return []
+
+        unloaded = []
+        for model in self.idle_models():
+            logger.warning(f"Memory pressure ({mem.percent}%): unloading idle model {model}")
+            try:
+                await self.unload(model)
+                unloaded.append(model)
+            except Exception as e:
+                logger.error(f"Unload of {model} failed: {e}")
+        return unloaded
+
+    async def _monitor_loop(self):
+        while True:
+            await asyncio.sleep(config.LIFECYCLE_CHECK_INTERVAL)
+            try:
+                await self.check_memory_pressure()
+                warming = self._warmup_task and not self._warmup_task.done()
+                failed = any(c["state"] == "failed" for c in self.components.values())
+                if failed and not warming and time.time() - self._last_warmup >= config.WARMUP_RETRY_INTERVAL:
+                    await self.retry_failed()
+            except Exception as e:
+                logger.error(f"Lifecycle monitor error: {e}")
+
+    # --- Readiness ---
+
+    def is_ready(self) -> bool:
+        return all(
+            c["state"] in ("ready", "skipped")
+            for name, c in self.components.items() if name not in self.OPTIONAL_COMPONENTS
+        )
+
+    def readiness(self) -> Dict:
+        now = time.time()
+        return {
+            "ready": self.is_ready(),
+            "components": self.components,
+            "optional": list(self.OPTIONAL_COMPONENTS),
+            "models": {
+                m: {
+                    "loaded": info.get("loaded", False),
+                    "idle_s": round(now - info["last_used"], 1) if info.get("last_used") else None,
+                    "load_ms": info.get("load_ms"),
+                }
+                for m, info in self.models.items()
+            },
+            "keep_alive": config.OLLAMA_KEEP_ALIVE,
+            "memory_percent": psutil.virtual_memory().percent,
+        }
+
+
+model_lifecycle = ModelLifecycle()
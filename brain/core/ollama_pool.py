@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from core.config import config
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger("ollama_pool")
+
+
+def normalize_model(name: str) -> str:
+    """'mistral' and 'mistral:latest' are the same model to Ollama."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class OllamaBackend:
+    """
+    One Ollama instance: outstanding request count, models it currently has
+    in memory (from /api/ps) and its own circuit breaker.
+    """
+
+    def __init__(self, url: str, failure_threshold: int = 3, max_backoff: float = 60.0):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.requests = 0
+        self.loaded_models: Set[str] = set()
+        self.last_refresh: Optional[float] = None
+        self.breaker = CircuitBreaker(
+            f"ollama@{self.url}",
+            probe=self.probe,
+            failure_threshold=failure_threshold,
+            max_backoff=max_backoff
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def has_model(self, model: str) -> bool:
+        return normalize_model(model) in self.loaded_models
+
+    async def probe(self) -> bool:
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(f"{self.url}/api/version", timeout=2.0)
+            return resp.status_code == 200
+
+    async def refresh(self):
+        """Health check + loaded-model refresh via /api/ps."""
+        try:
+            async with httpx.AsyncClient() as client:
+                resp = await client.get(f"{self.url}/api/ps", timeout=2.0)
+                resp.raise_for_status()
+                models = resp.json().get("models", []) or []
+        except Exception as e:
+            self.track(e)
+            return
+        self.loaded_models = {normalize_model(m.get("name") or m.get("model", "")) for m in models}
+        self.last_refresh = time.time()
+        self.track()
+
+    def track(self, error: Optional[Exception] = None):
+        """Feed a call outcome into the breaker. Only backend faults count."""
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, httpx.TransportError):
+            self.breaker.record_failure(error)
+        elif isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500:
+            self.breaker.record_failure(error)
+
+    @asynccontextmanager
+    async def lease(self, model: str):
+        self.outstanding += 1
+        self.requests += 1
+        try:
+            yield self
+            # A model that just answered is resident now
+            self.loaded_models.add(normalize_model(model))
+        finally:
+            self.outstanding -= 1
+
+    def status(self) -> Dict:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "loaded_models": sorted(self.loaded_models),
+            "health": self.breaker.status(),
+        }
+
+
+class OllamaPool:
+    """
+    Routes Ollama calls across one or more instances.
+
+    Picks a healthy backend that already has the model loaded (avoids a
+    multi-second load on a cold instance), falling back to any healthy one;
+    ties go to the backend with the fewest outstanding requests.
+    """
+
+    def __init__(self, urls: List[str], failure_threshold: int = 3, max_backoff: float = 60.0,
+                 health_interval: float = 15.0):
+        self.backends = [OllamaBackend(u, failure_threshold, max_backoff) for u in urls]
+        self.health_interval = health_interval
+        self._health_task: Optional[asyncio.Task] = None
+        self._rr = 0  # rotates ties so equal backends share load
+
+    @property
+    def available(self) -> bool:
+        return any(b.available for b in self.backends)
+
+    def check(self):
+        """Raise CircuitOpenError if no backend can take a call."""
+        if not self.available:
+            errors = "; ".join(f"{b.url}: {b.breaker.last_error}" for b in self.backends)
+            for b in self.backends:
+                b.breaker.fast_failures += 1
+            raise CircuitOpenError(f"no Ollama backend available ({errors})")
+
+    def pick(self, model: str) -> OllamaBackend:
+        self.check()
+        healthy = [b for b in self.backends if b.available]
+        warm = [b for b in healthy if b.has_model(model)]
+        candidates = warm or healthy
+
+        self._rr = (self._rr + 1) % len(self.backends)
+        n = len(self.backends)
+        return min(
+            candidates,
+            key=lambda b: (b.outstanding, (self.backends.index(b) - self._rr) % n)
+        )
+
+    def backends_with(self, model: str) -> List[OllamaBackend]:
+        return [b for b in self.backends if b.has_model(model)]
+
+    async def refresh(self):
+        await asyncio.gather(*(b.refresh() for b in self.backends if b.available))
+
+    def start(self):
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Ollama health check error: {e}")
+            await asyncio.sleep(self.health_interval)
+
+    async def close(self):
+        if self._health_task and not self._health_task.done():
+            self._health_task.cancel()
+        self._health_task = None
+        for b in self.backends:
+            await b.breaker.close()
+
+    def status(self) -> Dict:
+        return {
+            "available": self.available,
+            "backends": [b.status() for b in self.backends],
+        }
+
+
+ollama_pool = OllamaPool(
+    config.OLLAMA_URLS,
+    failure_threshold=config.OLLAMA_FAILURE_THRESHOLD,
+    max_backoff=config.OLLAMA_PROBE_MAX_BACKOFF,
+    health_interval=config.OLLAMA_HEALTH_INTERVAL
+)
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("prompt_cache")
+
+
+def history_fingerprint(messages: List[Dict]) -> str:
+    """
+    Stable hash of a list of {"role", "content"} messages.
+    """
+    h = hashlib.sha1()
+    for m in messages:
+        h.update(str(m.get("role", "")).encode("utf-8"))
+        h.update(b"\x00")
+        h.update(str(m.get("content", "")).encode("utf-8"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+class PromptCache:
+    """
+    Keeps the Ollama `context` token array per (session, template).
+
+    Every non-streamed /api/generate response carries a `context` array that
+    encodes the prompt and the reply. Sending it back with the next request
+    means the model only evaluates the new turn instead of the static preamble
+    and the whole history again.
+
+    An entry is only reused while the stored conversation still matches what
+    the context encodes: after a turn we remember the fingerprint the history
+    window *should* have once the user/assistant pair is persisted. Any other
+    write (clear, another client, dedupe) changes the fingerprint and the
+    entry is dropped.
+    """
+
+    def __init__(self, max_tokens: int = 3072, max_sessions: int = 64):
+        self.max_tokens = max_tokens
+        self.max_sessions = max_sessions
+        # {(session_id, template): entry}, oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+
+        # Rolling prompt-eval cost, learnt from full (non-reused) prompts
+        self._ns_per_token = 0.0
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "retries": 0,
+            "invalidations": 0,
+            "overflows": 0,
+            "prompt_eval_tokens": 0,
+            "prompt_eval_ms": 0.0,
+            "reused_tokens": 0,
+            "saved_ms": 0.0,
+        }
+        self._templates: Dict[str, Dict] = {}
+        self.last_turn: Dict = {}
+
+    def lookup(self, session_id: str, template: str, history: List[Dict]) -> Optional[List[int]]:
+        """
+        Returns reusable context tokens for this session, or None if the
+        full prompt has to be sent.
+        """
+        key = (session_id, template)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        fp = history_fingerprint(history)
+        if fp == entry["expected_fp"]:
+            # History advanced exactly by the turn we produced
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["context"]
+
+        if fp == entry["base_fp"]:
+            # Same turn asked again (self-check regeneration)
+            self._entries.move_to_end(key)
+            self._stats["retries"] += 1
+            return entry["base_context"]
+
+        logger.info(f"Prompt context for {session_id}/{template} invalidated (history changed)")
+        del self._entries[key]
+        self._stats["invalidations"] += 1
+        self._stats["misses"] += 1
+        return None
+
+    def store(self, session_id: str, template: str, history: List[Dict], query: str,
+              response: str, base_context: Optional[List[int]], context: Optional[List[int]],
+              window: int):
+        """
+        Remember the context returned for a turn and the history fingerprint
+        it will be valid for once the turn is persisted.
+        """
+        key = (session_id, template)
+        if not context:
+            self._entries.pop(key, None)
+            return
+
+        if len(context) > self.max_tokens:
+            # Let the next turn start over from the trimmed history window
+            self._entries.pop(key, None)
+            self._stats["overflows"] += 1
+            return
+
+        expected = list(history) + [
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": response},
+        ]
+        self._entries[key] = {
+            "base_fp": history_fingerprint(history),
+            "base_context": base_context,
+            "expected_fp": history_fingerprint(expected[-window:]),
+            "context": context,
+            "updated": time.time(),
+        }
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str, template: Optional[str] = None):
+        for key in list(self._entries.keys()):
+            if key[0] == session_id and (template is None or key[1] == template):
+                del self._entries[key]
+                self._stats["invalidations"] += 1
+
+    def record_eval(self, template: str, data: Dict, reused_tokens: int = 0) -> float:
+        """
+        Account prompt-eval counters from an Ollama response.
+        Returns the estimated prompt-eval time saved for this call (ms).
+        """
+        count = int(data.get("prompt_eval_count", 0) or 0)
+        duration_ns = int(data.get("prompt_eval_duration", 0) or 0)
+
+        if reused_tokens == 0 and count > 0 and duration_ns > 0:
+            sample = duration_ns / count
+            if self._ns_per_token:
+                self._ns_per_token = 0.8 * self._ns_per_token + 0.2 * sample
+            else:
+                self._ns_per_token = sample
+
+        saved_ms = reused_tokens * self._ns_per_token / 1e6
+        eval_ms = duration_ns / 1e6
+
+        self._stats["prompt_eval_tokens"] += count
+        self._stats["prompt_eval_ms"] += eval_ms
+        self._stats["reused_tokens"] += reused_tokens
+        self._stats["saved_ms"] += saved_ms
+
+        t = self._templates.setdefault(template, {"calls": 0, "prompt_eval_tokens": 0, "prompt_eval_ms": 0.0, "saved_ms": 0.0})
+        t["calls"] += 1
+        t["prompt_eval_tokens"] += count
+        t["prompt_eval_ms"] += eval_ms
+        t["saved_ms"] += saved_ms
+
+        self.last_turn = {
+            "template": template,
+            "prompt_eval_tokens": count,
+            "prompt_eval_ms": round(eval_ms, 2),
+            "reused_tokens": reused_tokens,
+            "saved_ms": round(saved_ms, 2),
+        }
+        if reused_tokens:
+            logger.info(f"[{template}] reused {reused_tokens} ctx tokens, evaluated {count} "
+                        f"({eval_ms:.0f} ms), saved ~{saved_ms:.0f} ms")
+        return saved_ms
+
+    def stats(self) -> Dict:
+        s = dict(self._stats)
+        s["prompt_eval_ms"] = round(s["prompt_eval_ms"], 2)
+        s["saved_ms"] = round(s["saved_ms"], 2)
+        s["sessions"] = len(self._entries)
+        s["ns_per_token"] = round(self._ns_per_token, 1)
+        s["templates"] = {k: {**v, "prompt_eval_ms": round(v["prompt_eval_ms"], 2), "saved_ms": round(v["saved_ms"], 2)}
+                          for k, v in self._templates.items()}
+        s["last_turn"] = self.last_turn
+        return s
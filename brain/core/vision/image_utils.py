@@ -2,28 +2,45 @@
 import io
 from PIL import Image, ImageOps, ImageEnhance
 
-def preprocess_image(image_bytes: bytes, max_width: int = 1200) -> bytes:
+def decode_raw_frame(data: bytes, width: int, height: int, stride: int = 0) -> Image.Image:
+    """
+    Wraps raw 8-bit grayscale pixels (as sent by the kernel's /vision/frame)
+    in a PIL image without any codec pass.
+    """
+    stride = stride or width
+    if len(data) < stride * height:
+        raise ValueError(f"Frame too short: {len(data)} bytes for {width}x{height} stride {stride}")
+    return Image.frombuffer("L", (width, height), data, "raw", "L", stride, 1)
+
+def preprocess_frame(img: Image.Image, max_width: int = 1200) -> Image.Image:
     """
     Applies preprocessing to improve OCR accuracy and performance.
     1. Resize if too large.
     2. Grayscale.
     3. Enhance Contrast.
+    Works on the in-memory image; nothing is re-encoded.
     """
-    try:
-        img = Image.open(io.BytesIO(image_bytes))
+    # 1. Resize (Downsample for speed)
+    if img.width > max_width:
+        ratio = max_width / img.width
+        new_height = int(img.height * ratio)
+        img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
         
-        # 1. Resize (Downsample for speed)
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-            
-        # 2. Grayscale
+    # 2. Grayscale
+    if img.mode != "L":
         img = ImageOps.grayscale(img)
-        
-        # 3. Enhance Contrast (for OCR)
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(1.5)
+    
+    # 3. Enhance Contrast (for OCR)
+    enhancer = ImageEnhance.Contrast(img)
+    return enhancer.enhance(1.5)
+
+def preprocess_image(image_bytes: bytes, max_width: int = 1200) -> bytes:
+    """
+    Bytes-in/bytes-out variant of preprocess_frame (PNG), kept for callers
+    that only have an encoded image.
+    """
+    try:
+        img = preprocess_frame(Image.open(io.BytesIO(image_bytes)), max_width)
         
         # Save to bytes
         buf = io.BytesIO()
@@ -0,0 +1,220 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.config import config
+from core.vision.ocr_engine import Band, keeps_word, ocr_engine
+from core.vision.ocr_layout import OCRLayout, words_from_tesseract
+
+logger = logging.getLogger("incremental_ocr")
+
+Tile = Tuple[int, int]  # (top, bottom) pixel rows, full frame width
+
+TILE_SPACING = 8  # white rows between tiles in the OCR composite
+
+
+def split_tiles(pixels: np.ndarray, max_height: int = 160, min_gap: int = 3,
+                blank_std: float = 4.0) -> List[Tile]:
+    """
+    Splits a grayscale frame into full-width horizontal tiles at blank rows
+    (low pixel variance). Regions without gaps (images, dense blocks,
+    side-by-side columns) are chunked at `max_height`; those chunks touch,
+    and IncrementalOCR reads them with overlapping context so the text
+    lines they cut are still read whole.
+    """
+    ink_rows = np.flatnonzero(pixels.std(axis=1) >= blank_std)
+    if not len(ink_rows):
+        return []
+
+    spans = []
+    top = last = int(ink_rows[0])
+    for y in ink_rows[1:]:
+        y = int(y)
+        if y - last > min_gap:
+            spans.append((top, last + 1))
+            top = y
+        last = y
+    spans.append((top, last + 1))
+
+    tiles = []
+    for top, bottom in spans:
+        for start in range(top, bottom, max_height):
+            tiles.append((start, min(start + max_height, bottom)))
+    return tiles
+
+
+class IncrementalOCR:
+    """
+    OCR that only re-reads what changed.
+
+    Each frame is split into horizontal tiles and compared with the previous
+    frame; tiles whose pixels barely moved keep their cached text. Dirty
+    tiles are stacked into one composite image so Tesseract still runs once
+    per frame, and the words are mapped back to their tiles by position.
+    Word boxes are kept per tile too, so the frame's word layout (see
+    core/vision/ocr_layout.py) comes for free.
+
+    Where a tile was cut off its neighbour without a blank gap, it is read
+    with `overlap` extra rows on that side and keeps only the words it owns
+    (the tiled-OCR band rule, `keeps_word`), so each line is read once, whole.
+    """
+
+    def __init__(self, diff_threshold: int = 24, dirty_pixels: int = 8, max_tile_height: int = 160,
+                 overlap: int = 24):
+        self.diff_threshold = diff_threshold
+        self.dirty_pixels = dirty_pixels
+        self.max_tile_height = max_tile_height
+        self.overlap = overlap
+        self._prev: Optional[np.ndarray] = None
+        self._bands: Dict[Tile, Tuple] = {}
+        self._layout: Dict[Tile, str] = {}
+        self._words: Dict[Tile, List[Dict]] = {}  # frame coordinates
+        self._word_layout: Optional[OCRLayout] = None
+        self._word_layout_scale = 1.0
+        self._stats = {"frames": 0, "tiles_total": 0, "tiles_ocr": 0, "skipped_frames": 0, "last_ms": 0.0}
+
+    def reset(self):
+        self._prev = None
+        self._bands = {}
+        self._layout = {}
+        self._words = {}
+        self._word_layout = None
+
+    @property
+    def layout(self) -> Dict[Tile, str]:
+        """Cached text per tile of the last frame, top to bottom."""
+        return dict(self._layout)
+
+    def word_layout(self, scale: float = 1.0) -> OCRLayout:
+        """
+        Word boxes of the last frame, multiplied by `scale` (frame -> screen
+        pixels). Rebuilt only when a tile was re-read.
+        """
+        if self._word_layout is None or self._word_layout_scale != scale:
+            words = [
+                {**w, "x": int(w["x"] * scale), "y": int(w["y"] * scale),
+                 "w": max(1, int(w["w"] * scale)), "h": max(1, int(w["h"] * scale))}
+                for tile_words in self._words.values() for w in tile_words
+            ]
+            self._word_layout = OCRLayout(words)
+            self._word_layout_scale = scale
+        return self._word_layout
+
+    def _bands_for(self, tiles: List[Tile], height: int) -> Dict[Tile, Tuple]:
+        """
+        Per tile: (band, prev_bottom, next_top) for `keeps_word`. The band
+        reaches `overlap` rows into a touching neighbour; edges at a blank
+        gap need no context.
+        """
+        tops = {t for t, _ in tiles}
+        bottoms = {b for _, b in tiles}
+        bands = {}
+        for top, bottom in tiles:
+            joined_above, joined_below = top in bottoms, bottom in tops
+            band: Band = (
+                max(0, top - self.overlap) if joined_above else top,
+                min(height, bottom + self.overlap) if joined_below else bottom,
+                top, bottom
+            )
+            prev_bottom = min(height, top + self.overlap) if joined_above else None
+            next_top = max(0, bottom - self.overlap) if joined_below else None
+            bands[(top, bottom)] = (band, prev_bottom, next_top)
+        return bands
+
+    def _is_dirty(self, pixels: np.ndarray, tile: Tile, band: Tuple) -> bool:
+        if (tile not in self._layout or self._bands.get(tile) != band
+                or self._prev is None or self._prev.shape != pixels.shape):
+            return True
+        top, bottom = band[0][:2]  # Context rows count: they decide which words the tile keeps
+        diff = np.abs(pixels[top:bottom].astype(np.int16) - self._prev[top:bottom])
+        return int((diff > self.diff_threshold).sum()) > self.dirty_pixels
+
+    def extract_text(self, image: Image.Image) -> str:
+        start = time.time()
+        if image.mode != "L":
+            image = image.convert("L")
+        pixels = np.asarray(image)
+
+        tiles = split_tiles(pixels, self.max_tile_height)
+        bands = self._bands_for(tiles, pixels.shape[0])
+        dirty = [t for t in tiles if self._is_dirty(pixels, t, bands[t])]
+        layout = {t: self._layout[t] for t in tiles if t in self._layout and t not in dirty}
+        words = {t: self._words.get(t, []) for t in layout}
+
+        if dirty:
+            try:
+                for tile, (text, tile_words) in self._ocr_tiles(image, dirty, bands).items():
+                    layout[tile] = text
+                    words[tile] = tile_words
+            except Exception as e:
+                logger.error(f"Incremental OCR failed: {e}")
+                self.reset()
+                return ""
+            self._word_layout = None
+        else:
+            self._stats["skipped_frames"] += 1
+
+        self._prev = pixels
+        self._bands = bands
+        self._layout = {t: layout[t] for t in tiles}
+        self._words = {t: words[t] for t in tiles}
+
+        self._stats["frames"] += 1
+        self._stats["tiles_total"] += len(tiles)
+        self._stats["tiles_ocr"] += len(dirty)
+        self._stats["last_ms"] = round((time.time() - start) * 1000, 1)
+        return "\n".join(text for text in self._layout.values() if text)
+
+    def _ocr_tiles(self, image: Image.Image, tiles: List[Tile],
+                   bands: Dict[Tile, Tuple]) -> Dict[Tile, Tuple[str, List[Dict]]]:
+        # Stack dirty tiles (with their context rows) into one image -> one Tesseract run
+        crops = [bands[t][0][:2] for t in tiles]
+        height = sum(b - t for t, b in crops) + TILE_SPACING * (len(crops) - 1)
+        composite = Image.new("L", (image.width, height), 255)
+        offsets = []
+        y = 0
+        for top, bottom in crops:
+            composite.paste(image.crop((0, top, image.width, bottom)), (0, y))
+            offsets.append(y)
+            y += bottom - top + TILE_SPACING
+
+        # Automatic segmentation: tiles span the full width, so side-by-side
+        # windows share a band and psm 6 would merge their columns into one block
+        data = ocr_engine.extract_words(composite, psm=3)
+
+        # {tile index: {(block, par, line): [words]}}, Tesseract emits reading order
+        lines: Dict[int, Dict[Tuple, List[str]]] = {i: {} for i in range(len(tiles))}
+        boxes: Dict[int, List[Dict]] = {i: [] for i in range(len(tiles))}
+        for word in words_from_tesseract(data):
+            idx = max(0, np.searchsorted(offsets, word["y"] + word["h"] / 2, side="right") - 1)
+            # Composite -> frame coordinates; lines are only unique per tile
+            y = word["y"] - offsets[idx] + crops[idx][0]
+            band, prev_bottom, next_top = bands[tiles[idx]]
+            if not keeps_word(band, y, y + word["h"], prev_bottom, next_top):
+                continue  # Context row word: a neighbouring tile keeps it
+            lines[idx].setdefault(word["line"], []).append(word["text"])
+            boxes[idx].append({**word, "y": y, "line": (tiles[idx][0],) + word["line"]})
+
+        return {
+            tile: ("\n".join(" ".join(words) for words in lines[i].values()), boxes[i])
+            for i, tile in enumerate(tiles)
+        }
+
+    def stats(self) -> Dict:
+        s = self._stats
+        return {
+            **s,
+            "tiles_cached": len(self._layout),
+            "ocr_ratio": round(s["tiles_ocr"] / s["tiles_total"], 3) if s["tiles_total"] else 0.0,
+        }
+
+
+incremental_ocr = IncrementalOCR(
+    diff_threshold=config.VISION_DIFF_THRESHOLD,
+    dirty_pixels=config.VISION_DIRTY_PIXELS,
+    max_tile_height=config.VISION_MAX_TILE_HEIGHT,
+    overlap=config.VISION_TILE_OVERLAP
+)
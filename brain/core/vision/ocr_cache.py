@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("ocr_cache")
+
+
+def dhash(image: Image.Image, cell: int = 2, threshold: int = 16) -> bytes:
+    """
+    Difference hash: shrink by `cell`, then two bits per horizontally adjacent
+    pixel pair (brighter / darker by more than `threshold`), packed row by
+    row so byte ranges are horizontal strips of the image.
+    Flat areas hash to 0 regardless of capture noise. Screen text needs a
+    fine grid: at the classic 8x8 (64 bits) "Total: 1,250.00" and
+    "Total: 9,871.45" collide.
+    """
+    gray = image.convert("L")
+    width = max(2, gray.width // cell)
+    height = max(1, gray.height // cell)
+    px = np.asarray(gray.resize((width + 1, height), Image.Resampling.BOX), dtype=np.int16)
+    diff = px[:, 1:] - px[:, :-1]
+    return np.packbits(np.stack([diff > threshold, diff < -threshold], axis=-1).ravel()).tobytes()
+
+
+def hamming(a: bytes, b: bytes) -> int:
+    x = np.bitwise_xor(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8))
+    return int(np.unpackbits(x).sum())
+
+
+def strips(h: bytes, count: int):
+    """`h` cut into `count` byte ranges (image strips), equal for equal-size images."""
+    bounds = np.linspace(0, len(h), count + 1).astype(int)
+    return [h[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+
+class OCRCache:
+    """
+    Bounded LRU of OCR results keyed on a perceptual hash of the image
+    Tesseract actually sees. Exact hash hits are a dict lookup. With
+    `tolerance` > 0 an entry of the same size differing in at most that
+    fraction of the hash bits also counts as a hit; that absorbs a cursor
+    or a clock tick, but equally a changed digit or short word, so it is
+    off by default.
+
+    Near matches don't scan the cache: each hash is indexed by its
+    horizontal strips, so only entries sharing all but `max_changed_strips`
+    strips are candidates, and only their differing strips are compared.
+    """
+
+    def __init__(self, max_entries: int = 128, hash_cell: int = 2, tolerance: float = 0.0,
+                 strip_count: int = 32, max_changed_strips: int = 6):
+        self.max_entries = max(1, max_entries)
+        self.hash_cell = hash_cell
+        self.tolerance = tolerance
+        self.strip_count = strip_count
+        self.max_changed_strips = max_changed_strips
+        # {(width, height, hash): text}
+        self._entries: "OrderedDict[Tuple[int, int, bytes], str]" = OrderedDict()
+        # {(width, height, strip index, strip bytes): {keys}}
+        self._strips: Dict[Tuple[int, int, int, bytes], Set[Tuple[int, int, bytes]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "hash_ms_total": 0.0,
+                       "candidates": 0}
+
+    def key(self, image: Image.Image) -> Tuple[int, int, bytes]:
+        start = time.time()
+        h = dhash(image, self.hash_cell)
+        self._stats["hash_ms_total"] += (time.time() - start) * 1000
+        return image.width, image.height, h
+
+    def get(self, key: Tuple[int, int, bytes]) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+
+            if self.tolerance > 0:
+                best = self._nearest(key)
+                if best is not None:
+                    self._entries.move_to_end(best)
+                    self._stats["near_hits"] += 1
+                    return self._entries[best]
+
+            self._stats["misses"] += 1
+            return None
+
+    def _nearest(self, key: Tuple[int, int, bytes]) -> Optional[Tuple[int, int, bytes]]:
+        width, height, h = key
+        parts = strips(h, self.strip_count)
+        shared = Counter()
+        for i, part in enumerate(parts):
+            shared.update(self._strips.get((width, height, i, part), ()))
+
+        max_bits = int(self.tolerance * len(h) * 8)
+        best, best_dist = None, max_bits + 1
+        for candidate, count in shared.items():
+            if count < self.strip_count - self.max_changed_strips:
+                continue
+            self._stats["candidates"] += 1
+            dist = sum(
+                hamming(a, b) for a, b in zip(strips(candidate[2], self.strip_count), parts) if a != b
+            )
+            if dist < best_dist:
+                best, best_dist = candidate, dist
+        return best
+
+    def put(self, key: Tuple[int, int, bytes], text: str):
+        with self._lock:
+            if key not in self._entries:
+                self._index(key, add=True)
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old, _ = self._entries.popitem(last=False)
+                self._index(old, add=False)
+                self._stats["evictions"] += 1
+
+    def _index(self, key: Tuple[int, int, bytes], add: bool):
+        width, height, h = key
+        for i, part in enumerate(strips(h, self.strip_count)):
+            skey = (width, height, i, part)
+            if add:
+                self._strips.setdefault(skey, set()).add(key)
+            else:
+                keys = self._strips.get(skey)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._strips[skey]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._strips.clear()
+
+    def stats(self) -> Dict:
+        s = self._stats
+        lookups = s["hits"] + s["near_hits"] + s["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": s["hits"],
+            "near_hits": s["near_hits"],
+            "misses": s["misses"],
+            "evictions": s["evictions"],
+            "near_candidates": s["candidates"],
+            "hit_rate": round((s["hits"] + s["near_hits"]) / lookups, 3) if lookups else 0.0,
+            "hash_ms_avg": round(s["hash_ms_total"] / lookups, 2) if lookups else 0.0,
+        }
@@ -2,23 +2,163 @@
 import pytesseract
 from PIL import Image
 import io
+import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from core.config import config
+from core.vision.ocr_cache import OCRCache
+from core.vision.ocr_layout import OCRLayout
 
 logger = logging.getLogger("ocr_engine")
 
+# Tesseract subprocesses inherit this: one core each, parallelism comes from
+# OCR_WORKERS. Its own OpenMP threads would oversubscribe. Set before any OCR runs.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+Band = Tuple[int, int, int, int]  # (top, bottom, own_top, own_bottom)
+
+
+def plan_bands(height: int, count: int, overlap: int) -> List[Band]:
+    """
+    Splits `height` rows into `count` bands. The own_* rows partition the
+    image; top/bottom extend them by `overlap` so a text line cut at a band
+    edge is still seen whole by the neighbouring band.
+    """
+    count = max(1, min(count, height))
+    step = height / count
+    bands = []
+    for i in range(count):
+        own_top, own_bottom = round(i * step), round((i + 1) * step)
+        bands.append((max(0, own_top - overlap), min(height, own_bottom + overlap), own_top, own_bottom))
+    return bands
+
+
+def keeps_word(band: Band, w_top: int, w_bottom: int,
+               prev_bottom: Optional[int], next_top: Optional[int]) -> bool:
+    """
+    Whether `band` keeps a word it saw at image rows [w_top, w_bottom).
+    `prev_bottom`/`next_top` are where the neighbouring bands end/start
+    (None if the edge has no neighbour). Every word is kept by exactly one
+    band: the one owning its centre if that band sees it whole, else a
+    band that does; a word no band sees whole (taller than the overlap)
+    is kept, cut, by the band that sees its top.
+    """
+    top, bottom, own_top, own_bottom = band
+    if prev_bottom is not None and w_top <= top:
+        return False  # Starts above this band: the band above keeps it
+    if next_top is not None and w_bottom >= bottom:
+        return w_top < next_top  # Cut by the bottom edge: keep unless the band below has it whole
+    center = (w_top + w_bottom) / 2
+    if own_top <= center < own_bottom:
+        return True
+    # The owning neighbour only sees part of it: keep this whole copy instead
+    if center >= own_bottom:
+        return next_top is not None and w_top < next_top
+    return prev_bottom is not None and w_bottom > prev_bottom
+
+
 class OCREngine:
     def __init__(self):
         # Explicit path might be needed if Tesseract is not in PATH
         # For now assume it is, or user set TESSDATA_PREFIX
-        pass
+        self.cache = OCRCache(
+            max_entries=config.OCR_CACHE_MAX_ENTRIES,
+            hash_cell=config.OCR_CACHE_HASH_CELL,
+            tolerance=config.OCR_CACHE_TOLERANCE
+        )
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """
+        Persistent workers for tiled OCR. Each one drives a Tesseract
+        subprocess, so threads are enough to use every core.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, config.OCR_WORKERS), thread_name_prefix="ocr")
+        return self._pool
 
-    def extract_text(self, image_data: bytes) -> str:
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False)
+        self._pool = None
+
+    def extract_text(self, image_data, use_cache: bool = True, tiled: Optional[bool] = None) -> str:
+        """
+        OCR a PIL image (preferred, no decode) or encoded image bytes.
+        Results are cached by perceptual hash, so a re-capture of the same
+        screen skips Tesseract. `tiled` defaults to config.OCR_TILED.
+        """
         try:
-            image = Image.open(io.BytesIO(image_data))
-            text = pytesseract.image_to_string(image)
-            return text.strip()
+            if isinstance(image_data, Image.Image):
+                image = image_data
+            else:
+                image = Image.open(io.BytesIO(image_data))
+
+            key = self.cache.key(image) if use_cache else None
+            if key:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+
+            if tiled is None:
+                tiled = config.OCR_TILED
+            if tiled:
+                text = self.extract_text_tiled(image)
+            else:
+                text = pytesseract.image_to_string(image).strip()
+            if key:
+                self.cache.put(key, text)
+            return text
         except Exception as e:
             logger.error(f"OCR Failed: {e}")
             return ""
 
+    def extract_words(self, image: Image.Image, psm: int = 6) -> Dict[str, List]:
+        """
+        Word-level OCR with boxes (pytesseract.image_to_data as a dict of
+        parallel lists: text, left, top, width, height, conf, block_num, ...).
+        """
+        return pytesseract.image_to_data(image, config=f"--psm {psm}", output_type=pytesseract.Output.DICT)
+
+    def extract_layout(self, image: Image.Image, scale: float = 1.0) -> OCRLayout:
+        """Word boxes of `image` (times `scale`, e.g. back to screen pixels)."""
+        return OCRLayout.from_tesseract(self.extract_words(image, psm=3), scale=scale)
+
+    def extract_text_tiled(self, image: Image.Image) -> str:
+        """
+        OCR overlapping horizontal bands in parallel and stitch the words back
+        in reading order. Falls back to a single pass for small images.
+        """
+        count = min(config.OCR_WORKERS, image.height // max(1, config.OCR_MIN_BAND_HEIGHT))
+        if count < 2:
+            return pytesseract.image_to_string(image).strip()
+
+        bands = plan_bands(image.height, count, config.OCR_BAND_OVERLAP)
+        crops = [image.crop((0, top, image.width, bottom)) for top, bottom, _, _ in bands]
+        results = list(self.pool.map(lambda crop: self.extract_words(crop, psm=3), crops))
+        return "\n".join(self._stitch(bands, results, image.height))
+
+    @staticmethod
+    def _stitch(bands: List[Band], results: List[Dict[str, List]], height: int) -> List[str]:
+        lines = []
+        for b, ((top, bottom, own_top, own_bottom), data) in enumerate(zip(bands, results)):
+            prev_bottom = bands[b - 1][1] if b > 0 else None
+            next_top = bands[b + 1][0] if b + 1 < len(bands) else None
+            # {(block, par, line): [words]}, Tesseract emits reading order
+            band_lines: Dict[Tuple, List[str]] = {}
+            for i, word in enumerate(data["text"]):
+                if not word or not word.strip():
+                    continue
+                w_top = top + data["top"][i]
+                w_bottom = w_top + data["height"][i]
+                # Each word belongs to exactly one band (no duplicates from overlap)
+                if not keeps_word(bands[b], w_top, w_bottom, prev_bottom, next_top):
+                    continue
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                band_lines.setdefault(key, []).append(word)
+            lines.extend(" ".join(words) for words in band_lines.values())
+        return lines
+
 ocr_engine = OCREngine()
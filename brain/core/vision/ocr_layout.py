@@ -0,0 +1,121 @@
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h) in screen pixels
+
+_TOKEN_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_token(text: str) -> str:
+    """'Save…' / 'SAVE' / '(save)' -> 'save'."""
+    return _TOKEN_RE.sub("", text).lower()
+
+
+class OCRLayout:
+    """
+    Word-level OCR result of one frame: words with boxes and confidences,
+    an inverted token index and a coarse spatial grid, so "where is Save?"
+    is a dict lookup instead of another OCR pass.
+
+    `words` entries are dicts {text, x, y, w, h, conf, line}, already in
+    screen coordinates; `line` groups words Tesseract read as one line.
+    """
+
+    def __init__(self, words: List[Dict], timestamp: Optional[float] = None, cell: int = 64):
+        self.words = words
+        self.timestamp = timestamp or time.time()
+        self.cell = cell
+        self._norm = [normalize_token(w["text"]) for w in words]
+        self._tokens: Dict[str, List[int]] = {}
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, word in enumerate(words):
+            token = self._norm[i]
+            if token:
+                self._tokens.setdefault(token, []).append(i)
+            for gx in range(word["x"] // cell, (word["x"] + word["w"]) // cell + 1):
+                for gy in range(word["y"] // cell, (word["y"] + word["h"]) // cell + 1):
+                    self._grid.setdefault((gx, gy), []).append(i)
+
+    @classmethod
+    def from_tesseract(cls, data: Dict[str, List], scale: float = 1.0, offset_y: int = 0,
+                       line_prefix: Tuple = (), timestamp: Optional[float] = None) -> "OCRLayout":
+        return cls(words_from_tesseract(data, scale, offset_y, line_prefix), timestamp)
+
+    def __len__(self):
+        return len(self.words)
+
+    def find_text(self, query: str, min_conf: float = 0.0) -> List[Box]:
+        """
+        Boxes of every occurrence of `query` (case/punctuation-insensitive).
+        Multi-word queries must match consecutive words on one line; the
+        returned box spans the whole phrase.
+        """
+        tokens = [t for t in (normalize_token(p) for p in query.split()) if t]
+        if not tokens:
+            return []
+
+        matches = []
+        for start in self._tokens.get(tokens[0], []):
+            end = start + len(tokens)
+            if self._norm[start:end] != tokens:
+                continue
+            span = self.words[start:end]
+            if any(w["line"] != span[0]["line"] for w in span):
+                continue
+            if min(w["conf"] for w in span) < min_conf:
+                continue
+            matches.append(_union(span))
+        return matches
+
+    def words_at(self, x: int, y: int) -> List[Dict]:
+        """Words whose box contains the screen point (x, y)."""
+        hits = self._grid.get((x // self.cell, y // self.cell), [])
+        return [
+            self.words[i] for i in hits
+            if self.words[i]["x"] <= x <= self.words[i]["x"] + self.words[i]["w"]
+            and self.words[i]["y"] <= y <= self.words[i]["y"] + self.words[i]["h"]
+        ]
+
+    def words_in(self, box: Box) -> List[Dict]:
+        """Words overlapping the screen rectangle `box`, in reading order."""
+        x, y, w, h = box
+        seen = set()
+        for gx in range(x // self.cell, (x + w) // self.cell + 1):
+            for gy in range(y // self.cell, (y + h) // self.cell + 1):
+                seen.update(self._grid.get((gx, gy), []))
+        return [
+            self.words[i] for i in sorted(seen)
+            if self.words[i]["x"] < x + w and self.words[i]["x"] + self.words[i]["w"] > x
+            and self.words[i]["y"] < y + h and self.words[i]["y"] + self.words[i]["h"] > y
+        ]
+
+
+def words_from_tesseract(data: Dict[str, List], scale: float = 1.0, offset_y: int = 0,
+                         line_prefix: Tuple = ()) -> List[Dict]:
+    """
+    Converts image_to_data output into layout words. Boxes are shifted by
+    `offset_y` (tile position in the frame), then scaled to screen pixels.
+    """
+    words = []
+    for i, text in enumerate(data["text"]):
+        if not text or not text.strip():
+            continue
+        words.append({
+            "text": text,
+            "x": int(data["left"][i] * scale),
+            "y": int((data["top"][i] + offset_y) * scale),
+            "w": max(1, int(data["width"][i] * scale)),
+            "h": max(1, int(data["height"][i] * scale)),
+            "conf": float(data["conf"][i]),
+            "line": line_prefix + (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+        })
+    return words
+
+
+def _union(words: List[Dict]) -> Box:
+    x0 = min(w["x"] for w in words)
+    y0 = min(w["y"] for w in words)
+    x1 = max(w["x"] + w["w"] for w in words)
+    y1 = max(w["y"] + w["h"] for w in words)
+    return x0, y0, x1 - x0, y1 - y0
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+from core.config import config
+from core.vision.vision_engine import vision_engine
+
+logger = logging.getLogger("screen_watcher")
+
+
+class ScreenWatcher:
+    """
+    Opt-in background loop that keeps a "current screen context" warm.
+
+    Every `interval` seconds it pulls the kernel's latest frame and compares
+    it with the last analyzed one. Only when the pixels or the active window
+    changed does it run OCR + tagging, so VISION requests can answer from
+    `fresh_context()` without a capture on the critical path.
+    """
+
+    def __init__(self, interval: float = 1.0, max_age: float = 10.0,
+                 diff_threshold: int = 24, dirty_pixels: int = 8):
+        self.interval = interval
+        self.max_age = max_age
+        self.diff_threshold = diff_threshold
+        self.dirty_pixels = dirty_pixels
+        self.context: Optional[Dict[str, Any]] = None
+        self.checked_at: Optional[float] = None
+        self._pixels: Optional[np.ndarray] = None
+        self._window: Optional[str] = None
+        self._seq = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"checks": 0, "updates": 0, "errors": 0, "last_update_ms": 0.0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._watch_loop())
+            logger.info(f"Screen watcher started (every {self.interval}s)")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _watch_loop(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Screen watcher error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _changed(self, image: Image.Image, meta: Dict[str, Any]) -> bool:
+        seq = meta.get("seq", 0)
+        if seq and seq == self._seq:
+            return False  # Kernel hasn't sampled a new frame yet
+        if self.context is None or meta.get("active_window") != self._window:
+            return True
+
+        pixels = np.asarray(image)
+        if self._pixels is None or self._pixels.shape != pixels.shape:
+            return True
+        diff = np.abs(pixels.astype(np.int16) - self._pixels)
+        return int((diff > self.diff_threshold).sum()) > self.dirty_pixels
+
+    async def poll(self) -> bool:
+        """One check. Returns True if the screen context was refreshed."""
+        frame = await vision_engine._capture_frame(store=False)
+        if not frame:
+            self._stats["errors"] += 1
+            return False
+
+        image, meta = frame
+        self._stats["checks"] += 1
+        changed = self._changed(image, meta)
+        if changed:
+            start = time.time()
+            self.context = await vision_engine.analyze_frame(image, meta, persist=False)
+            self._pixels = np.asarray(image)
+            self._window = meta.get("active_window")
+            self._stats["updates"] += 1
+            self._stats["last_update_ms"] = round((time.time() - start) * 1000, 1)
+
+        self._seq = meta.get("seq", 0)
+        self.checked_at = time.time()
+        return changed
+
+    def fresh_context(self, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        The precomputed context if the watcher confirmed it within `max_age`
+        seconds, else None (caller should analyze inline).
+        """
+        max_age = self.max_age if max_age is None else max_age
+        if self.context is None or self.checked_at is None:
+            return None
+        if time.time() - self.checked_at > max_age:
+            return None
+        return self.context
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "context_age_s": round(time.time() - self.checked_at, 2) if self.checked_at else None,
+            **self._stats,
+        }
+
+
+screen_watcher = ScreenWatcher(
+    interval=config.SCREEN_WATCHER_INTERVAL,
+    max_age=config.SCREEN_CONTEXT_MAX_AGE,
+    diff_threshold=config.VISION_DIFF_THRESHOLD,
+    dirty_pixels=config.VISION_DIRTY_PIXELS
+)
@@ -0,0 +1,76 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger("tagger")
+
+
+class KeywordTagger:
+    """
+    Tags screen content against app signatures in a single pass.
+
+    All literal patterns of a field are compiled into one alternation
+    (longest first, each in a named group), scanned with a zero-width
+    lookahead so overlapping signatures are still seen, and the scan stops
+    as soon as every tag has matched.
+
+    Signature file (JSON): {"Tag": {"window": [...], "text": [...]}}; a plain
+    list is shorthand for text patterns, and the window patterns default to
+    the tag name itself.
+    """
+
+    def __init__(self, signatures: Dict):
+        self.tags: List[str] = list(signatures)
+        window, text = [], []
+        for tag, sig in signatures.items():
+            if isinstance(sig, list):
+                sig = {"text": sig}
+            window += [(tag, p) for p in sig.get("window", [tag])]
+            text += [(tag, p) for p in sig.get("text", [])]
+        self._window = self._compile(window)
+        self._text = self._compile(text)
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordTagger":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _compile(patterns: List[Tuple[str, str]]) -> Optional[Tuple[Pattern, Dict[str, Tuple[str, str]]]]:
+        patterns = [(tag, p) for tag, p in patterns if p]
+        if not patterns:
+            return None
+        patterns.sort(key=lambda tp: len(tp[1]), reverse=True)
+        groups = {f"s{i}": tp for i, tp in enumerate(patterns)}
+        alternation = "|".join(f"(?P<{name}>{re.escape(p)})" for name, (_, p) in groups.items())
+        return re.compile(f"(?=(?:{alternation}))"), groups
+
+    def _scan(self, compiled, text: str) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        if not compiled or not text:
+            return found
+        regex, groups = compiled
+        remaining = len(self.tags)
+        for m in regex.finditer(text):
+            tag, pattern = groups[m.lastgroup]
+            if tag not in found:
+                found[tag] = pattern
+                remaining -= 1
+                if not remaining:
+                    break
+        return found
+
+    def match(self, text: str, window: str = "") -> Dict[str, Dict[str, str]]:
+        """
+        {tag: {"source": "window" | "text", "pattern": matched signature}},
+        window matches first, each group in signature-file order.
+        """
+        hits = {}
+        by_window = self._scan(self._window, window)
+        by_text = self._scan(self._text, text)
+        for source, found in (("window", by_window), ("text", by_text)):
+            for tag in self.tags:
+                if tag in found and tag not in hits:
+                    hits[tag] = {"source": source, "pattern": found[tag]}
+        return hits
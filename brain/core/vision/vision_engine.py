@@ -1,92 +1,197 @@
+import asyncio
 import base64
-import httpx
+import io
 import logging
+from urllib.parse import unquote
+from PIL import Image
+from core.config import config
+from core.kernel_client import kernel_client
 from core.vision.ocr_engine import ocr_engine
+from core.vision.incremental_ocr import incremental_ocr
+from core.vision.ocr_layout import OCRLayout, Box
+from core.vision.tagger import KeywordTagger
 from core.local_model_engine import local_engine
-from core.vision.image_utils import preprocess_image
-from typing import Dict, Any, List
+from core.vision.image_utils import decode_raw_frame, preprocess_frame
+from typing import Dict, Any, List, Optional, Tuple
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
 
 class VisionEngine:
     def __init__(self):
-        self.screenshot_url = "http://localhost:8001/vision/screenshot"
+        # Last analyzed frame (processed image, frame -> screen scale, ts) and its word layout
+        self._frame: Optional[Tuple[Image.Image, float, float]] = None
+        self._layout: Optional[OCRLayout] = None
+        self._ocr_lock = asyncio.Lock()
+        self.tagger = KeywordTagger.from_file(config.VISION_SIGNATURES_PATH)
 
     async def _capture_data(self) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(self.screenshot_url, timeout=5.0)
-                if resp.status_code == 200:
-                    return resp.json()
-            except Exception as e:
-                logger.error(f"Capture failed: {e}")
+        try:
+            return await kernel_client.screenshot()
+        except Exception as e:
+            logger.error(f"Capture failed: {e}")
         return {}
 
-    async def analyze(self, capture: bool = True) -> Dict[str, Any]:
+    async def _capture_frame(self, store: Optional[bool] = None) -> Optional[Tuple[Image.Image, Dict[str, Any]]]:
+        """
+        Raw grayscale capture: one HTTP body of pixels, no PNG/base64 pass.
+        The kernel downsamples to VISION_MAX_WIDTH before sending and keeps a
+        deduplicated color copy when VISION_STORE_SCREENSHOTS is on.
+        """
+        if store is None:
+            store = config.VISION_STORE_SCREENSHOTS
+        try:
+            resp = await kernel_client.frame(config.VISION_MAX_WIDTH, store)
+        except Exception as e:
+            logger.error(f"Raw frame capture failed: {e}")
+            return None
+        try:
+            h = resp.headers
+            width, height = int(h["x-frame-width"]), int(h["x-frame-height"])
+            image = decode_raw_frame(resp.content, width, height, int(h.get("x-frame-stride", 0)))
+            meta = {
+                # Deduplicated blob in the kernel's screenshot store (if stored)
+                "path": unquote(h.get("x-screenshot-path", "")),
+                "screen_size": (int(h.get("x-source-width", width)), int(h.get("x-source-height", height))),
+                "active_window": unquote(h.get("x-active-window", "Unknown")),
+                "timestamp": float(h.get("x-frame-timestamp", 0) or 0),
+                "seq": int(h.get("x-frame-seq", 0) or 0),
+            }
+            return image, meta
+        except Exception as e:
+            logger.error(f"Raw frame decode failed: {e}")
+        return None
+
+    async def _capture_image(self) -> Optional[Tuple[Image.Image, Dict[str, Any]]]:
+        """
+        Captures the screen as a single in-memory image.
+        Uses raw frames when enabled, falling back to the PNG/base64 endpoint
+        (e.g. older kernels).
+        """
+        if config.VISION_CAPTURE_MODE == "raw":
+            frame = await self._capture_frame()
+            if frame:
+                return frame
+
+        data = await self._capture_data()
+        b64_img = data.get("image", "")
+        if not b64_img:
+            return None
+        image = Image.open(io.BytesIO(base64.b64decode(b64_img)))
+        return image, {
+            "path": data.get("path", ""),
+            "active_window": data.get("active_window", "Unknown"),
+            "screen_size": image.size,
+            "timestamp": data.get("timestamp", 0.0),
+        }
+
+    async def analyze(self, capture: bool = True, persist: bool = True) -> Dict[str, Any]:
         """
         Analyze screen content.
         """
-        data = {}
+        frame = None
         if capture:
-            data = await self._capture_data()
+            frame = await self._capture_image()
             
-        b64_img = data.get("image", "")
-        if not b64_img:
+        if not frame:
             return {"error": "No image data"}
 
-        image_bytes = base64.b64decode(b64_img)
-        screenshot_path = data.get("path", "")
-        active_window = data.get("active_window", "Unknown")
+        image, meta = frame
+        return await self.analyze_frame(image, meta, persist=persist)
+
+    async def analyze_frame(self, image: Image.Image, meta: Dict[str, Any], persist: bool = True) -> Dict[str, Any]:
+        """
+        Preprocess, OCR and tag an already captured frame.
+        """
+        screenshot_path = meta.get("path", "")
+        active_window = meta.get("active_window", "Unknown")
+        timestamp = meta.get("timestamp") or time.time()
 
-        # 1. Preprocess
-        processed_bytes = preprocess_image(image_bytes)
+        # OCR state (tile cache, layout) is shared between requests and the screen watcher
+        async with self._ocr_lock:
+            # 1. Preprocess (in memory, no re-encode)
+            processed = preprocess_frame(image, config.VISION_MAX_WIDTH)
+            screen_width = meta.get("screen_size", image.size)[0]
+            self._frame = (processed, screen_width / processed.width, timestamp)
+            self._layout = None
 
-        # 2. OCR
-        text = ocr_engine.extract_text(processed_bytes)
+            # 2. OCR (only tiles that changed since the last frame), off the event loop
+            if config.VISION_INCREMENTAL_OCR:
+                text = await asyncio.to_thread(incremental_ocr.extract_text, processed)
+            else:
+                text = await asyncio.to_thread(ocr_engine.extract_text, processed)
 
         # 3. Tagging
-        tags = self._extract_tags(text, active_window)
+        tag_matches = self.tagger.match(text, active_window or "")
+        tags = self._extract_tags(text, active_window, tag_matches)
         
         # 4. Summary
         summary = f"Active Window: {active_window}. Content: {text[:200]}..."
         
         # 5. Persist
-        await self._persist_event(screenshot_path, text, tags, active_window)
+        if persist:
+            await self._persist_event(screenshot_path, text, tags, active_window)
 
         return {
             "description": summary, # Key expected by Flutter
             "ocr_text": text,
             "tags": tags,
             "active_window": active_window, 
-            "objects": tags # Legacy key
+            "objects": tags, # Legacy key
+            "tag_matches": tag_matches, # {tag: {source, pattern}}
+            "timestamp": timestamp
         }
 
-    def _extract_tags(self, text: str, active_window: str) -> List[str]:
+    async def current_layout(self) -> Optional[OCRLayout]:
+        """
+        Word layout (screen coordinates) of the last analyzed frame. Free with
+        incremental OCR; otherwise built by one word-level pass on first use,
+        off the event loop and under the OCR lock.
+        """
+        if self._layout is None and self._frame:
+            async with self._ocr_lock:
+                if self._layout is None and self._frame:  # Not built while we waited
+                    processed, scale, ts = self._frame
+                    if config.VISION_INCREMENTAL_OCR:
+                        layout = incremental_ocr.word_layout(scale)
+                    else:
+                        layout = await asyncio.to_thread(ocr_engine.extract_layout, processed, scale)
+                    layout.timestamp = ts
+                    self._layout = layout
+        return self._layout
+
+    def frame_age(self) -> Optional[float]:
+        """Seconds since the last analyzed frame was captured (None: no frame yet)."""
+        return time.time() - self._frame[2] if self._frame else None
+
+    async def find_text(self, text: str, min_conf: float = 0.0, max_age: Optional[float] = None) -> List[Box]:
+        """
+        Screen boxes (x, y, w, h) of `text` in the last analyzed frame.
+        With `max_age`, an older frame is re-captured first; if that fails
+        nothing is returned rather than stale positions.
+        """
+        if max_age is not None:
+            age = self.frame_age()
+            if age is None or age > max_age:
+                result = await self.analyze(capture=True, persist=False)
+                if "error" in result:
+                    return []
+        layout = await self.current_layout()
+        return layout.find_text(text, min_conf) if layout else []
+
+    def _extract_tags(self, text: str, active_window: str,
+                      matches: Optional[Dict[str, Dict[str, str]]] = None) -> List[str]:
         tags = []
         # Window based tags
         if active_window:
             tags.append(f"window:{active_window}")
             
-        # Keyword based
-        keywords = {
-            "VSCode": ["Visual Studio Code", "def ", "class ", "import "],
-            "Browser": ["Chrome", "Edge", "http", "www"],
-            "Terminal": ["PowerShell", "cmd.exe", "user@"],
-            "Explorer": ["File Explorer", "C:\\"]
-        }
-        
-        # Check title first
-        for key, vals in keywords.items():
-            if key in active_window:
-                tags.append(key)
-        
-        # Check text
-        for key, vals in keywords.items():
-             if any(v in text for v in vals):
-                 if key not in tags: tags.append(key)
-
+        # Signature based (title first, then text; one pass each)
+        if matches is None:
+            matches = self.tagger.match(text, active_window or "")
+        tags.extend(matches)
         return tags
 
     async def _persist_event(self, path, text, tags, active_window):
@@ -120,4 +225,20 @@ class VisionEngine:
         conn.commit()
         conn.close()
 
+    def forget_screenshots(self, paths: List[str]) -> int:
+        """Clear screenshot_path on events whose blob the kernel evicted."""
+        if not paths:
+            return 0
+        from core.db import get_connection
+        conn = get_connection()
+        try:
+            cursor = conn.executemany(
+                "UPDATE vision_events SET screenshot_path = NULL WHERE screenshot_path = ?",
+                [(p,) for p in paths]
+            )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
 vision_engine = VisionEngine()
@@ -0,0 +1,127 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# push() events: PCM bytes to decode, or PAUSE where an utterance ended
+PAUSE = None
+
+
+class EnergyVAD:
+    """
+    Energy-based voice activity detection in front of the recognizer.
+
+    16-bit mono PCM is cut into `frame_ms` frames; a frame is speech when
+    its RMS reaches `threshold`. Silence before speech is dropped except
+    for `padding_ms` of pre-roll, silence inside speech is decoded up to
+    `padding_ms` and dropped beyond that, and `pause_ms` of silence ends
+    the utterance so the caller can finalize early.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, threshold: float = 300,
+                 padding_ms: int = 300, pause_ms: int = 700):
+        self.frame_bytes = max(2, sample_rate * frame_ms // 1000 * 2)
+        self.threshold = threshold
+        self.padding_frames = max(1, padding_ms // frame_ms)
+        self.pause_frames = max(self.padding_frames, pause_ms // frame_ms)
+        self._buf = b""  # incomplete trailing frame
+        self._preroll: deque = deque(maxlen=self.padding_frames)
+        self._in_speech = False
+        self._silent = 0  # consecutive silent frames inside speech
+        self.frames_in = 0
+        self.speech_frames = 0
+        self.decoded_frames = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame[:len(frame) // 2 * 2], dtype=np.int16)
+        if not samples.size:
+            return False
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        return rms >= self.threshold
+
+    def push(self, pcm: bytes) -> List[Optional[bytes]]:
+        """
+        Feed PCM. Returns events in order: bytes to hand to the recognizer
+        (consecutive frames merged) and PAUSE where an utterance ended.
+        """
+        data = self._buf + pcm
+        end = len(data) // self.frame_bytes * self.frame_bytes
+        self._buf = data[end:]
+        events: List[Optional[bytes]] = []
+        for i in range(0, end, self.frame_bytes):
+            self._frame(data[i:i + self.frame_bytes], events)
+        return events
+
+    def flush(self) -> List[Optional[bytes]]:
+        """End of input: classify the incomplete last frame and reset."""
+        events: List[Optional[bytes]] = []
+        if self._buf:
+            self._frame(self._buf, events)
+        self._buf = b""
+        self._preroll.clear()
+        self._in_speech = False
+        self._silent = 0
+        return events
+
+    def _frame(self, frame: bytes, events: List[Optional[bytes]]):
+        self.frames_in += 1
+        speech = self.is_speech(frame)
+        if speech:
+            self.speech_frames += 1
+
+        if not self._in_speech:
+            if not speech:
+                self._preroll.append(frame)
+                return
+            self._in_speech = True
+            for buffered in self._preroll:
+                self._emit(buffered, events)
+            self._preroll.clear()
+
+        if speech:
+            self._silent = 0
+        else:
+            self._silent += 1
+            if self._silent >= self.pause_frames:
+                self._in_speech = False
+                events.append(PAUSE)
+                return
+            if self._silent > self.padding_frames:
+                return  # long gap inside speech: nothing worth decoding
+        self._emit(frame, events)
+
+    def _emit(self, frame: bytes, events: List[Optional[bytes]]):
+        self.decoded_frames += 1
+        if events and events[-1] is not PAUSE:
+            events[-1] += frame
+        else:
+            events.append(frame)
+
+    def stats(self) -> Dict:
+        return vad_stats(self.frames_in, self.speech_frames, self.decoded_frames)
+
+
+def vad_stats(frames_in: int, speech_frames: int, decoded_frames: int) -> Dict:
+    return {
+        "frames_in": frames_in,
+        "speech_frames": speech_frames,
+        "decoded_frames": decoded_frames,
+        # speech share of what the recognizer actually saw (rest is padding)
+        "speech_ratio": round(speech_frames / decoded_frames, 3) if decoded_frames else 0.0,
+        "decoded_ratio": round(decoded_frames / frames_in, 3) if frames_in else 0.0,
+    }
+
+
+def split_segments(vad: EnergyVAD, pcm: bytes) -> List[bytes]:
+    """Whole-buffer VAD: the speech segments of `pcm`, split at pauses."""
+    segments, current = [], b""
+    for event in vad.push(pcm) + vad.flush():
+        if event is PAUSE:
+            if current:
+                segments.append(current)
+            current = b""
+        else:
+            current += event
+    if current:
+        segments.append(current)
+    return segments
@@ -1,66 +1,286 @@
-
 import os
 import json
+import time
+import asyncio
 import logging
+import threading
+import psutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from vosk import Model, KaldiRecognizer
 import wave
 import io
 
+from core.config import config
+from core.voice.vad import PAUSE, EnergyVAD, split_segments, vad_stats
+
 logger = logging.getLogger("voice_engine")
 
+
+class RecognizerPool:
+    """
+    Reusable KaldiRecognizers per sample rate. Building one allocates the
+    decoder graph state, so streams and uploads borrow a reset one instead.
+    """
+
+    def __init__(self, max_idle: int = 4):
+        self.max_idle = max_idle
+        self._idle: Dict[int, List[KaldiRecognizer]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, model, sample_rate: int) -> KaldiRecognizer:
+        with self._lock:
+            idle = self._idle.get(sample_rate)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        return KaldiRecognizer(model, sample_rate)
+
+    def release(self, rec: KaldiRecognizer, sample_rate: int):
+        try:
+            rec.Reset()
+        except Exception:
+            return  # Broken recognizer: drop it
+        with self._lock:
+            idle = self._idle.setdefault(sample_rate, [])
+            if len(idle) < self.max_idle:
+                idle.append(rec)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": {rate: len(recs) for rate, recs in self._idle.items()},
+            }
+
+
+class VoiceStream:
+    """
+    One streaming session: PCM chunks go through the VAD into a pooled
+    recognizer as they arrive, decoding runs on the engine's worker threads.
+    """
+
+    def __init__(self, engine: "VoiceEngine", sample_rate: int = 16000):
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.vad = engine.make_vad(sample_rate)
+        self.rec = engine.pool.acquire(engine.model, sample_rate)
+        self.bytes_in = 0
+        self._last_partial = ""
+
+    async def feed(self, chunk: bytes) -> List[dict]:
+        """
+        Decode a PCM chunk (16-bit mono). Returns results in order:
+        {"type": "final", "text"} when Vosk closed a segment or the VAD saw
+        a pause, {"type": "partial", "text"} when the hypothesis changed.
+        Silence never reaches the recognizer.
+        """
+        self.bytes_in += len(chunk)
+        events = self.vad.push(chunk) if self.vad else [chunk]
+        if not events:
+            return []
+        return await self.engine._run(self._decode_events, events)
+
+    async def finish(self) -> List[dict]:
+        """Flush the utterance; the recognizer stays ready for the next one."""
+        events = self.vad.flush() if self.vad else []
+        return await self.engine._run(self._decode_events, events, True)
+
+    def _decode_events(self, events: List[Optional[bytes]], final: bool = False) -> List[dict]:
+        results = []
+        for event in events:
+            if event is PAUSE:
+                text = json.loads(self.rec.FinalResult()).get("text", "")
+                self._last_partial = ""
+                if text:
+                    results.append({"type": "final", "text": text})
+            elif self.rec.AcceptWaveform(event):
+                self._last_partial = ""
+                results.append({"type": "final", "text": json.loads(self.rec.Result()).get("text", "")})
+            else:
+                partial = json.loads(self.rec.PartialResult()).get("partial", "")
+                if partial != self._last_partial:
+                    self._last_partial = partial
+                    results.append({"type": "partial", "text": partial})
+        if final:
+            self._last_partial = ""
+            results.append({"type": "final", "text": json.loads(self.rec.FinalResult()).get("text", "")})
+        return results
+
+    def close(self):
+        if self.rec is not None:
+            self.engine.pool.release(self.rec, self.sample_rate)
+            self.rec = None
+        if self.vad:
+            self.engine._record_vad(self.vad)
+            self.vad = None
+
+
 class VoiceEngine:
-    def __init__(self, model_path="brain/models/vosk-model-small-en-us-0.15"):
+    """
+    Vosk speech recognition. The model is loaded on first use (or by
+    `warm_up()` in the background), not at import time.
+    """
+
+    def __init__(self, model_path: Optional[str] = None):
         self.model = None
-        self.model_path = model_path
-        self._load_model()
+        self.model_path = model_path or config.VOSK_MODEL_PATH
+        self.state = "unloaded"  # unloaded | loading | ready | missing | failed
+        self.load_info: Dict = {}
+        self._load_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.pool = RecognizerPool(max_idle=config.VOICE_POOL_SIZE)
+        # Decoding is CPU-bound C++; keep it off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=config.VOICE_WORKERS, thread_name_prefix="vosk")
+        self._vad_totals = {"frames_in": 0, "speech_frames": 0, "decoded_frames": 0}
+        self._vad_lock = threading.Lock()
 
-    def _load_model(self):
-        if os.path.exists(self.model_path):
+    def load_model(self):
+        """Blocking load; concurrent callers wait for the first one."""
+        with self._load_lock:
+            if self.model is not None or self.state == "failed":
+                return self.model
+            if not os.path.exists(self.model_path):
+                self.state = "missing"
+                logger.warning(f"Vosk model not found at {self.model_path}. Voice features disabled.")
+                return None
+
+            self.state = "loading"
             logger.info(f"Loading Vosk model from {self.model_path}...")
+            proc = psutil.Process()
+            rss_before = proc.memory_info().rss
+            start = time.time()
             try:
                 self.model = Model(self.model_path)
-                logger.info("Vosk model loaded.")
             except Exception as e:
+                self.state = "failed"
+                self.load_info = {"error": str(e)}
                 logger.error(f"Failed to load Vosk model: {e}")
-        else:
-            logger.warning(f"Vosk model not found at {self.model_path}. Voice features disabled.")
+                return None
+
+            self.state = "ready"
+            self.load_info = {
+                "load_ms": round((time.time() - start) * 1000, 1),
+                "rss_delta_bytes": proc.memory_info().rss - rss_before,
+                "loaded_by_pid": os.getpid(),
+            }
+            logger.info(f"Vosk model loaded in {self.load_info['load_ms']} ms.")
+            return self.model
+
+    async def ensure_model(self) -> bool:
+        if self.model is None:
+            await asyncio.to_thread(self.load_model)
+        return self.model is not None
+
+    def warm_up(self):
+        """Load the model on a background thread so the first request doesn't wait."""
+        if self.model is not None or (self._warmup_thread and self._warmup_thread.is_alive()):
+            return
+        self._warmup_thread = threading.Thread(target=self.load_model, name="vosk-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    def diagnostics(self) -> Dict:
+        mem = psutil.Process().memory_info()
+        pid = os.getpid()
+        return {
+            "state": self.state,
+            "model_path": self.model_path,
+            **self.load_info,
+            "pid": pid,
+            # Loaded in a parent before fork: pages are shared copy-on-write
+            "inherited": self.load_info.get("loaded_by_pid", pid) != pid,
+            "rss_bytes": mem.rss,
+            "shared_bytes": getattr(mem, "shared", None),
+        }
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def make_vad(self, sample_rate: int) -> Optional[EnergyVAD]:
+        if not config.VOICE_VAD:
+            return None
+        return EnergyVAD(
+            sample_rate,
+            frame_ms=config.VOICE_VAD_FRAME_MS,
+            threshold=config.VOICE_VAD_ENERGY,
+            padding_ms=config.VOICE_VAD_PADDING_MS,
+            pause_ms=config.VOICE_VAD_PAUSE_MS
+        )
+
+    def _record_vad(self, vad: EnergyVAD):
+        with self._vad_lock:
+            self._vad_totals["frames_in"] += vad.frames_in
+            self._vad_totals["speech_frames"] += vad.speech_frames
+            self._vad_totals["decoded_frames"] += vad.decoded_frames
+
+    def stats(self) -> Dict:
+        with self._vad_lock:
+            totals = dict(self._vad_totals)
+        return {
+            "model_state": self.state,
+            "vad_enabled": config.VOICE_VAD,
+            "vad": vad_stats(**totals),
+            "recognizers": self.pool.stats(),
+        }
+
+    def open_stream(self, sample_rate: int = 16000) -> Optional[VoiceStream]:
+        if not self.model:
+            return None
+        return VoiceStream(self, sample_rate)
 
     async def transcribe(self, audio_data: bytes) -> dict:
         """
         Transcribe WAV bytes.
         Returns: {"text": "...", "confidence": 1.0}
         """
-        if not self.model:
+        if not await self.ensure_model():
             return {"text": "", "error": "Model not loaded"}
 
         # Vosk expects 16kHz mono PCM usually.
-        # We assume the UI sends correct format or we might need headers.
-        # If raw bytes, we need to know sample rate.
-        # KaldiRecognizer(model, sample_rate)
-        
+        # Parse the WAV header if present, else assume raw 16k mono.
         try:
-             # Try to read as Wav to get params?
-             # Or assume raw 16k mono?
-             # Let's try to parse wav header if present
             with io.BytesIO(audio_data) as wav_file:
                 with wave.open(wav_file, "rb") as wf:
                     if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
                         # Simplification: Accept it anyway for now or log warning
                         pass
-                    
-                    rec = KaldiRecognizer(self.model, wf.getframerate())
-                    rec.AcceptWaveform(audio_data)
-                    res = json.loads(rec.FinalResult())
-                    return {"text": res.get("text", "")}
+                    sample_rate = wf.getframerate()
+                    pcm = wf.readframes(wf.getnframes())
+        except Exception:
+            sample_rate, pcm = 16000, audio_data
+
+        vad = self.make_vad(sample_rate)
+        segments = split_segments(vad, pcm) if vad else [pcm]
+        if vad:
+            self._record_vad(vad)
+        if not segments:
+            return {"text": "", "vad": vad.stats()}
+
+        try:
+            result = await self._run(self._decode, segments, sample_rate)
         except Exception as e:
-            # Fallback: assume raw 16000?
-            try:
-                rec = KaldiRecognizer(self.model, 16000)
-                rec.AcceptWaveform(audio_data)
-                res = json.loads(rec.FinalResult())
-                return {"text": res.get("text", "")}
-            except Exception as e2:
-                 logger.error(f"Transcription error: {e2}")
-                 return {"text": "", "error": str(e2)}
+            logger.error(f"Transcription error: {e}")
+            return {"text": "", "error": str(e)}
+        if vad:
+            result["vad"] = vad.stats()
+        return result
+
+    def _decode(self, segments: List[bytes], sample_rate: int) -> dict:
+        rec = self.pool.acquire(self.model, sample_rate)
+        try:
+            texts = []
+            for segment in segments:
+                rec.AcceptWaveform(segment)
+                texts.append(json.loads(rec.FinalResult()).get("text", ""))
+            return {"text": " ".join(t for t in texts if t)}
+        finally:
+            self.pool.release(rec, sample_rate)
 
 voice_engine = VoiceEngine()
+
+if config.VOICE_PRELOAD:
+    voice_engine.load_model()
@@ -1,15 +1,46 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from api.routes import router as api_router
 from api.ws_handlers import router as ws_router
 from core.config import config
+from core.model_lifecycle import model_lifecycle
+from core.ollama_pool import ollama_pool
+from core.vision.screen_watcher import screen_watcher
+from core.voice.voice_engine import voice_engine
+from core.kernel_client import kernel_client
 
 app = FastAPI(title="Sentient OS Brain", version="0.1.0")
 
+@app.on_event("startup")
+async def startup_event():
+    ollama_pool.start()
+    if config.WARMUP_ON_STARTUP:
+        model_lifecycle.start()
+    else:
+        model_lifecycle.skip_warmup()
+    if config.SCREEN_WATCHER_ENABLED:
+        screen_watcher.start()
+    if config.VOICE_WARMUP:
+        voice_engine.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await screen_watcher.stop()
+    await model_lifecycle.stop()
+    await ollama_pool.close()
+    await kernel_client.close()
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once required models are warm (or warm-up is off), 503 while warming or failed."""
+    state = model_lifecycle.readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
 # Allow frontend to call this backend
 app.add_middleware(
     CORSMiddleware,
@@ -22,5 +53,10 @@ app.include_router(api_router, prefix="/v1")
 app.include_router(ws_router)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host=config.HOST, port=config.PORT, reload=True)
+    if config.UDS:
+        # Extra listener sockets can't be handed to the reloader
+        from core.uds import serve
+        serve(app, config.HOST, config.PORT, uds=config.UDS)
+    else:
+        import uvicorn
+        uvicorn.run("main:app", host=config.HOST, port=config.PORT, reload=True)
@@ -0,0 +1,68 @@
+
+import argparse
+import difflib
+import glob
+import os
+import statistics
+import sys
+import time
+
+# Run from brain/ or brain/scripts/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PIL import Image
+from core.config import config
+from core.vision.image_utils import preprocess_frame
+from core.vision.ocr_engine import ocr_engine
+
+SCREENSHOT_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "local_kernel", "data", "screenshots")
+DEFAULT_IMAGES = [os.path.join(SCREENSHOT_DIR, f"*.{ext}") for ext in ("webp", "jpg", "png")]  # store blobs + legacy
+
+def timed(fn, runs):
+    times = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-shot vs tiled OCR latency")
+    parser.add_argument("images", nargs="*", help=f"Screenshots (default: {SCREENSHOT_DIR}/*.webp|jpg|png)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=config.OCR_WORKERS)
+    parser.add_argument("--max-width", type=int, default=config.VISION_MAX_WIDTH,
+                        help="Preprocess like VisionEngine (0 = full resolution)")
+    args = parser.parse_args()
+
+    paths = args.images or sorted(p for pattern in DEFAULT_IMAGES for p in glob.glob(pattern))
+    if not paths:
+        print("No images found.")
+        sys.exit(1)
+
+    config.OCR_WORKERS = args.workers
+    print(f"Sentient OS - OCR Benchmark ({args.runs} runs, {args.workers} workers)")
+    print("-----------------------------------------------------------------")
+
+    speedups = []
+    for path in paths:
+        image = Image.open(path)
+        image.load()
+        if args.max_width:
+            image = preprocess_frame(image, args.max_width)
+
+        single_ms, single_text = timed(lambda: ocr_engine.extract_text(image, use_cache=False, tiled=False), args.runs)
+        tiled_ms, tiled_text = timed(lambda: ocr_engine.extract_text(image, use_cache=False, tiled=True), args.runs)
+        similarity = difflib.SequenceMatcher(None, single_text.split(), tiled_text.split()).ratio()
+        speedups.append(single_ms / tiled_ms if tiled_ms else 0.0)
+
+        print(f"{os.path.basename(path)} ({image.width}x{image.height})")
+        print(f"  single: {single_ms:8.1f} ms  ({len(single_text.split())} words)")
+        print(f"  tiled:  {tiled_ms:8.1f} ms  ({len(tiled_text.split())} words, {similarity:.0%} word match)")
+
+    print(f"Median speedup: {statistics.median(speedups):.2f}x")
+    ocr_engine.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Run from brain/ or brain/scripts/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.config import config
+from core.kernel_client import KernelClient
+
+async def timed(fn, runs):
+    times = []
+    size = 0
+    for i in range(runs):
+        start = time.perf_counter()
+        size = await fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1 if len(times) > 1 else 0], size
+
+async def bench(name, kernel, runs, max_width):
+    async def frame(_):
+        return len((await kernel.frame(max_width=max_width)).content)
+
+    async def screenshot(_):
+        return len((await kernel.screenshot()).get("image", ""))
+
+    async def action(i):
+        # Unique params so the kernel's dedupe window doesn't short-circuit the call
+        await kernel.run_action("type_text", f"bench {i}", mode="SIMULATED", wait=True, timeout=30)
+        return 0
+
+    await kernel.telemetry()  # Open the pooled connection before timing
+    print(name)
+    for label, fn in (("frame (raw L8)", frame), ("screenshot (base64 JSON)", screenshot), ("action round-trip", action)):
+        median, p95, size = await timed(fn, runs)
+        rate = f"  {size / 1024 / 1024 / (median / 1000):7.1f} MB/s" if size and median else ""
+        print(f"  {label:26s} median {median:8.2f} ms  p95 {p95:8.2f} ms{rate}")
+    await kernel.close()
+    return kernel.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description="Loopback TCP vs Unix socket latency to the local kernel")
+    parser.add_argument("--url", default=config.KERNEL_URL)
+    parser.add_argument("--uds", default=config.KERNEL_UDS or "/tmp/sentient-kernel.sock",
+                        help="Kernel started with KERNEL_UDS set to this path")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-width", type=int, default=config.VISION_MAX_WIDTH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.uds):
+        print(f"No kernel socket at {args.uds}; start the kernel with KERNEL_UDS={args.uds}")
+        sys.exit(1)
+
+    print(f"Sentient OS - Kernel Transport Benchmark ({args.runs} runs)")
+    print("Action round-trips include the kernel's rate limit; run it with a high ACTION_RATE.")
+    print("-----------------------------------------------------------------")
+    asyncio.run(bench(f"tcp  {args.url}", KernelClient(args.url), args.runs, args.max_width))
+    asyncio.run(bench(f"unix {args.uds}", KernelClient(args.url, uds=args.uds), args.runs, args.max_width))
+
+if __name__ == "__main__":
+    main()
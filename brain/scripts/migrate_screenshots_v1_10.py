@@ -0,0 +1,61 @@
+
+import os
+import sys
+from pathlib import Path
+
+# Adjust path to find core and the kernel's screenshot store
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "local_kernel"))
+
+from core.db import get_connection
+from screenshot_store import screenshot_store
+
+def migrate():
+    """
+    Moves legacy uuid-named PNG screenshots into the deduplicated screenshot
+    store and points vision_events at the resulting blobs.
+    """
+    print("Running v1.10 Screenshot Store Migration...")
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT DISTINCT screenshot_path FROM vision_events WHERE screenshot_path LIKE '%.png'")
+        paths = [row[0] for row in cursor.fetchall()]
+
+        moved = missing = 0
+        for path in paths:
+            if not os.path.exists(path):
+                missing += 1
+                continue
+            # Keep the original until its rows point at the blob, so a failed
+            # run never leaves vision_events referencing a deleted file.
+            stored = screenshot_store.import_file(path, remove=False)
+            cursor.execute(
+                "UPDATE vision_events SET screenshot_path = ? WHERE screenshot_path = ?",
+                (stored["path"], path)
+            )
+            conn.commit()
+            if os.path.abspath(path) != os.path.abspath(stored["path"]):
+                os.remove(path)
+            moved += 1
+        print(f"- {moved} referenced screenshot(s) moved, {missing} already gone")
+
+        # Unreferenced legacy files
+        orphans = 0
+        for entry in os.scandir(screenshot_store.root):
+            if entry.is_file() and entry.name.endswith(".png"):
+                screenshot_store.import_file(entry.path)
+                orphans += 1
+        print(f"- {orphans} unreferenced screenshot(s) moved")
+
+        status = screenshot_store.status()
+        print(f"- Store: {status['files']} file(s), {status['bytes'] / 1024 / 1024:.1f} MB ({status['deduped']} duplicates merged)")
+        print("Migration Complete.")
+    except Exception as e:
+        print(f"Migration Failed: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,84 @@
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOllama:
+    """
+    Minimal Ollama HTTP stand-in for tests.
+    Serves /api/version, /api/ps and non-streamed /api/generate on a free
+    local port. Replies are tagged with `name` so tests can see which
+    instance answered.
+    """
+
+    def __init__(self, name: str, loaded_models=None):
+        self.name = name
+        self.loaded_models = list(loaded_models or [])
+        self.requests = []
+        self.fail_status = None # e.g. 500 to simulate a broken instance
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send(200, {"version": "0.0.0-fake"})
+                elif self.path == "/api/ps":
+                    self._send(200, {"models": [{"name": m, "model": m} for m in fake.loaded_models]})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append((self.path, payload))
+                if fake.fail_status:
+                    self._send(fake.fail_status, {"error": "fake failure"})
+                    return
+                if self.path != "/api/generate":
+                    self._send(404, {"error": "not found"})
+                    return
+                model = payload.get("model", "")
+                if payload.get("keep_alive") == 0:
+                    fake.loaded_models = [m for m in fake.loaded_models if m.split(":")[0] != model.split(":")[0]]
+                elif model and model not in fake.loaded_models:
+                    fake.loaded_models.append(model if ":" in model else f"{model}:latest")
+                prompt = payload.get("prompt", "")
+                self._send(200, {
+                    "model": model,
+                    "response": f"{fake.name}: {prompt[:40]}",
+                    "done": True,
+                    "context": [1, 2, 3],
+                    "prompt_eval_count": max(1, len(prompt.split())),
+                    "prompt_eval_duration": 1_000_000,
+                })
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
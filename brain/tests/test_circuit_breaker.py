@@ -0,0 +1,55 @@
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from core.llm_service import LLMService
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_threshold_and_recovers():
+    probe = AsyncMock(side_effect=[False, True])
+    breaker = CircuitBreaker("ollama", probe=probe, failure_threshold=2, base_backoff=0.01)
+
+    breaker.record_failure(httpx.ConnectError("refused"))
+    assert breaker.allow()
+    breaker.record_failure(httpx.ConnectError("refused"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # Probe fails once, then succeeds after backoff
+    for _ in range(50):
+        if breaker.state == CircuitBreaker.CLOSED:
+            break
+        await asyncio.sleep(0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert probe.call_count == 2
+    assert breaker.status()["fast_failures"] == 1
+
+@pytest.mark.asyncio
+async def test_engine_fails_fast_while_open():
+    from core.local_model_engine import local_engine
+
+    with patch("core.local_model_engine.config.MOCK_LLM", False), \
+         patch.object(local_engine.pool.backends[0].breaker, "state", CircuitBreaker.OPEN), \
+         patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
+        res = await local_engine.generate("hello")
+        assert res.startswith("Error: Local model unavailable")
+        mock_post.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_generate_response_degrades_to_retrieval():
+    service = LLMService()
+    from core.local_model_engine import local_engine
+
+    with patch.object(local_engine.pool.backends[0].breaker, "state", CircuitBreaker.OPEN), \
+         patch("core.vector_store.vector_store.search") as mock_search, \
+         patch.object(service, "_detect_intent", new_callable=AsyncMock) as mock_intent:
+        mock_search.return_value = [{"text": "Paris is the capital", "score": 0.1, "timestamp": 2**31}]
+        res = await service.generate_response("capital of France?")
+
+    assert "unavailable" in res
+    assert "Paris is the capital" in res
+    mock_intent.assert_not_called()
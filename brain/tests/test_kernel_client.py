@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from core.kernel_client import KernelClient
+
+
+def _kernel(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/action/run":
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"status": "simulated", "action": body["action"], "wait": body["wait"]})
+    if request.url.path == "/action/batch":
+        lines = [{"type": "batch.step", "index": 0}, {"type": "batch.result", "result": {"status": "success"}}]
+        return httpx.Response(200, text="".join(json.dumps(l) + "\n" for l in lines))
+    if request.url.path == "/stream":
+        return httpx.Response(200, json={"cpu": 3.0})
+    return httpx.Response(404, text="not found")
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_client_and_record_latency():
+    kernel = KernelClient("http://kernel", transport=httpx.MockTransport(_kernel))
+    try:
+        result = await kernel.run_action("CLICK", None, wait=True)
+        assert result == {"status": "simulated", "action": "CLICK", "wait": True}
+        client = kernel.client
+        await kernel.run_action("CLICK", None)
+        assert kernel.client is client  # pooled, not rebuilt per call
+        assert (await kernel.telemetry())["cpu"] == 3.0
+
+        updates = [u async for u in kernel.run_batch([{"action": "CLICK"}])]
+        assert [u["type"] for u in updates] == ["batch.step", "batch.result"]
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await kernel.screenshot()
+
+        endpoints = kernel.stats()["endpoints"]
+        assert endpoints["POST /action/run"]["count"] == 2
+        assert endpoints["POST /action/batch"]["count"] == 1
+        assert endpoints["GET /vision/screenshot"]["errors"] == 1
+    finally:
+        await kernel.close()
+
+
+@pytest.mark.asyncio
+async def test_kernel_client_over_unix_socket(tmp_path):
+    import uvicorn
+    from fastapi import FastAPI
+    from core.uds import bind_unix
+
+    kernel_app = FastAPI()
+
+    @kernel_app.post("/action/run")
+    async def run(payload: dict):
+        return {"status": "simulated", "action": payload["action"]}
+
+    path = str(tmp_path / "kernel.sock")
+    server = uvicorn.Server(uvicorn.Config(kernel_app, log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[bind_unix(path)]))
+    kernel = KernelClient("http://kernel", uds=path)
+    try:
+        while not server.started:
+            await asyncio.sleep(0.01)
+        assert (await kernel.run_action("CLICK"))["status"] == "simulated"
+        assert kernel.stats()["uds"] == path
+    finally:
+        await kernel.close()
+        server.should_exit = True
+        await serving
@@ -0,0 +1,57 @@
+
+import asyncio
+import pytest
+from core.llm_scheduler import LLMScheduler, Priority
+
+async def _job(scheduler, order, name, priority, user):
+    async with scheduler.slot(priority, user):
+        order.append(name)
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_priority_then_round_robin():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+
+    # Hold the only slot so everything else queues up
+    async with scheduler.slot(Priority.INTERACTIVE, "holder"):
+        tasks = [
+            asyncio.create_task(_job(scheduler, order, "research-1", Priority.BACKGROUND, "alice")),
+            asyncio.create_task(_job(scheduler, order, "alice-1", Priority.INTERACTIVE, "alice")),
+            asyncio.create_task(_job(scheduler, order, "alice-2", Priority.INTERACTIVE, "alice")),
+            asyncio.create_task(_job(scheduler, order, "bob-1", Priority.INTERACTIVE, "bob")),
+            asyncio.create_task(_job(scheduler, order, "intent", Priority.CLASSIFICATION, "bob")),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queued() == 5
+
+    await asyncio.gather(*tasks)
+    assert order == ["alice-1", "bob-1", "alice-2", "intent", "research-1"]
+    assert scheduler.stats()["classes"]["background"]["started"] == 1
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_cancelled_waiters():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+
+    async with scheduler.slot(Priority.INTERACTIVE, "holder"):
+        gone = asyncio.create_task(_job(scheduler, order, "gone", Priority.INTERACTIVE, "alice"))
+        stays = asyncio.create_task(_job(scheduler, order, "stays", Priority.INTERACTIVE, "bob"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queued() == 1
+
+    await stays
+    assert order == ["stays"]
+    assert scheduler.stats()["classes"]["interactive"]["cancelled"] == 1
+    assert scheduler.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_scheduler_context_sets_default_priority():
+    scheduler = LLMScheduler()
+    assert scheduler.resolve() == (Priority.INTERACTIVE, "user")
+    with scheduler.context(user_id="alice", priority=Priority.BACKGROUND):
+        assert scheduler.resolve() == (Priority.BACKGROUND, "alice")
+        assert scheduler.resolve(Priority.CLASSIFICATION) == (Priority.CLASSIFICATION, "alice")
+    assert scheduler.resolve() == (Priority.INTERACTIVE, "user")
@@ -0,0 +1,62 @@
+
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from core.model_lifecycle import ModelLifecycle
+
+@pytest.mark.asyncio
+async def test_idle_unload_only_under_memory_pressure():
+    lc = ModelLifecycle()
+    lc.touch("mistral")
+    lc.touch("phi3")
+    lc.models["mistral"]["last_used"] = time.time() - 3600  # idle
+
+    with patch.object(lc, "unload", new_callable=AsyncMock) as mock_unload, \
+         patch("core.model_lifecycle.psutil.virtual_memory") as mock_mem:
+        mock_mem.return_value = MagicMock(percent=50.0)
+        assert await lc.check_memory_pressure() == []
+        mock_unload.assert_not_called()
+
+        mock_mem.return_value = MagicMock(percent=95.0)
+        assert await lc.check_memory_pressure() == ["mistral"]
+        mock_unload.assert_called_once_with("mistral")
+
+@pytest.mark.asyncio
+async def test_warmup_marks_components_ready():
+    lc = ModelLifecycle()
+    assert not lc.is_ready()
+
+    with patch("core.model_lifecycle.config.MOCK_LLM", False), \
+         patch.object(lc, "preload", new_callable=AsyncMock) as mock_preload, \
+         patch.object(lc, "_warm_embeddings"), \
+         patch.object(lc, "_warm_ocr", side_effect=RuntimeError("tesseract missing")):
+        await lc.warmup()
+
+    mock_preload.assert_called()
+    assert lc.components["llm"]["state"] == "ready"
+    assert lc.components["embeddings"]["state"] == "ready"
+    assert lc.components["ocr"]["state"] == "failed"
+    assert lc.readiness()["ready"] is True  # OCR is optional
+
+def test_skipped_warmup_is_ready():
+    lc = ModelLifecycle()
+    lc.skip_warmup()
+    assert lc.is_ready()
+    assert {c["state"] for c in lc.components.values()} == {"skipped"}
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried():
+    lc = ModelLifecycle()
+    with patch("core.model_lifecycle.config.MOCK_LLM", False), \
+         patch.object(lc, "preload", new_callable=AsyncMock, side_effect=[None, RuntimeError("connection refused")]), \
+         patch.object(lc, "_warm_embeddings"), \
+         patch.object(lc, "_warm_ocr"), \
+         patch("core.model_lifecycle.config.WARMUP_MODELS", ["mistral", "phi3"]):
+        await lc.warmup()
+        assert not lc.is_ready()
+
+        lc.preload.side_effect = None
+        await lc.retry_failed()
+        lc.preload.assert_called_with("phi3")  # only the model that failed
+
+    assert lc.is_ready()
@@ -0,0 +1,135 @@
+import io
+from unittest.mock import patch
+from PIL import Image, ImageDraw
+from core.vision.ocr_cache import OCRCache, dhash, hamming
+from core.vision.ocr_engine import OCREngine, plan_bands
+
+def _screen(text, noise=False):
+    img = Image.new("L", (600, 200), 255)
+    draw = ImageDraw.Draw(img)
+    draw.text((20, 40), text, fill=0)
+    draw.text((20, 120), "File  Edit  View  Help", fill=0)
+    if noise:
+        # Re-capture artefacts: a few pixels differ
+        for x in range(0, 600, 97):
+            img.putpixel((x, 5), 240)
+    return img
+
+def test_recapture_hits_different_text_misses():
+    cache = OCRCache(max_entries=8)
+    cache.put(cache.key(_screen("def main():")), "def main():")
+
+    assert cache.get(cache.key(_screen("def main():", noise=True))) == "def main():"
+    assert cache.get(cache.key(_screen("import os"))) is None
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["near_hits"] == 1
+    assert stats["misses"] == 1
+
+def _desktop(seed=0, clock="12:00", cursor=None, total="1,250.00"):
+    img = Image.new("L", (1200, 675), 255)
+    draw = ImageDraw.Draw(img)
+    for i in range(20):
+        draw.text((40, 30 + 28 * i), f"{i + seed:02d}  def handler_{i + seed}(request): return render(request)", fill=0)
+        draw.text((640, 30 + 28 * i), f"Item {i}   qty {(i + 1) * (seed + 3)}   price {i * 1.25:.2f}", fill=0)
+    draw.text((40, 600), f"Total: {total}", fill=0)
+    draw.rectangle((0, 650, 1200, 675), fill=200)
+    draw.text((1140, 655), clock, fill=0)
+    if cursor:
+        x, y = cursor
+        draw.polygon([(x, y), (x, y + 19), (x + 5, y + 14), (x + 12, y + 14)], fill=0, outline=255)
+    return img
+
+def test_exact_by_default_so_a_changed_digit_misses():
+    cache = OCRCache(max_entries=8)
+    cache.put(cache.key(_desktop()), "12:00")
+    assert cache.get(cache.key(_desktop(clock="12:01"))) is None
+    assert cache.get(cache.key(_desktop())) == "12:00"
+
+def test_cursor_and_clock_noise_is_near_hit_without_scanning():
+    cache = OCRCache(max_entries=128, tolerance=0.000125)
+    for seed in range(1, 40):
+        cache.put(cache.key(_desktop(seed)), f"screen {seed}")
+    cache.put(cache.key(_desktop()), "screen 0")
+
+    # The clock ticked and the mouse moved: same text for OCR purposes
+    assert cache.get(cache.key(_desktop(clock="12:01", cursor=(500, 300)))) == "screen 0"
+    # A changed amount is real content
+    assert cache.get(cache.key(_desktop(total="9,871.45"))) is None
+
+    stats = cache.stats()
+    assert stats["near_hits"] == 1 and stats["misses"] == 1
+    assert stats["near_candidates"] <= 2  # only screen 0 shares enough strips
+
+def test_distinct_lines_are_far_apart():
+    a = dhash(_screen("Total: 1,250.00"))
+    b = dhash(_screen("Total: 9,871.45"))
+    assert hamming(a, b) > 4
+
+def test_bounded_lru():
+    cache = OCRCache(max_entries=2, tolerance=0)
+    keys = [(10, 10, bytes([i])) for i in range(3)]
+    for i, k in enumerate(keys):
+        cache.put(k, str(i))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == "2"
+    assert cache.stats()["evictions"] == 1
+
+def test_engine_bytes_and_image_share_cache():
+    engine = OCREngine()
+    img = _screen("hello world")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+
+    with patch("core.vision.ocr_engine.pytesseract.image_to_string", return_value="hello world\n") as mock_ocr:
+        assert engine.extract_text(img) == "hello world"
+        assert engine.extract_text(buf.getvalue()) == "hello world"
+    assert mock_ocr.call_count == 1
+
+def _words(*words):
+    """image_to_data stand-in: (text, top, height, line) per word."""
+    return {
+        "text": [w[0] for w in words],
+        "top": [w[1] for w in words],
+        "height": [w[2] for w in words],
+        "block_num": [1] * len(words),
+        "par_num": [1] * len(words),
+        "line_num": [w[3] for w in words],
+    }
+
+def test_tiled_ocr_stitches_overlapping_bands():
+    bands = plan_bands(400, 4, 24)
+    assert bands[0] == (0, 124, 0, 100)
+    assert bands[1] == (76, 224, 100, 200)
+
+    results = [
+        # Band 0 also sees "Save As" (global 95-110) whole, but band 1 owns it
+        _words(("File", 10, 12, 1), ("Edit", 10, 12, 1), ("Save", 95, 15, 2), ("As", 95, 15, 2)),
+        # Band 1: a half-cut line at its top edge is dropped
+        _words(("garbled", 0, 8, 1), ("Save", 19, 15, 2), ("As", 19, 15, 2)),
+        _words(),
+        # Band 3 (276-400): line at global 300
+        _words(("Ready", 24, 12, 1)),
+    ]
+    assert OCREngine._stitch(bands, results, 400) == ["File Edit", "Save As", "Ready"]
+
+def test_tall_word_across_band_edge_is_kept_once():
+    bands = plan_bands(400, 4, 24)
+    results = [
+        # An 80px heading at global 60-140 is taller than 2x the overlap: cut in both bands
+        _words(("File", 10, 12, 1), ("Title", 60, 64, 2)),
+        _words(("Title", 0, 64, 1), ("Body", 60, 12, 2)),
+        _words(),
+        _words(),
+    ]
+    assert OCREngine._stitch(bands, results, 400) == ["File", "Title", "Body"]
+
+def test_tiled_mode_runs_bands_on_pool():
+    engine = OCREngine()
+    img = Image.new("L", (300, 400), 255)
+    with patch("core.vision.ocr_engine.config.OCR_WORKERS", 4), \
+         patch("core.vision.ocr_engine.config.OCR_MIN_BAND_HEIGHT", 100), \
+         patch.object(engine, "extract_words", return_value=_words()) as mock_words:
+        engine.extract_text(img, use_cache=False, tiled=True)
+    assert mock_words.call_count == 4
+    engine.shutdown()
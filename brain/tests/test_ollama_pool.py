@@ -0,0 +1,72 @@
+
+import pytest
+from unittest.mock import patch
+from fake_ollama import FakeOllama
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from core.ollama_pool import OllamaPool
+from core.local_model_engine import LocalModelEngine
+
+@pytest.fixture
+def fakes():
+    a = FakeOllama("A", loaded_models=["phi3:latest"]).start()
+    b = FakeOllama("B", loaded_models=["mistral:latest"]).start()
+    yield a, b
+    a.stop()
+    b.stop()
+
+@pytest.mark.asyncio
+async def test_pool_prefers_backend_with_model_loaded(fakes):
+    a, b = fakes
+    pool = OllamaPool([a.url, b.url])
+    await pool.refresh()
+
+    assert pool.pick("mistral").url == b.url
+    assert pool.pick("phi3:latest").url == a.url
+
+    # Unknown model: least outstanding wins
+    async with pool.backends[0].lease("llama3"):
+        assert pool.pick("gemma").url == b.url
+
+@pytest.mark.asyncio
+async def test_pool_skips_unhealthy_backends(fakes):
+    a, b = fakes
+    pool = OllamaPool([a.url, b.url], failure_threshold=1)
+    await pool.refresh()
+
+    b.stop()
+    await pool.refresh()
+    assert not pool.backends[1].available
+    assert pool.pick("mistral").url == a.url
+
+    a.stop()
+    await pool.refresh()
+    with pytest.raises(CircuitOpenError):
+        pool.pick("mistral")
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_engine_routes_generate_through_pool(fakes):
+    a, b = fakes
+    pool = OllamaPool([a.url, b.url], failure_threshold=1)
+    await pool.refresh()
+
+    engine = LocalModelEngine.__new__(LocalModelEngine)
+    engine.model_name = "mistral"
+    engine.ollama_url = a.url
+    engine.pool = pool
+    engine._timeout = 5.0
+    from core.prompt_cache import PromptCache
+    engine.prompt_cache = PromptCache()
+
+    with patch("core.local_model_engine.config.MOCK_LLM", False):
+        res = await engine.generate("hello there")
+        assert res.startswith("B:")
+
+        # B breaks with a 500 -> breaker opens, traffic moves to A
+        b.fail_status = 500
+        res = await engine.generate("hello again")
+        assert res.startswith("Error")
+        assert pool.backends[1].breaker.state == CircuitBreaker.OPEN
+        res = await engine.generate("third try")
+        assert res.startswith("A:")
+    await pool.close()
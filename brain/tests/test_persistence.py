@@ -67,6 +67,24 @@ def test_db_persistence(mock_db):
     assert row is not None
     assert row[0] == "Hello World"
 
+def test_evicted_screenshots_are_unlinked_from_vision_events(mock_db):
+    from core.vision.vision_engine import vision_engine
+
+    conn = get_connection()
+    conn.executemany(
+        "INSERT INTO vision_events (id, user_id, screenshot_path, ocr_text, tags, timestamp) VALUES (?, 'user', ?, '', '{}', 0)",
+        [("a", "/store/old.webp"), ("b", "/store/old.webp"), ("c", "/store/new.webp")]
+    )
+    conn.commit()
+    conn.close()
+
+    assert vision_engine.forget_screenshots(["/store/old.webp"]) == 2
+
+    conn = get_connection()
+    rows = dict(conn.execute("SELECT id, screenshot_path FROM vision_events").fetchall())
+    conn.close()
+    assert rows == {"a": None, "b": None, "c": "/store/new.webp"}
+
 def test_vector_store_add_search(mock_vector_store):
     vs = mock_vector_store
     
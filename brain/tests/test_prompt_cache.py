@@ -0,0 +1,70 @@
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from core.prompt_cache import PromptCache
+from core.local_model_engine import LocalModelEngine
+
+HISTORY = [
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": "hello"},
+]
+
+def test_prompt_cache_hit_after_turn_is_persisted():
+    cache = PromptCache()
+    assert cache.lookup("u1", "chat", HISTORY) is None
+
+    cache.store("u1", "chat", HISTORY, "how are you?", "fine", None, [1, 2, 3], window=5)
+
+    # Same history again -> regeneration of the same turn, base context (none)
+    assert cache.lookup("u1", "chat", HISTORY) is None
+    assert cache.stats()["retries"] == 1
+
+    advanced = HISTORY + [
+        {"role": "user", "content": "how are you?"},
+        {"role": "assistant", "content": "fine"},
+    ]
+    assert cache.lookup("u1", "chat", advanced) == [1, 2, 3]
+    # Other sessions are isolated
+    assert cache.lookup("u2", "chat", advanced) is None
+
+def test_prompt_cache_invalidates_on_history_change():
+    cache = PromptCache()
+    cache.store("u1", "chat", HISTORY, "q", "a", None, [1, 2], window=5)
+
+    assert cache.lookup("u1", "chat", []) is None
+    assert cache.stats()["invalidations"] == 1
+    # Entry is gone, even the matching history misses now
+    assert cache.lookup("u1", "chat", HISTORY + [{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}]) is None
+
+def test_prompt_cache_drops_oversized_context():
+    cache = PromptCache(max_tokens=4)
+    cache.store("u1", "chat", [], "q", "a", None, list(range(10)), window=5)
+    assert cache.stats()["sessions"] == 0
+    assert cache.stats()["overflows"] == 1
+
+def test_prompt_cache_reports_saved_eval_time():
+    cache = PromptCache()
+    cache.record_eval("chat", {"prompt_eval_count": 100, "prompt_eval_duration": 100_000_000})
+    saved = cache.record_eval("chat", {"prompt_eval_count": 10, "prompt_eval_duration": 10_000_000}, reused_tokens=100)
+    assert saved == pytest.approx(100.0)
+    assert cache.stats()["last_turn"]["reused_tokens"] == 100
+
+@pytest.mark.asyncio
+async def test_generate_session_sends_followup_with_context():
+    engine = LocalModelEngine.__new__(LocalModelEngine)
+    engine.model_name = "test"
+    engine.ollama_url = "http://ollama"
+    engine.prompt_cache = PromptCache()
+
+    with patch("core.local_model_engine.config.MOCK_LLM", False), \
+         patch.object(engine, "_post_generate", new_callable=AsyncMock) as mock_post:
+        mock_post.return_value = {"response": "fine", "context": [7, 8, 9]}
+        await engine.generate_session("u1", "chat", "FULL", "FOLLOWUP", HISTORY, "how are you?")
+        assert mock_post.call_args[0][0] == {"prompt": "FULL"}
+
+        advanced = HISTORY + [
+            {"role": "user", "content": "how are you?"},
+            {"role": "assistant", "content": "fine"},
+        ]
+        await engine.generate_session("u1", "chat", "FULL", "FOLLOWUP", advanced, "next")
+        assert mock_post.call_args[0][0] == {"prompt": "FOLLOWUP", "context": [7, 8, 9]}
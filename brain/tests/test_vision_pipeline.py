@@ -0,0 +1,244 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, patch
+from PIL import Image, ImageDraw
+from core.vision.image_utils import decode_raw_frame, preprocess_frame
+from core.vision.vision_engine import VisionEngine
+from core.vision.incremental_ocr import IncrementalOCR, split_tiles
+from core.vision.ocr_layout import OCRLayout, words_from_tesseract
+from core.agents.task_agent import TaskAgent
+
+def test_decode_raw_frame_honours_stride():
+    # 3x2 grayscale frame, rows padded to 4 bytes
+    data = bytes([1, 2, 3, 0, 4, 5, 6, 0])
+    img = decode_raw_frame(data, 3, 2, stride=4)
+    assert img.mode == "L"
+    assert img.size == (3, 2)
+    assert img.tobytes() == bytes([1, 2, 3, 4, 5, 6])
+
+def test_preprocess_frame_downscales_in_memory():
+    img = Image.new("RGB", (2400, 100), (255, 255, 255))
+    out = preprocess_frame(img, max_width=1200)
+    assert out.mode == "L"
+    assert out.size == (1200, 50)
+
+@pytest.mark.asyncio
+async def test_analyze_uses_raw_frame_without_png_fallback():
+    engine = VisionEngine()
+    frame = (Image.new("L", (100, 20), 255), {"path": "", "active_window": "Visual Studio Code"})
+
+    with patch.object(engine, "_capture_frame", new_callable=AsyncMock, return_value=frame), \
+         patch.object(engine, "_capture_data", new_callable=AsyncMock) as mock_png, \
+         patch.object(engine, "_persist_event", new_callable=AsyncMock), \
+         patch("core.vision.vision_engine.config.VISION_CAPTURE_MODE", "raw"), \
+         patch("core.vision.vision_engine.config.VISION_INCREMENTAL_OCR", False), \
+         patch("core.vision.vision_engine.ocr_engine.extract_text", return_value="def main():") as mock_ocr:
+        result = await engine.analyze()
+
+    mock_png.assert_not_called()
+    assert isinstance(mock_ocr.call_args[0][0], Image.Image)
+    assert result["active_window"] == "Visual Studio Code"
+    assert "VSCode" in result["tags"]
+
+def _screen(lines):
+    img = Image.new("L", (300, 30 * len(lines)), 255)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((10, 30 * i + 10), line, fill=0)
+    return img
+
+def _fake_words(composite, psm=6):
+    """image_to_data stand-in: one 'word' per tile found in the composite."""
+    tiles = split_tiles(np.asarray(composite))
+    n = len(tiles)
+    return {
+        "text": [f"w{t}" for t, _ in tiles],
+        "left": [10] * n, "width": [40] * n, "conf": [90.0] * n,
+        "top": [t for t, _ in tiles],
+        "height": [b - t for t, b in tiles],
+        "block_num": [1] * n, "par_num": [1] * n, "line_num": list(range(n)),
+    }
+
+def test_incremental_ocr_only_rereads_changed_tiles():
+    ocr = IncrementalOCR()
+    with patch("core.vision.incremental_ocr.ocr_engine.extract_words", side_effect=_fake_words) as mock_words:
+        first = ocr.extract_text(_screen(["line one", "line two", "12:00"]))
+        assert len(first.splitlines()) == 3
+        assert mock_words.call_count == 1
+        assert mock_words.call_args.kwargs["psm"] == 3  # side-by-side columns stay apart
+
+        # Identical frame: served from the tile cache, no OCR
+        assert ocr.extract_text(_screen(["line one", "line two", "12:00"])) == first
+        assert mock_words.call_count == 1
+
+        # Only the clock changed: one tile goes to OCR
+        ocr.extract_text(_screen(["line one", "line two", "12:01"]))
+        assert mock_words.call_count == 2
+        assert len(split_tiles(np.asarray(mock_words.call_args[0][0]))) == 1
+
+    stats = ocr.stats()
+    assert stats["skipped_frames"] == 1
+    assert stats["tiles_ocr"] == 4
+
+    # Word boxes survive for cached tiles, scaled back to screen pixels
+    layout = ocr.word_layout(scale=2.0)
+    assert len(layout) == 3
+    assert all(w["x"] == 20 for w in layout.words)
+
+COLUMNS = ((10, 130), (170, 290))
+
+def _two_columns(height=400):
+    """Side-by-side windows: 10px 'lines' every 16px, right column 7px lower, so no row is blank."""
+    pixels = np.full((height, 300), 255, dtype=np.uint8)
+    bars = []
+    for (x0, x1), shift in zip(COLUMNS, (2, 9)):
+        for top in range(shift, height, 16):
+            bottom = min(top + 10, height)
+            pixels[top:bottom, x0:x1] = 0
+            bars.append((x0, top, bottom - top))
+    return Image.fromarray(pixels), bars
+
+def _bar_words(composite, psm=6):
+    """image_to_data stand-in: every dark run in a column is a word, cut or not."""
+    pixels = np.asarray(composite)
+    words = []
+    for x0, x1 in COLUMNS:
+        dark = (pixels[:, x0:x1] < 128).any(axis=1)
+        y = 0
+        while y < len(dark):
+            if dark[y]:
+                end = y
+                while end < len(dark) and dark[end]:
+                    end += 1
+                words.append((x0, y, end - y))
+                y = end
+            y += 1
+    n = len(words)
+    return {
+        "text": [f"w{i}" for i in range(n)],
+        "left": [w[0] for w in words], "width": [120] * n, "conf": [90.0] * n,
+        "top": [w[1] for w in words], "height": [w[2] for w in words],
+        "block_num": [1] * n, "par_num": [1] * n, "line_num": list(range(n)),
+    }
+
+def test_incremental_ocr_reads_lines_whole_across_forced_cuts():
+    image, bars = _two_columns()
+    tiles = split_tiles(np.asarray(image))
+    assert len(tiles) > 1 and all(b == t for (_, b), (t, _) in zip(tiles, tiles[1:]))
+
+    ocr = IncrementalOCR(overlap=24)
+    with patch("core.vision.incremental_ocr.ocr_engine.extract_words", side_effect=_bar_words):
+        ocr.extract_text(image)
+    boxes = sorted((w["x"], w["y"], w["h"]) for w in ocr.word_layout().words)
+    # Every line exactly once, at full height: none split at a tile edge
+    assert boxes == sorted(bars)
+
+def _toolbar_layout():
+    data = {
+        "text": ["File", "Save", "As...", "", "Save", "Cancel"],
+        "left": [10, 60, 110, 0, 400, 480],
+        "top": [5, 5, 5, 0, 300, 300],
+        "width": [40, 40, 40, 0, 50, 60],
+        "height": [12, 12, 12, 0, 20, 20],
+        "conf": [95, 91, 88, -1, 96, 97],
+        "block_num": [1, 1, 1, 1, 2, 2], "par_num": [1, 1, 1, 1, 1, 1], "line_num": [1, 1, 1, 1, 1, 1],
+    }
+    return OCRLayout(words_from_tesseract(data, scale=2.0))
+
+def test_layout_find_text():
+    layout = _toolbar_layout()
+    # Case/punctuation-insensitive, every occurrence, screen coordinates
+    assert layout.find_text("save") == [(120, 10, 80, 24), (800, 600, 100, 40)]
+    # Phrases span consecutive words on one line
+    assert layout.find_text("Save As") == [(120, 10, 180, 24)]
+    assert layout.find_text("As Save") == []
+    assert layout.find_text("save", min_conf=95) == [(800, 600, 100, 40)]
+    assert [w["text"] for w in layout.words_at(850, 620)] == ["Save"]
+    assert [w["text"] for w in layout.words_in((0, 0, 300, 50))] == ["File", "Save", "As..."]
+
+@pytest.mark.asyncio
+async def test_task_agent_resolves_click_target_from_layout():
+    agent = TaskAgent()
+    with patch("core.vision.vision_engine.vision_engine.current_layout", new_callable=AsyncMock,
+               return_value=_toolbar_layout()), \
+         patch("core.vision.vision_engine.vision_engine.frame_age", return_value=1.0):
+        step = await agent.execute({"action": "CLICK_ICON", "params": "Cancel"})
+    assert step["action"] == "CLICK"
+    assert step["params"] == {"x": 1020, "y": 620, "label": "Cancel"}
+
+@pytest.mark.asyncio
+async def test_task_agent_recaptures_stale_layout():
+    agent = TaskAgent()
+    with patch("core.vision.vision_engine.vision_engine.frame_age", return_value=300.0), \
+         patch("core.vision.vision_engine.vision_engine.analyze", new_callable=AsyncMock,
+               return_value={"error": "No image data"}) as mock_analyze, \
+         patch("core.vision.vision_engine.vision_engine.current_layout", new_callable=AsyncMock,
+               return_value=_toolbar_layout()):
+        step = await agent.execute({"action": "CLICK_ICON", "params": "Cancel"})
+    mock_analyze.assert_awaited_once_with(capture=True, persist=False)
+    # No fresh frame: the label stays unresolved instead of using old positions
+    assert step["action"] == "CLICK_ICON" and step["params"] == "Cancel"
+
+@pytest.mark.asyncio
+async def test_layout_pass_runs_off_the_event_loop():
+    engine = VisionEngine()
+    engine._frame = (Image.new("L", (100, 20), 255), 2.0, 123.0)
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def extract_layout(image, scale):
+        threads.append(threading.get_ident())
+        assert engine._ocr_lock.locked()  # No frame swap mid-pass
+        return _toolbar_layout()
+
+    with patch("core.vision.vision_engine.config.VISION_INCREMENTAL_OCR", False), \
+         patch("core.vision.vision_engine.ocr_engine.extract_layout", side_effect=extract_layout):
+        boxes = await asyncio.gather(engine.find_text("Cancel"), engine.find_text("Save"))
+
+    assert threads and loop_thread not in threads
+    assert len(threads) == 1  # Concurrent lookups share one pass
+    assert boxes[0] == [(960, 600, 120, 40)]
+    assert (await engine.current_layout()).timestamp == 123.0
+
+@pytest.mark.asyncio
+async def test_screen_watcher_refreshes_only_on_change():
+    from core.vision.screen_watcher import ScreenWatcher
+    watcher = ScreenWatcher(max_age=5.0)
+    screen = Image.new("L", (100, 40), 255)
+    frames = [
+        (screen, {"active_window": "Editor", "seq": 1}),
+        (screen, {"active_window": "Editor", "seq": 1}),   # kernel has no new frame
+        (screen.copy(), {"active_window": "Editor", "seq": 2}),  # same pixels
+        (screen.copy(), {"active_window": "Browser", "seq": 3}),
+    ]
+
+    with patch("core.vision.screen_watcher.vision_engine._capture_frame", new_callable=AsyncMock, side_effect=frames), \
+         patch("core.vision.screen_watcher.vision_engine.analyze_frame", new_callable=AsyncMock,
+               side_effect=lambda image, meta, persist: {"active_window": meta["active_window"]}) as mock_analyze:
+        assert watcher.fresh_context() is None
+        assert [await watcher.poll() for _ in frames] == [True, False, False, True]
+
+    assert mock_analyze.call_count == 2
+    assert mock_analyze.call_args.kwargs["persist"] is False
+    assert watcher.fresh_context() == {"active_window": "Browser"}
+    watcher.checked_at -= 10
+    assert watcher.fresh_context() is None
+
+def test_keyword_tagger_single_pass_reports_signature(tmp_path):
+    from core.vision.tagger import KeywordTagger
+    sig = tmp_path / "signatures.json"
+    sig.write_text('{"Slack": {"window": ["Slack"], "text": ["#general", "Threads"]}, "Browser": ["http", "https://"]}')
+    tagger = KeywordTagger.from_file(str(sig))
+
+    matches = tagger.match("Threads\nhttps://example.com", window="Slack | general")
+    assert matches == {
+        "Slack": {"source": "window", "pattern": "Slack"},
+        # Longest signature wins at the same position
+        "Browser": {"source": "text", "pattern": "https://"},
+    }
+    assert tagger.match("nothing here") == {}
+
+    engine = VisionEngine()
+    assert engine._extract_tags("import os", "main.py - Visual Studio Code") == ["window:main.py - Visual Studio Code", "VSCode"]
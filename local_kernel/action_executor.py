@@ -4,6 +4,7 @@ import pyautogui
 import subprocess
 import time
 import os
+from dedupe_index import DedupeIndex
 
 logger = logging.getLogger("action_executor")
 
@@ -14,12 +15,10 @@ class ActionExecutor:
     def __init__(self):
         # Fail-safe: moving mouse to corner will throw exception
         pyautogui.FAILSAFE = True
-        self._last_action_time = 0.0
-        self._min_interval = 0.5 # Max 2 actions/sec
+        # Rate limiting lives in the action queue (token bucket, see action_queue.py)
         
-        # Deduplication History (timestamp, action, params)
-        self._action_history = [] 
-        self._dedupe_window = 0.5 # Ignore duplicates within 500ms
+        # Deduplication Index (keyed by canonical params hash, see dedupe_index.py)
+        self.dedupe = DedupeIndex(window=0.5) # Ignore duplicates within 500ms
         
         # Intent Map
         self._intent_map = {
@@ -39,7 +38,7 @@ class ActionExecutor:
         ALLOW_REAL_ACTIONS = allow_real
         logger.info(f"Security Mode Update: Real Actions Allowed = {ALLOW_REAL_ACTIONS}")
 
-    def _resolve_intent(self, action_type: str, params: any):
+    def resolve(self, action_type: str, params: any):
         """Map natural language intents to internal actions."""
         key = action_type.lower().strip()
         if key in self._intent_map:
@@ -48,37 +47,33 @@ class ActionExecutor:
         # Fallback for standard actions
         return action_type.upper(), params
 
+    def is_duplicate(self, resolved_action: str, resolved_params: any, source: str = "run") -> bool:
+        """True if the same action was seen within the dedupe window (and records it)."""
+        if self.dedupe.seen(resolved_action, resolved_params, source=source):
+            logger.warning(f"Duplicate action suppressed: {resolved_action}")
+            return True
+        return False
+
     def execute(self, action_type: str, params: any, mode: str = "SIMULATED") -> dict:
         """
-        Executes or Simulates an action.
+        Executes or Simulates an action (resolve + dedupe + run, no rate limit).
         """
-        global ALLOW_REAL_ACTIONS
-        
         # 1. Resolve Intent
-        resolved_action, resolved_params = self._resolve_intent(action_type, params)
+        resolved_action, resolved_params = self.resolve(action_type, params)
         
         # 2. Deduplication
-        now = time.time()
-        # Clean old history
-        self._action_history = [a for a in self._action_history if now - a[0] < 2.0]
-        
-        # Check for recent duplicate
-        key = (resolved_action, str(resolved_params))
-        for ts, act, p in self._action_history:
-            if act == resolved_action and str(p) == str(resolved_params):
-                if now - ts < self._dedupe_window:
-                    logger.warning(f"Duplicate action suppressed: {resolved_action}")
-                    return {"status": "ignored", "reason": "Duplicate action detected"}
-        
-        # Add to history
-        self._action_history.append((now, resolved_action, resolved_params))
+        if self.is_duplicate(resolved_action, resolved_params):
+            return {"status": "ignored", "reason": "Duplicate action detected"}
 
-        # 3. Rate Limiting (Global)
-        if now - self._last_action_time < self._min_interval:
-            wait = self._min_interval - (now - self._last_action_time)
-            time.sleep(wait)
-        self._last_action_time = time.time()
+        return self.run(resolved_action, resolved_params, mode)
 
+    def run(self, resolved_action: str, resolved_params: any, mode: str = "SIMULATED") -> dict:
+        """
+        Runs an already resolved action. Blocking (pyautogui pacing): call it
+        from the action queue's worker thread, not a request handler.
+        """
+        global ALLOW_REAL_ACTIONS
+        
         should_execute = False
         if mode == "REAL":
             if ALLOW_REAL_ACTIONS:
@@ -117,13 +112,22 @@ class ActionExecutor:
                 y = int(resolved_params.get("y", 0))
                 
                 screen_w, screen_h = pyautogui.size()
-                if not (0 <= x <= screen_w and 0 <= y <= screen_h):
+                if not (0 <= x < screen_w and 0 <= y < screen_h):
                     return {"status": "failed", "reason": f"Coordinates {x},{y} out of bounds"}
 
                 pyautogui.moveTo(x, y, duration=0.5)
                 return {"status": "success", "detail": f"Moved to {x},{y}"}
 
             elif resolved_action == "CLICK":
+                # Optional target from the brain's OCR layout: {"x", "y", "label"}
+                if isinstance(resolved_params, dict) and "x" in resolved_params:
+                    x = int(resolved_params["x"])
+                    y = int(resolved_params["y"])
+                    screen_w, screen_h = pyautogui.size()
+                    if not (0 <= x < screen_w and 0 <= y < screen_h):
+                        return {"status": "failed", "reason": f"Coordinates {x},{y} out of bounds"}
+                    pyautogui.click(x, y)
+                    return {"status": "success", "detail": f"Clicked {resolved_params.get('label', '')} at {x},{y}"}
                 pyautogui.click()
                 return {"status": "success", "detail": "Clicked"}
             
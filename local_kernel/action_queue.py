@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("action_queue")
+
+# Queue Configuration
+ACTION_RATE = float(os.getenv("ACTION_RATE", 2.0))  # actions per second (sustained)
+ACTION_BURST = int(os.getenv("ACTION_BURST", 1))
+ACTION_QUEUE_SIZE = int(os.getenv("ACTION_QUEUE_SIZE", 100))
+ACTION_HISTORY = int(os.getenv("ACTION_HISTORY", 200))  # finished jobs kept for status lookups
+
+FINISHED = ("done", "ignored", "cancelled")
+OK_STATUSES = ("success", "simulated")  # ActionExecutor.run outcomes that let a plan continue
+
+
+class TokenBucket:
+    """Rate limiter: `rate` tokens/second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before acting."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class ActionQueue:
+    """
+    Actions run one at a time on a dedicated thread, in submission order.
+
+    `submit()` resolves and dedupes the action, queues it and returns its
+    job at once; HTTP handlers never wait on pyautogui or the rate limit.
+    Progress and results are reported through `notify(type, payload)`
+    (the brain channel). Jobs can be cancelled while still queued.
+    """
+
+    def __init__(self, executor, notify: Optional[Callable[..., Any]] = None, rate: float = 2.0,
+                 burst: int = 1, max_queue: int = 100, history: int = 200,
+                 window_fn: Optional[Callable[[], str]] = None):
+        self.executor = executor
+        self.notify = notify
+        self.window_fn = window_fn  # for {"window": ...} step conditions
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+        self.history = history
+        self.jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="action")
+        self._stats = {"submitted": 0, "executed": 0, "ignored": 0, "cancelled": 0}
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    # --- Submission ---
+
+    def submit(self, action: str, params: Any, mode: str = "SIMULATED") -> Dict:
+        """Queue an action. Returns the job (status queued, or ignored if a duplicate)."""
+        if self._queue is None:
+            self.start()
+        resolved_action, resolved_params = self.executor.resolve(action, params)
+        job = {
+            "action_id": uuid.uuid4().hex,
+            "action": resolved_action,
+            "params": resolved_params,
+            "mode": mode,
+            "status": "queued",
+            "result": None,
+            "queued_at": time.time(),
+            "future": asyncio.get_running_loop().create_future(),
+        }
+        self._stats["submitted"] += 1
+        self._remember(job)
+
+        if self.executor.is_duplicate(resolved_action, resolved_params):
+            self._stats["ignored"] += 1
+            self._finish(job, "ignored", {"status": "ignored", "reason": "Duplicate action detected"})
+            return job
+        if self._queue.full():
+            self._finish(job, "done", {"status": "failed", "reason": "Action queue full"})
+            return job
+
+        self._queue.put_nowait(job)
+        return job
+
+    def submit_batch(self, steps: List[Dict], mode: str = "SIMULATED", stop_on_error: bool = True) -> Dict:
+        """
+        Queue an ordered plan as one job. Steps are {"action", "params",
+        "wait"}; `wait` is checked after the step ran: {"delay": s} and/or
+        {"window": "title part", "timeout": s}. Per-step results are pushed
+        as they finish and can be streamed from `step_results()`.
+        Steps of one plan aren't deduped against each other.
+        """
+        if self._queue is None:
+            self.start()
+        job = {
+            "action_id": uuid.uuid4().hex,
+            "action": "BATCH",
+            "steps": [
+                {**dict(zip(("action", "params"), self.executor.resolve(step.get("action", ""), step.get("params")))),
+                 "wait": step.get("wait") or {}}
+                for step in steps
+            ],
+            "mode": mode,
+            "stop_on_error": stop_on_error,
+            "status": "queued",
+            "result": None,
+            "step_results": [],
+            "queued_at": time.time(),
+            "future": asyncio.get_running_loop().create_future(),
+            "updates": asyncio.Queue(),
+        }
+        self._stats["submitted"] += 1
+        self._remember(job)
+        if self._queue.full():
+            result = {"status": "failed", "reason": "Action queue full"}
+            job["updates"].put_nowait({"type": "batch.result", "batch_id": job["action_id"], "result": result})
+            self._finish(job, "done", result)
+        else:
+            self._queue.put_nowait(job)
+        return job
+
+    async def step_results(self, action_id: str):
+        """Yields each step result of a batch job as it completes, then the summary."""
+        job = self.jobs[action_id]
+        while True:
+            update = await job["updates"].get()
+            yield update
+            if update.get("type") == "batch.result":
+                return
+
+    def cancel(self, action_id: str) -> bool:
+        """
+        Cancel a queued job. A running batch stops before its next step;
+        a running single action can't be cancelled.
+        """
+        job = self.jobs.get(action_id)
+        if not job:
+            return False
+        if job["status"] == "running" and "steps" in job:
+            self._stats["cancelled"] += 1
+            job["status"] = "cancelled"
+            return True
+        if job["status"] != "queued":
+            return False
+        self._stats["cancelled"] += 1
+        if "updates" in job:
+            job["updates"].put_nowait({"type": "batch.result", "batch_id": action_id, "result": {"status": "cancelled"}})
+        self._finish(job, "cancelled", {"status": "cancelled"})
+        return True
+
+    async def wait(self, action_id: str, timeout: Optional[float] = None) -> Dict:
+        job = self.jobs[action_id]
+        return await asyncio.wait_for(asyncio.shield(job["future"]), timeout)
+
+    def get(self, action_id: str) -> Optional[Dict]:
+        job = self.jobs.get(action_id)
+        return self.public(job) if job else None
+
+    # --- Worker ---
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job["status"] != "queued":
+                continue  # Cancelled while waiting
+            await self.bucket.acquire()
+            if job["status"] != "queued":
+                continue
+
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            self._notify("action.progress", self.public(job), ack=False)
+            if "steps" in job:
+                await self._run_batch(job)
+                continue
+            result = await self._run_one(job["action"], job["params"], job["mode"])
+            self._finish(job, "done", result)
+
+    async def _run_one(self, action: str, params: Any, mode: str) -> Dict:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._thread, self.executor.run, action, params, mode
+            )
+        except Exception as e:
+            logger.error(f"Action {action} crashed: {e}")
+            result = {"status": "error", "reason": str(e)}
+        self._stats["executed"] += 1
+        return result
+
+    async def _run_batch(self, job: Dict):
+        failed = False
+        for index, step in enumerate(job["steps"]):
+            if job["status"] == "cancelled":
+                break
+            if index:
+                await self.bucket.acquire()
+            result = await self._run_one(step["action"], step["params"], job["mode"])
+            ok = result.get("status") in OK_STATUSES
+            if ok and step["wait"]:
+                ok = await self._wait_condition(step["wait"])
+                if not ok:
+                    result = {**result, "status": "failed", "reason": f"Wait condition not met: {step['wait']}"}
+
+            update = {"type": "batch.step", "batch_id": job["action_id"], "index": index,
+                      "action": step["action"], "result": result}
+            job["step_results"].append(update)
+            job["updates"].put_nowait(update)
+            self._notify("action.progress", update, ack=False)
+            if not ok and job["stop_on_error"]:
+                failed = True
+                break
+
+        done = len(job["step_results"])
+        summary = {
+            "status": "failed" if failed else ("cancelled" if job["status"] == "cancelled" else "success"),
+            "steps_run": done,
+            "steps_total": len(job["steps"]),
+        }
+        job["updates"].put_nowait({"type": "batch.result", "batch_id": job["action_id"], "result": summary})
+        self._finish(job, "cancelled" if job["status"] == "cancelled" else "done", summary)
+
+    async def _wait_condition(self, wait: Dict) -> bool:
+        if wait.get("delay"):
+            await asyncio.sleep(float(wait["delay"]))
+        title = wait.get("window")
+        if not title:
+            return True
+        if not self.window_fn:
+            return False
+        deadline = time.monotonic() + float(wait.get("timeout", 5.0))
+        while True:
+            current = await asyncio.to_thread(self.window_fn)
+            if title.lower() in (current or "").lower():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.1)
+
+    def _finish(self, job: Dict, status: str, result: Dict):
+        job["status"] = status
+        job["result"] = result
+        job["finished_at"] = time.time()
+        if not job["future"].done():
+            job["future"].set_result(result)
+        self._notify("action.result", self.public(job))
+
+    def _notify(self, msg_type: str, payload: Dict, ack: bool = True):
+        if self.notify:
+            try:
+                self.notify(msg_type, payload, ack=ack)
+            except Exception as e:
+                logger.warning(f"Action notification failed: {e}")
+
+    def _remember(self, job: Dict):
+        self.jobs[job["action_id"]] = job
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest["status"] not in FINISHED:
+                break  # Never forget live jobs
+            self.jobs.pop(oldest_id)
+
+    @staticmethod
+    def public(job: Dict) -> Dict:
+        return {k: v for k, v in job.items() if k not in ("future", "updates")}
+
+    def status(self) -> Dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": any(j["status"] == "running" for j in self.jobs.values()),
+            "rate_per_s": self.bucket.rate,
+            "burst": self.bucket.burst,
+            **self._stats,
+        }
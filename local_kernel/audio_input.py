@@ -1,18 +1,23 @@
+import os
 import time
-import requests
-import base64
+import json
+import asyncio
 import threading
+import websockets
 
 class AudioInputSimulator:
-    def __init__(self):
+    def __init__(self, sample_rate: int = 16000, chunk_ms: int = 100, uds: str = None):
         self._running = False
         self._thread = None
-        self.brain_url = "http://127.0.0.1:8000/v1/audio"
+        self.sample_rate = sample_rate
+        self.chunk_ms = chunk_ms
+        self.brain_url = f"ws://127.0.0.1:8000/ws/audio?sample_rate={sample_rate}"
+        self.uds = uds or os.getenv("BRAIN_UDS") or None  # same host: skip loopback TCP
 
     def start_streaming(self):
         if self._running: return
         self._running = True
-        self._thread = threading.Thread(target=self._stream_loop)
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._stream_loop()))
         self._thread.start()
 
     def stop_streaming(self):
@@ -20,25 +25,29 @@ class AudioInputSimulator:
         if self._thread:
             self._thread.join()
 
-    def _stream_loop(self):
+    async def _stream_loop(self):
         print("Starting simulated audio stream...")
-        while self._running:
-            try:
-                # Generate dummy 1KB chunk
-                chunk = b'\x00' * 1024 
-                response = requests.post(
-                    self.brain_url, 
-                    data=chunk,
-                    headers={"Content-Type": "application/octet-stream"}
-                )
-                if response.status_code == 200:
+        # One socket for the whole stream; frames go out as they are "recorded"
+        chunk = b'\x00' * (self.sample_rate * 2 * self.chunk_ms // 1000)  # 16-bit silence
+        try:
+            connect = websockets.unix_connect(self.uds, self.brain_url) if self.uds else websockets.connect(self.brain_url)
+            async with connect as ws:
+                while self._running:
+                    await ws.send(chunk)
                     print(".", end="", flush=True)
-                else:
-                    print("x", end="", flush=True)
-            except Exception as e:
-                print(f"Audio stream error: {e}")
-            
-            time.sleep(0.5) # 2Hz
+                    await asyncio.sleep(self.chunk_ms / 1000)
+                    while True:  # Drain partial/final results without blocking
+                        try:
+                            reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=0.001))
+                        except asyncio.TimeoutError:
+                            break
+                        if reply.get("type") == "stt.final" and reply.get("text"):
+                            print(f"\n[stt] {reply['text']}")
+
+                await ws.send(json.dumps({"type": "audio.end"}))
+                print(f"\n[stt] final: {await ws.recv()}")
+        except Exception as e:
+            print(f"Audio stream error: {e}")
 
 audio_sim = AudioInputSimulator()
 
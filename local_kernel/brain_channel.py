@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Optional
+
+import websockets
+
+logger = logging.getLogger("brain_channel")
+
+# Channel Configuration
+BRAIN_WS_URL = os.getenv("BRAIN_WS_URL", "ws://127.0.0.1:8000/ws/kernel")
+BRAIN_UDS = os.getenv("BRAIN_UDS", "")  # brain's Unix socket; BRAIN_WS_URL then only sets path and Host
+BRAIN_HEARTBEAT = float(os.getenv("BRAIN_HEARTBEAT", 10))  # seconds between pings
+BRAIN_ACK_TIMEOUT = float(os.getenv("BRAIN_ACK_TIMEOUT", 5))
+BRAIN_SEND_QUEUE = int(os.getenv("BRAIN_SEND_QUEUE", 1000))
+BRAIN_MAX_RETRIES = int(os.getenv("BRAIN_MAX_RETRIES", 5))
+
+
+class BrainChannel:
+    """
+    One long-lived WebSocket from the kernel to the brain.
+
+    Events (wake, telemetry, action results) are queued with `send()` and
+    written by a supervisor task that reconnects with backoff. Every
+    message carries an id; the brain answers {"type": "ack", "id"}. Unacked
+    messages are resent after `ack_timeout` and after a reconnect, up to
+    `max_retries`. Liveness uses WebSocket pings every `heartbeat` seconds.
+    Messages sent with ack=False (telemetry) are fire-and-forget.
+    With `uds` set the socket goes over that Unix socket instead of TCP.
+    """
+
+    def __init__(self, uri: str, heartbeat: float = 10, ack_timeout: float = 5,
+                 max_queue: int = 1000, max_retries: int = 5, uds: Optional[str] = None):
+        self.uri = uri
+        self.uds = uds or None
+        self.heartbeat = heartbeat
+        self.ack_timeout = ack_timeout
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.connected = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[str, Dict] = {}  # id -> {"msg", "sent_at", "attempts"}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"sent": 0, "acked": 0, "resent": 0, "dropped": 0, "connects": 0, "last_rtt_ms": 0.0}
+
+    def start(self):
+        """Start the supervisor on the running loop."""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self.connected = False
+
+    # --- Producers ---
+
+    def send(self, msg_type: str, payload: Optional[dict] = None, ack: bool = True) -> Optional[str]:
+        """
+        Queue an event for the brain. Safe to call from worker threads
+        (sync FastAPI endpoints). Returns the message id, or None if the
+        channel isn't running.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return None
+        msg = {
+            "id": uuid.uuid4().hex,
+            "type": msg_type,
+            "payload": payload or {},
+            "ts": time.time(),
+            "ack": ack,
+        }
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._enqueue(msg)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, msg)
+        return msg["id"]
+
+    def _enqueue(self, msg: dict):
+        if self._queue.full():
+            # Oldest event is the least useful one (stale telemetry first)
+            dropped = self._queue.get_nowait()
+            self._pending.pop(dropped["id"], None)
+            self._stats["dropped"] += 1
+        self._queue.put_nowait(msg)
+
+    # --- Connection ---
+
+    async def _supervise(self):
+        backoff = 0.5
+        while True:
+            try:
+                async with self._connect() as ws:
+                    self.connected = True
+                    self._stats["connects"] += 1
+                    backoff = 0.5
+                    logger.info(f"Brain channel connected to {self.uri}" + (f" via unix:{self.uds}" if self.uds else ""))
+                    self._requeue_pending()
+                    await self._run(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Brain channel down ({e}); retrying in {backoff:.1f}s")
+            finally:
+                self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _connect(self):
+        options = {"ping_interval": self.heartbeat, "ping_timeout": self.heartbeat}
+        if self.uds:
+            return websockets.unix_connect(self.uds, self.uri, **options)
+        return websockets.connect(self.uri, **options)
+
+    async def _run(self, ws):
+        tasks = [
+            asyncio.create_task(self._writer(ws)),
+            asyncio.create_task(self._reader(ws)),
+            asyncio.create_task(self._ack_sweeper()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # Surface the error that ended the session
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _writer(self, ws):
+        while True:
+            msg = await self._queue.get()
+            try:
+                await ws.send(json.dumps(msg))
+            except Exception:
+                self._enqueue(msg)  # Not written: keep it for the next connection
+                raise
+            self._stats["sent"] += 1
+            if msg["ack"]:
+                entry = self._pending.setdefault(msg["id"], {"msg": msg, "attempts": 0})
+                entry["sent_at"] = time.time()
+                entry["attempts"] += 1
+
+    async def _reader(self, ws):
+        async for raw in ws:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                continue
+            if data.get("type") == "ack":
+                entry = self._pending.pop(data.get("id"), None)
+                if entry:
+                    self._stats["acked"] += 1
+                    self._stats["last_rtt_ms"] = round((time.time() - entry["sent_at"]) * 1000, 1)
+
+    async def _ack_sweeper(self):
+        while True:
+            await asyncio.sleep(self.ack_timeout / 2)
+            now = time.time()
+            for msg_id, entry in list(self._pending.items()):
+                if now - entry.get("sent_at", now) >= self.ack_timeout:
+                    self._retry(msg_id, entry)
+
+    def _requeue_pending(self):
+        # Sent on the previous connection but never acked
+        for msg_id, entry in list(self._pending.items()):
+            if "sent_at" in entry:
+                self._retry(msg_id, entry)
+
+    def _retry(self, msg_id: str, entry: Dict):
+        if entry["attempts"] >= self.max_retries:
+            self._pending.pop(msg_id, None)
+            self._stats["dropped"] += 1
+            logger.warning(f"Dropping {entry['msg']['type']} {msg_id} after {entry['attempts']} attempts")
+            return
+        entry.pop("sent_at", None)  # Back in flight once the writer sends it
+        self._stats["resent"] += 1
+        self._enqueue(entry["msg"])
+
+    def status(self) -> Dict:
+        return {
+            "uri": self.uri,
+            "uds": self.uds,
+            "connected": self.connected,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "awaiting_ack": len(self._pending),
+            **self._stats,
+        }
+
+
+brain_channel = BrainChannel(
+    BRAIN_WS_URL,
+    heartbeat=BRAIN_HEARTBEAT,
+    ack_timeout=BRAIN_ACK_TIMEOUT,
+    max_queue=BRAIN_SEND_QUEUE,
+    max_retries=BRAIN_MAX_RETRIES,
+    uds=BRAIN_UDS
+)
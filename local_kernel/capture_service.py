@@ -0,0 +1,156 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import mss
+
+logger = logging.getLogger("capture_service")
+
+# Sampling Configuration
+CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", 2.0))
+CAPTURE_BUFFER_SIZE = int(os.getenv("CAPTURE_BUFFER_SIZE", 4))
+
+
+class Frame:
+    """One grabbed screen frame (raw BGRA from mss) plus capture metadata."""
+
+    __slots__ = ("seq", "timestamp", "width", "height", "bgra", "active_window", "grab_ms")
+
+    def __init__(self, seq: int, timestamp: float, width: int, height: int,
+                 bgra: bytes, active_window: str, grab_ms: float):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.width = width
+        self.height = height
+        self.bgra = bgra
+        self.active_window = active_window
+        self.grab_ms = grab_ms
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def to_image(self):
+        from PIL import Image
+        return Image.frombytes("RGB", self.size, self.bgra, "raw", "BGRX")
+
+
+class CaptureService:
+    """
+    Background screen sampler.
+
+    A single thread keeps one mss handle open (mss handles are bound to the
+    thread that created them) and grabs the primary monitor at `fps` into a
+    fixed-size ring buffer. Endpoints read the newest frame instead of paying
+    handle setup + grab latency per request.
+    """
+
+    def __init__(self, fps: float = 2.0, buffer_size: int = 4,
+                 window_fn: Optional[Callable[[], str]] = None):
+        self.fps = max(0.1, fps)
+        self.frames: deque = deque(maxlen=max(1, buffer_size))
+        self.window_fn = window_fn or (lambda: "Unknown")
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._new_frame = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="capture-service", daemon=True)
+        self._thread.start()
+        logger.info(f"Capture service started ({self.fps} fps, buffer {self.frames.maxlen})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _capture_loop(self):
+        interval = 1.0 / self.fps
+        backoff = interval
+        while not self._stop.is_set():
+            try:
+                with mss.mss() as sct:
+                    monitor = sct.monitors[1]
+                    backoff = interval
+                    while not self._stop.is_set():
+                        started = time.time()
+                        self._push(sct.grab(monitor), started)
+                        self._stop.wait(max(0.0, interval - (time.time() - started)))
+            except Exception as e:
+                # Display went away (lock screen, RDP reconnect...): reopen the handle
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Capture failed: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    def _push(self, sct_img, started: float):
+        grab_ms = round((time.time() - started) * 1000, 1)
+        with self._lock:
+            self._seq += 1
+            frame = Frame(
+                self._seq, started, sct_img.width, sct_img.height,
+                bytes(sct_img.bgra), self.window_fn(), grab_ms
+            )
+            self.frames.append(frame)
+        self._new_frame.set()
+
+    def latest(self, wait: float = 1.0) -> Optional[Frame]:
+        """
+        Newest buffered frame. Waits up to `wait` seconds when the buffer is
+        still empty (service just started).
+        """
+        if not self.frames and self.running:
+            self._new_frame.wait(wait)
+        with self._lock:
+            return self.frames[-1] if self.frames else None
+
+    def history(self) -> List[Frame]:
+        with self._lock:
+            return list(self.frames)
+
+    def grab_once(self) -> Frame:
+        """Synchronous one-off grab, for when the sampler isn't running."""
+        started = time.time()
+        with mss.mss() as sct:
+            sct_img = sct.grab(sct.monitors[1])
+        return Frame(0, started, sct_img.width, sct_img.height, bytes(sct_img.bgra),
+                     self.window_fn(), round((time.time() - started) * 1000, 1))
+
+    def status(self) -> Dict:
+        with self._lock:
+            frame = self.frames[-1] if self.frames else None
+            buffered, captured = len(self.frames), self._seq
+        return {
+            "running": self.running,
+            "fps": self.fps,
+            "buffer_size": self.frames.maxlen,
+            "buffered": buffered,
+            "frames_captured": captured,
+            "latest_age_s": round(frame.age, 3) if frame else None,
+            "latest_grab_ms": frame.grab_ms if frame else None,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+capture_service = CaptureService(fps=CAPTURE_FPS, buffer_size=CAPTURE_BUFFER_SIZE)
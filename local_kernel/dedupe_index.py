@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def canonical(value: Any) -> Any:
+    """JSON-stable form: sorted dict keys, tuples as lists, 100.0 == 100."""
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class DedupeIndex:
+    """
+    Recently seen actions, keyed by a hash of (action, canonical params).
+
+    `seen()` is a dict lookup. Keys are also filed in time buckets of
+    `bucket` seconds; whole buckets older than `window` are dropped on the
+    next call, so expiry costs O(keys expired) instead of rescanning the
+    history. Thread-safe: /action/run checks from the event loop and
+    /action/execute from the threadpool.
+    """
+
+    def __init__(self, window: float = 0.5, bucket: float = 0.25):
+        self.window = window
+        self.bucket = bucket
+        self._last: Dict[str, float] = {}
+        self._buckets: Deque[Tuple[int, List[str]]] = deque()
+        self._stats = {"checked": 0, "suppressed": 0, "expired": 0}
+        self._suppressed_by: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(action: str, params: Any) -> str:
+        raw = json.dumps([action, canonical(params)], separators=(",", ":"))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def seen(self, action: str, params: Any, source: str = "run", now: Optional[float] = None) -> bool:
+        """
+        True if the same action ran within `window` seconds (suppress it);
+        otherwise records it and returns False.
+        """
+        now = time.time() if now is None else now
+        key = self.key(action, params)
+        with self._lock:
+            self._expire(now)
+            self._stats["checked"] += 1
+
+            last = self._last.get(key)
+            if last is not None and now - last < self.window:
+                self._stats["suppressed"] += 1
+                self._suppressed_by[source] = self._suppressed_by.get(source, 0) + 1
+                return True
+
+            self._last[key] = now
+            bucket_id = int(now // self.bucket)
+            if not self._buckets or self._buckets[-1][0] != bucket_id:
+                self._buckets.append((bucket_id, []))
+            self._buckets[-1][1].append(key)
+            return False
+
+    def _expire(self, now: float):
+        # Caller holds the lock
+        horizon = now - self.window
+        while self._buckets and (self._buckets[0][0] + 1) * self.bucket <= horizon:
+            _, keys = self._buckets.popleft()
+            for key in keys:
+                # Skip keys re-recorded in a newer bucket
+                if self._last.get(key, horizon) < horizon:
+                    del self._last[key]
+                    self._stats["expired"] += 1
+
+    def __len__(self):
+        return len(self._last)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "window_s": self.window,
+                "tracked": len(self._last),
+                **self._stats,
+                "suppressed_by_source": dict(self._suppressed_by),
+            }
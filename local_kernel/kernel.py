@@ -1,11 +1,13 @@
 import uvicorn
+import os
 import platform
 import psutil
 import time
 import asyncio
 import websockets
 import json
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Body
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Body, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="Sentient Local Kernel", version="0.1.0")
@@ -21,24 +23,28 @@ app.add_middleware(
 @app.get("/status")
 def system_status():
     """Simulates reading local hardware stats (RTOS duties)"""
+    snap = telemetry_sampler.latest()
     return {
-        "system": platform.system(),
-        "os_type": psutil.os.name,
-        "cpu_percent": psutil.cpu_percent(),
-        "memory_percent": psutil.virtual_memory().percent,
+        "system": snap["system"],
+        "os_type": snap["os_type"],
+        "cpu_percent": snap["cpu"],
+        "memory_percent": snap["ram"],
         "kernel_mode": "Active (Simulated)",
-        "process_count": len(psutil.pids())
+        "process_count": snap["process_count"]
     }
 
 @app.get("/health")
 def health_check():
     """Diagnostic endpoint for system vitals."""
+    snap = telemetry_sampler.latest()
     return {
         "status": "active",
-        "cpu_percent": psutil.cpu_percent(),
-        "ram_percent": psutil.virtual_memory().percent,
-        "uptime": time.time() - psutil.boot_time(),
-        "real_actions_enabled": ALLOW_REAL_ACTIONS
+        "cpu_percent": snap["cpu"],
+        "ram_percent": snap["ram"],
+        "uptime": snap["uptime"],
+        "telemetry": telemetry_sampler.status(),
+        "real_actions_enabled": ALLOW_REAL_ACTIONS,
+        "brain_channel": brain_channel.status()
     }
 
 import asyncio
@@ -64,48 +70,122 @@ def _get_active_window():
     except Exception:
         return "Unknown"
 
+from capture_service import capture_service
+from screenshot_store import screenshot_store
+from brain_channel import brain_channel
+from telemetry import telemetry_sampler
+capture_service.window_fn = _get_active_window
+telemetry_sampler.window_fn = _get_active_window
+# Evicted blobs: the brain clears the vision_events rows that point at them
+screenshot_store.on_evict = lambda paths: brain_channel.send("screenshots.evicted", {"paths": paths})
+
+TELEMETRY_PUSH_INTERVAL = float(os.getenv("TELEMETRY_PUSH_INTERVAL", 5))  # to the brain, 0 = off
+
+@app.on_event("startup")
+def start_capture():
+    capture_service.start()
+    screenshot_store.start()
+
+@app.on_event("startup")
+async def start_brain_channel():
+    telemetry_sampler.start()
+    brain_channel.start()
+    action_queue.start()
+    if TELEMETRY_PUSH_INTERVAL > 0:
+        app.state.telemetry_task = asyncio.create_task(_push_telemetry())
+
+@app.on_event("shutdown")
+def stop_capture():
+    capture_service.stop()
+    screenshot_store.stop()
+
+@app.on_event("shutdown")
+async def stop_brain_channel():
+    task = getattr(app.state, "telemetry_task", None)
+    if task:
+        task.cancel()
+    await action_queue.stop()
+    await brain_channel.stop()
+    await telemetry_sampler.stop()
+
+async def _push_telemetry():
+    while True:
+        await asyncio.sleep(TELEMETRY_PUSH_INTERVAL)
+        # Lossy by design: a newer snapshot supersedes an unacked one
+        brain_channel.send("telemetry", telemetry_sampler.latest(), ack=False)
+
+def _latest_frame():
+    """Newest sampled frame; one-off grab if the sampler has nothing yet."""
+    frame = capture_service.latest()
+    return frame if frame else capture_service.grab_once()
+
 @app.get("/screenshot")
 @app.get("/vision/screenshot") # v1.9 Standard
 def capture_screen():
-    retries = 2
-    for attempt in range(retries):
-        try:
-            with mss.mss() as sct:
-                # Capture primary monitor
-                monitor = sct.monitors[1]
-                sct_img = sct.grab(monitor)
-                # Convert to PNG
-                png = mss.tools.to_png(sct_img.rgb, sct_img.size)
-                
-                # Save to disk
-                import uuid
-                import os
-                
-                data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "screenshots")
-                os.makedirs(data_dir, exist_ok=True)
-                
-                filename = f"{uuid.uuid4()}.png"
-                filepath = os.path.join(data_dir, filename)
-                
-                with open(filepath, "wb") as f:
-                    f.write(png)
-                    
-                b64_str = base64.b64encode(png).decode('utf-8')
-                
-                # Active Window
-                active_window = _get_active_window()
-                
-                return {
-                    "image": b64_str, 
-                    "path": filepath,
-                    "filename": filename,
-                    "active_window": active_window
-                }
-        except Exception as e:
-            print(f"Screenshot attempt {attempt + 1} failed: {e}")
-            if attempt == retries - 1:
-                return {"error": str(e)}
-            time.sleep(0.5)
+    try:
+        frame = _latest_frame()
+        # Deduplicated WebP/JPEG blob (see screenshot_store.py)
+        stored = screenshot_store.save(frame.to_image())
+        with open(stored["path"], "rb") as f:
+            b64_str = base64.b64encode(f.read()).decode('utf-8')
+        
+        return {
+            "image": b64_str, 
+            "format": stored["format"],
+            "path": stored["path"],
+            "filename": stored["filename"],
+            "hash": stored["hash"],
+            "active_window": frame.active_window,
+            "timestamp": frame.timestamp
+        }
+    except Exception as e:
+        print(f"Screenshot failed: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/vision/frame") # v1.10 Raw frame transfer
+def capture_frame(max_width: int = 0, store: bool = False):
+    """
+    Raw 8-bit grayscale frame for the brain's vision pipeline.
+    No PNG encode, no disk write, no base64: the body is row-major pixels,
+    geometry travels in X-Frame-* headers (stride = bytes per row).
+    store=true also keeps the color frame in the screenshot store and
+    returns its path in X-Screenshot-Path.
+    """
+    from PIL import Image
+    from urllib.parse import quote
+
+    try:
+        frame = _latest_frame()
+        color = frame.to_image()
+        stored = screenshot_store.save(color) if store else None
+        img = color.convert("L")
+        if max_width and img.width > max_width:
+            ratio = max_width / img.width
+            img = img.resize((max_width, int(img.height * ratio)), Image.Resampling.LANCZOS)
+    except Exception as e:
+        print(f"Frame capture failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {
+        "X-Frame-Width": str(img.width),
+        "X-Frame-Height": str(img.height),
+        "X-Frame-Stride": str(img.width),
+        "X-Frame-Format": "L8",
+        "X-Source-Width": str(frame.width),
+        "X-Source-Height": str(frame.height),
+        "X-Frame-Timestamp": str(frame.timestamp),
+        "X-Frame-Seq": str(frame.seq),
+        "X-Active-Window": quote(frame.active_window),
+    }
+    if stored:
+        headers["X-Screenshot-Path"] = quote(stored["path"])
+    return Response(content=img.tobytes(), media_type="application/octet-stream", headers=headers)
+
+@app.get("/vision/capture/status")
+def capture_status():
+    """Sampler diagnostics: rate, buffer fill, age of the newest frame."""
+    return {**capture_service.status(), "store": screenshot_store.status()}
 
 
 # --- SAFE EXECUTOR STATE ---
@@ -126,6 +206,10 @@ def execute_action_endpoint(payload: dict):
          # For backward compat, we log but don't crash yet, OR strict:
          # return {"status": "failed", "error": "Missing security token."}
          pass     
+    # 0. Deduplication (shared index with /action/run)
+    if action_executor.is_duplicate(intent, None, source="execute"):
+        return {"status": "ignored", "action_id": action_id, "reason": "Duplicate action detected"}
+
     # 1. Check Allow Switch
     if not ALLOW_REAL_ACTIONS:
         return {
@@ -168,18 +252,73 @@ def execute_action_endpoint(payload: dict):
         return {"status": "failed", "error": str(e)}
 
 from action_executor import action_executor
+from action_queue import ActionQueue, ACTION_RATE, ACTION_BURST, ACTION_QUEUE_SIZE, ACTION_HISTORY
+
+action_queue = ActionQueue(
+    action_executor,
+    notify=brain_channel.send,
+    rate=ACTION_RATE,
+    burst=ACTION_BURST,
+    max_queue=ACTION_QUEUE_SIZE,
+    history=ACTION_HISTORY,
+    window_fn=_get_active_window
+)
 
 @app.post("/action/run")
-def run_action(payload: dict):
+async def run_action(payload: dict):
     """
     New v1.8 Endpoint for Agentic Actions.
-    payload: { "action": "OPEN_APP", "params": "notepad", "mode": "REAL" }
+    payload: { "action": "OPEN_APP", "params": "notepad", "mode": "REAL", "wait": false }
+    Queues the action and returns its action_id at once; progress and the
+    result are pushed to the brain. "wait": true returns the result instead.
     """
     action = payload.get("action")
     params = payload.get("params")
     mode = payload.get("mode", "SIMULATED")
     
-    return action_executor.execute(action, params, mode)
+    job = action_queue.submit(action, params, mode)
+    if payload.get("wait"):
+        return await action_queue.wait(job["action_id"])
+    return {"status": job["status"], "action_id": job["action_id"], "result": job["result"]}
+
+@app.post("/action/batch")
+async def run_action_batch(payload: dict):
+    """
+    Runs an approved multi-step plan in one call.
+    payload: { "steps": [{"action", "params", "wait": {"delay": 1} | {"window": "Notepad", "timeout": 5}}],
+               "mode": "REAL", "stop_on_error": true, "stream": true }
+    Streams one NDJSON line per finished step, then a batch.result line.
+    """
+    steps = payload.get("steps") or []
+    if not steps:
+        raise HTTPException(status_code=400, detail="No steps")
+    job = action_queue.submit_batch(steps, payload.get("mode", "SIMULATED"), payload.get("stop_on_error", True))
+
+    if not payload.get("stream", True):
+        result = await action_queue.wait(job["action_id"])
+        return {"batch_id": job["action_id"], "result": result, "steps": job["step_results"]}
+
+    async def lines():
+        async for update in action_queue.step_results(job["action_id"]):
+            yield json.dumps(update) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Batch-Id": job["action_id"]})
+
+@app.get("/action/queue")
+def action_queue_status():
+    return {**action_queue.status(), "dedupe": action_executor.dedupe.stats()}
+
+@app.get("/action/{action_id}")
+def action_status(action_id: str):
+    job = action_queue.get(action_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown action")
+    return job
+
+@app.post("/action/{action_id}/cancel")
+def cancel_action(action_id: str):
+    if not action_queue.cancel(action_id):
+        raise HTTPException(status_code=409, detail="Action is not queued")
+    return {"status": "cancelled", "action_id": action_id}
 
 @app.post("/admin/toggle-actions")
 def toggle_actions(enable: bool):
@@ -201,41 +340,50 @@ def execute_action_legacy(payload: dict):
 
 @app.get("/stream")
 def stream_telemetry():
-    """Lightweight telemetry endpoint for high-frequency polling"""
-    return {
-        "cpu": psutil.cpu_percent(interval=None),
-        "ram": psutil.virtual_memory().percent,
-        "ts": time.time(),
-        "uptime": int(time.time() - psutil.boot_time()),
-        "temp": 45.0, # Mock temp
-        "active_window": _get_active_window()
-    }
+    """Lightweight telemetry endpoint for polling (served from the sampler cache)"""
+    snap = telemetry_sampler.latest()
+    return {key: snap[key] for key in ("cpu", "ram", "ts", "uptime", "temp", "active_window")}
 
-async def notify_brain_wake(confidence: float):
-    uri = "ws://127.0.0.1:8000/ws"
+@app.websocket("/telemetry/ws")
+async def telemetry_ws(websocket: WebSocket):
+    """Push telemetry: one telemetry.snapshot, then telemetry.delta messages."""
+    await websocket.accept()
     try:
-        async with websockets.connect(uri) as websocket:
-            await websocket.send(json.dumps({
-                "type": "wake.trigger",
-                "payload": {"confidence": confidence}
-            }))
-            # We don't wait for ACK here, fire and forget logic
-    except Exception as e:
-        print(f"Failed to notify brain: {e}")
+        async for update in telemetry_sampler.deltas():
+            await websocket.send_json(update)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+@app.get("/telemetry/sse")
+async def telemetry_sse(request: Request):
+    """Same stream as /telemetry/ws as Server-Sent Events."""
+    async def events():
+        async for update in telemetry_sampler.deltas():
+            if await request.is_disconnected():
+                break
+            yield f"event: {update['type']}\ndata: {json.dumps(update)}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def notify_brain_wake(confidence: float):
+    # Queued on the persistent brain channel (see brain_channel.py): no
+    # connection setup on the wake path, delivery is acked and retried.
+    if brain_channel.send("wake.trigger", {"confidence": confidence}) is None:
+        print("Failed to notify brain: channel not running")
 
 @app.post("/wake-event")
-async def wake_event(payload: dict, background_tasks: BackgroundTasks):
+async def wake_event(payload: dict):
     confidence = payload.get("confidence", 0.0)
     if confidence > 0.65:
-        background_tasks.add_task(notify_brain_wake, confidence)
+        notify_brain_wake(confidence)
         return {"status": "triggered", "confidence": confidence}
     return {"status": "ignored", "confidence": confidence}
 
 @app.get("/wake")
-def trigger_wake_test(background_tasks: BackgroundTasks):
-    background_tasks.add_task(notify_brain_wake, 0.99)
+async def trigger_wake_test():
+    notify_brain_wake(0.99)
     return {"status": "simulated_wake"}
 
 if __name__ == "__main__":
     # Running on port 8001 to distinguish from Brain (8000)
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    from uds import serve
+    serve(app, host="0.0.0.0", port=8001, uds=os.getenv("KERNEL_UDS") or None)
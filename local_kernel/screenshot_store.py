@@ -0,0 +1,193 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger("screenshot_store")
+
+# Retention Configuration
+SCREENSHOT_DIR = os.getenv(
+    "SCREENSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "screenshots")
+)
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "webp").lower()  # webp | jpeg
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", 80))
+SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", 1600))  # 0 = keep full size
+SCREENSHOT_MAX_MB = float(os.getenv("SCREENSHOT_MAX_MB", 500))
+SCREENSHOT_MAX_AGE_DAYS = float(os.getenv("SCREENSHOT_MAX_AGE_DAYS", 7))
+SCREENSHOT_EVICT_INTERVAL = int(os.getenv("SCREENSHOT_EVICT_INTERVAL", 300))
+
+_EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "jpg": "jpg"}
+
+
+class ScreenshotStore:
+    """
+    Content-addressed screenshot blobs.
+
+    Frames are named by a hash of their pixels, so capturing an unchanged
+    screen again reuses the existing file instead of writing a new one.
+    Blobs are WebP (or JPEG), optionally downsampled. A background thread
+    deletes blobs older than `max_age` seconds and then the least recently
+    used ones until the directory fits in `max_bytes`. `on_evict`, if set,
+    is called with the removed paths so whoever recorded them can drop
+    the references.
+    """
+
+    def __init__(self, root: str, fmt: str = "webp", quality: int = 80, max_width: int = 1600,
+                 max_bytes: int = 500 * 1024 * 1024, max_age: float = 7 * 86400,
+                 evict_interval: int = 300):
+        self.root = root
+        self.fmt = "jpeg" if fmt in ("jpg", "jpeg") else "webp"
+        self.ext = _EXTENSIONS[self.fmt]
+        self.quality = quality
+        self.max_width = max_width
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_interval = evict_interval
+        self._stats = {"saved": 0, "deduped": 0, "evicted": 0, "bytes_written": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.on_evict: Optional[Callable[[List[str]], None]] = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def _prepare(self, image: Image.Image) -> Image.Image:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if self.max_width and image.width > self.max_width:
+            ratio = self.max_width / image.width
+            image = image.resize((self.max_width, int(image.height * ratio)), Image.Resampling.LANCZOS)
+        return image
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, f"{digest}.{self.ext}")
+
+    def save(self, image: Image.Image) -> Dict:
+        """
+        Store `image` (deduplicated). Returns {path, filename, hash, bytes, deduped}.
+        The blob's mtime is refreshed on reuse, so eviction is least-recently-captured.
+        """
+        image = self._prepare(image)
+        digest = hashlib.sha1(image.tobytes()).hexdigest()
+        path = self.path_for(digest)
+
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path, None)
+                self._stats["deduped"] += 1
+                return self._result(path, digest, deduped=True)
+
+            buf = io.BytesIO()
+            image.save(buf, format=self.fmt.upper(), quality=self.quality)
+            data = buf.getvalue()
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._stats["saved"] += 1
+            self._stats["bytes_written"] += len(data)
+        return self._result(path, digest, deduped=False)
+
+    def _result(self, path: str, digest: str, deduped: bool) -> Dict:
+        return {
+            "path": path,
+            "filename": os.path.basename(path),
+            "hash": digest,
+            "bytes": os.path.getsize(path),
+            "format": self.fmt,
+            "deduped": deduped,
+        }
+
+    def import_file(self, path: str, remove: bool = True) -> Dict:
+        """Move a legacy screenshot (e.g. a uuid-named PNG) into the store."""
+        with Image.open(path) as img:
+            img.load()
+            result = self.save(img)
+        if remove and os.path.abspath(path) != os.path.abspath(result["path"]):
+            os.remove(path)
+        return result
+
+    # --- Retention ---
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Apply age and size quotas. Returns the number of files removed."""
+        now = now or time.time()
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            entries.sort()  # oldest first
+
+            removed: List[str] = []
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in entries:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Could not evict {path}: {e}")
+                    continue
+                total -= size
+                removed.append(path)
+
+        if removed:
+            self._stats["evicted"] += len(removed)
+            logger.info(f"Evicted {len(removed)} screenshot(s), {total / 1024 / 1024:.1f} MB kept")
+            if self.on_evict:
+                try:
+                    self.on_evict(removed)
+                except Exception as e:
+                    logger.warning(f"Eviction callback failed: {e}")
+        return len(removed)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._evict_loop, name="screenshot-evict", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _evict_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.evict()
+            except Exception as e:
+                logger.error(f"Screenshot eviction failed: {e}")
+            self._stop.wait(self.evict_interval)
+
+    def status(self) -> Dict:
+        files = [e for e in os.scandir(self.root) if e.is_file()]
+        return {
+            "root": self.root,
+            "format": self.fmt,
+            "files": len(files),
+            "bytes": sum(e.stat().st_size for e in files),
+            "max_bytes": self.max_bytes,
+            "max_age_s": self.max_age,
+            **self._stats,
+        }
+
+
+screenshot_store = ScreenshotStore(
+    SCREENSHOT_DIR,
+    fmt=SCREENSHOT_FORMAT,
+    quality=SCREENSHOT_QUALITY,
+    max_width=SCREENSHOT_MAX_WIDTH,
+    max_bytes=int(SCREENSHOT_MAX_MB * 1024 * 1024),
+    max_age=SCREENSHOT_MAX_AGE_DAYS * 86400,
+    evict_interval=SCREENSHOT_EVICT_INTERVAL
+)
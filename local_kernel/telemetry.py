@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger("telemetry")
+
+# Sampler Configuration
+TELEMETRY_INTERVAL = float(os.getenv("TELEMETRY_INTERVAL", 1.0))  # seconds between samples
+
+DERIVED_KEYS = {"uptime"}  # ts - boot_time; changes every sample, so never pushed as a delta
+
+
+def diff(prev: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys of `cur` whose value differs from `prev` (the delta pushed to clients)."""
+    return {k: v for k, v in cur.items() if prev.get(k) != v}
+
+
+class TelemetrySampler:
+    """
+    One background sampler for the kernel's system stats.
+
+    Every `interval` seconds a task reads psutil and the active window
+    (on a worker thread) and caches the snapshot. Polling endpoints serve
+    the cache, push clients wait on `next_snapshot()`, so the number of UI
+    clients no longer multiplies the monitoring cost.
+    """
+
+    def __init__(self, interval: float = 1.0, window_fn: Optional[Callable[[], str]] = None):
+        self.interval = interval
+        self.window_fn = window_fn
+        self.seq = 0
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._boot_time = psutil.boot_time()
+        self._static = {"system": platform.system(), "os_type": os.name, "boot_time": self._boot_time}
+        self._task: Optional[asyncio.Task] = None
+        self._updated: Optional[asyncio.Event] = None
+        self._stats = {"samples": 0, "errors": 0, "last_sample_ms": 0.0}
+        psutil.cpu_percent(interval=None)  # Prime: the first non-blocking call returns 0.0
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._updated = asyncio.Event()
+        self._publish(self._sample())  # Cache is warm before the first request
+        self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._updated = None
+
+    def _sample(self) -> Dict[str, Any]:
+        start = time.time()
+        snapshot = {
+            **self._static,
+            "cpu": psutil.cpu_percent(interval=None),
+            "ram": psutil.virtual_memory().percent,
+            "process_count": len(psutil.pids()),
+            "uptime": int(start - self._boot_time),
+            "temp": 45.0,  # Mock temp
+            "active_window": self.window_fn() if self.window_fn else "Unknown",
+            "ts": start,
+        }
+        self._stats["last_sample_ms"] = round((time.time() - start) * 1000, 1)
+        return snapshot
+
+    def _publish(self, snapshot: Dict[str, Any]):
+        self.seq += 1
+        self.snapshot = {**snapshot, "seq": self.seq}
+        self._stats["samples"] += 1
+        if self._updated is not None:
+            # Wake every waiter once, then arm a fresh event for the next sample
+            updated, self._updated = self._updated, asyncio.Event()
+            updated.set()
+
+    async def _sample_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self._publish(await asyncio.to_thread(self._sample))
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Telemetry sample failed: {e}")
+
+    def latest(self) -> Dict[str, Any]:
+        """Cached snapshot; samples inline only if the sampler never ran."""
+        if self.snapshot is None:
+            self._publish(self._sample())
+        return self.snapshot
+
+    async def next_snapshot(self, after_seq: int) -> Dict[str, Any]:
+        """Wait for a snapshot newer than `after_seq`."""
+        while self.snapshot is None or self.snapshot["seq"] <= after_seq:
+            if self._updated is None:  # Sampler not started: sample on this client's clock
+                await asyncio.sleep(self.interval)
+                self._publish(await asyncio.to_thread(self._sample))
+                continue
+            await self._updated.wait()
+        return self.snapshot
+
+    async def deltas(self):
+        """
+        Push stream for one client: the full snapshot first, then only the
+        changed fields of each new sample ("ts"/"seq" always included).
+        Derived fields (uptime) are left out; clients get them from the
+        snapshot's boot_time.
+        """
+        current = self.latest()
+        yield {"type": "telemetry.snapshot", "seq": current["seq"], "data": current}
+        while True:
+            newer = await self.next_snapshot(current["seq"])
+            changes = {k: v for k, v in diff(current, newer).items() if k not in DERIVED_KEYS}
+            current = newer
+            if set(changes) - {"ts", "seq"}:
+                yield {"type": "telemetry.delta", "seq": newer["seq"], "changes": changes}
+
+    def status(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_s": self.interval,
+            "seq": self.seq,
+            **self._stats,
+        }
+
+
+telemetry_sampler = TelemetrySampler(interval=TELEMETRY_INTERVAL)
@@ -0,0 +1,37 @@
+# Copy of brain/core/uds.py: the kernel and the brain ship and run separately
+# and share no package. Keep the two files identical.
+import logging
+import os
+import socket
+from typing import Optional
+
+import uvicorn
+
+logger = logging.getLogger("uds")
+
+
+def bind_unix(path: str) -> socket.socket:
+    """Listening Unix socket at `path`, replacing a stale socket file."""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o660)  # Same user/group only
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(app, host: str, port: int, uds: Optional[str] = None, **kwargs):
+    """
+    Run uvicorn on TCP and, if `uds` is set, on a Unix socket as well:
+    the UI keeps using TCP while same-host services skip the loopback
+    TCP stack. uvicorn re-raises the stop signal, so the socket file is
+    left behind and replaced by `bind_unix` on the next start.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, **kwargs))
+    sockets = [server.config.bind_socket()]
+    if uds:
+        sockets.append(bind_unix(uds))
+        logger.info(f"Also listening on unix:{uds}")
+    server.run(sockets=sockets)
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from action_queue import ActionQueue, TokenBucket
+
+class FakeExecutor:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.ran = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def resolve(self, action, params):
+        return action.upper(), params
+
+    def is_duplicate(self, action, params):
+        return False
+
+    def run(self, action, params, mode):
+        self.gate.wait(2)
+        time.sleep(self.delay)
+        self.ran.append((action, params))
+        return {"status": "simulated", "action": action}
+
+def test_token_bucket_spacing():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_reports_result():
+    events = []
+    executor = FakeExecutor(delay=0.2)
+    queue = ActionQueue(executor, notify=lambda t, p, ack=True: events.append((t, p["status"])), rate=100)
+    queue.start()
+    try:
+        start = time.monotonic()
+        job = queue.submit("click", None)
+        assert time.monotonic() - start < 0.05
+        assert job["status"] == "queued"
+
+        result = await queue.wait(job["action_id"], timeout=2)
+        assert result["status"] == "simulated"
+        assert queue.get(job["action_id"])["status"] == "done"
+        assert events == [("action.progress", "running"), ("action.result", "done")]
+    finally:
+        await queue.stop()
+
+@pytest.mark.asyncio
+async def test_queued_action_can_be_cancelled():
+    executor = FakeExecutor()
+    executor.gate.clear()  # Hold the worker on the first action
+    queue = ActionQueue(executor, rate=100)
+    queue.start()
+    try:
+        first = queue.submit("type_text", "a")
+        second = queue.submit("type_text", "b")
+        await asyncio.sleep(0.05)
+
+        assert not queue.cancel(first["action_id"])  # already running
+        assert queue.cancel(second["action_id"])
+        executor.gate.set()
+
+        await queue.wait(first["action_id"], timeout=2)
+        assert (await queue.wait(second["action_id"], timeout=2))["status"] == "cancelled"
+        await asyncio.sleep(0.05)
+        assert executor.ran == [("TYPE_TEXT", "a")]
+    finally:
+        await queue.stop()
+
+@pytest.mark.asyncio
+async def test_batch_streams_step_results_and_waits_for_window():
+    window = {"title": "Desktop"}
+    executor = FakeExecutor()
+    queue = ActionQueue(executor, rate=100, window_fn=lambda: window["title"])
+    queue.start()
+    try:
+        job = queue.submit_batch([
+            {"action": "open_app", "params": "notepad", "wait": {"window": "notepad", "timeout": 2}},
+            {"action": "type_text", "params": "hi"},
+            {"action": "type_text", "params": "hi"},  # plans may repeat steps
+        ])
+        asyncio.get_running_loop().call_later(0.2, window.update, {"title": "Untitled - Notepad"})
+
+        updates = [u async for u in queue.step_results(job["action_id"])]
+        assert [u["type"] for u in updates] == ["batch.step"] * 3 + ["batch.result"]
+        assert updates[-1]["result"] == {"status": "success", "steps_run": 3, "steps_total": 3}
+        assert len(executor.ran) == 3
+    finally:
+        await queue.stop()
+
+@pytest.mark.asyncio
+async def test_batch_stops_when_wait_condition_fails():
+    executor = FakeExecutor()
+    queue = ActionQueue(executor, rate=100, window_fn=lambda: "Desktop")
+    queue.start()
+    try:
+        job = queue.submit_batch([
+            {"action": "open_app", "params": "notepad", "wait": {"window": "notepad", "timeout": 0.2}},
+            {"action": "type_text", "params": "hi"},
+        ])
+        result = await queue.wait(job["action_id"], timeout=2)
+        assert result["status"] == "failed" and result["steps_run"] == 1
+        assert executor.ran == [("OPEN_APP", "notepad")]
+    finally:
+        await queue.stop()
+
+@pytest.mark.asyncio
+async def test_batch_rejected_by_full_queue_ends_its_stream():
+    executor = FakeExecutor()
+    executor.gate.clear()  # Hold the worker so the queue fills up
+    queue = ActionQueue(executor, rate=100, max_queue=1)
+    queue.start()
+    try:
+        queue.submit("click", None)
+        await asyncio.sleep(0.05)  # Worker took it
+        queue.submit("type_text", "a")  # Fills the queue
+        job = queue.submit_batch([{"action": "type_text", "params": "b"}])
+
+        updates = await asyncio.wait_for(_collect(queue.step_results(job["action_id"])), timeout=1)
+        assert updates == [{"type": "batch.result", "batch_id": job["action_id"],
+                            "result": {"status": "failed", "reason": "Action queue full"}}]
+    finally:
+        executor.gate.set()
+        await queue.stop()
+
+async def _collect(updates):
+    return [u async for u in updates]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+import websockets
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from brain_channel import BrainChannel
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+@pytest.mark.asyncio
+async def test_events_share_one_acked_connection():
+    received, connections = [], []
+
+    async def brain(ws):
+        connections.append(ws)
+        async for raw in ws:
+            msg = json.loads(raw)
+            received.append(msg["type"])
+            if msg["ack"]:
+                await ws.send(json.dumps({"type": "ack", "id": msg["id"]}))
+
+    async with websockets.serve(brain, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        channel = BrainChannel(f"ws://127.0.0.1:{port}", heartbeat=5, ack_timeout=1)
+        channel.start()
+        try:
+            channel.send("wake.trigger", {"confidence": 0.9})
+            channel.send("telemetry", {"cpu": 3.0}, ack=False)
+            channel.send("action.result", {"status": "ok"})
+            await _wait_for(lambda: channel.status()["acked"] == 2)
+
+            assert received == ["wake.trigger", "telemetry", "action.result"]
+            assert len(connections) == 1
+            assert channel.status()["awaiting_ack"] == 0
+        finally:
+            await channel.stop()
+
+@pytest.mark.asyncio
+async def test_unacked_event_is_resent_after_reconnect():
+    received = []
+
+    async def brain(ws):
+        async for raw in ws:
+            msg = json.loads(raw)
+            received.append(msg["id"])
+            if len(received) == 1:
+                await ws.close()  # Drop the first delivery without acking
+                return
+            await ws.send(json.dumps({"type": "ack", "id": msg["id"]}))
+
+    async with websockets.serve(brain, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        channel = BrainChannel(f"ws://127.0.0.1:{port}", heartbeat=5, ack_timeout=30)
+        channel.start()
+        try:
+            msg_id = channel.send("wake.trigger", {"confidence": 0.9})
+            await _wait_for(lambda: channel.status()["acked"] == 1)
+
+            assert received == [msg_id, msg_id]
+            assert channel.status()["connects"] == 2
+            assert channel.status()["resent"] == 1
+        finally:
+            await channel.stop()
+
+@pytest.mark.asyncio
+async def test_channel_over_unix_socket(tmp_path):
+    paths = []
+
+    async def brain(ws):
+        paths.append(ws.request.path)
+        async for raw in ws:
+            msg = json.loads(raw)
+            await ws.send(json.dumps({"type": "ack", "id": msg["id"]}))
+
+    path = str(tmp_path / "brain.sock")
+    async with websockets.unix_serve(brain, path):
+        channel = BrainChannel("ws://localhost/ws/kernel", heartbeat=5, ack_timeout=1, uds=path)
+        channel.start()
+        try:
+            channel.send("wake.trigger", {"confidence": 0.9})
+            await _wait_for(lambda: channel.status()["acked"] == 1)
+            assert paths == ["/ws/kernel"]
+            assert channel.status()["uds"] == path
+        finally:
+            await channel.stop()
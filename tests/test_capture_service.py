@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from capture_service import CaptureService
+
+class _Shot:
+    def __init__(self, width=4, height=2, shade=0):
+        self.width = width
+        self.height = height
+        self.bgra = bytes([shade, shade, shade, 255]) * (width * height)
+
+class _FakeMSS:
+    monitors = [{}, {"left": 0, "top": 0, "width": 4, "height": 2}]
+
+    def __init__(self):
+        self.grabs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def grab(self, monitor):
+        self.grabs += 1
+        return _Shot(shade=self.grabs % 256)
+
+def test_start_latest_and_stop():
+    service = CaptureService(fps=50, buffer_size=4, window_fn=lambda: "Editor")
+    with patch("capture_service.mss.mss", _FakeMSS):
+        service.start()
+        try:
+            frame = service.latest(wait=2.0)
+            assert frame is not None
+            assert frame.size == (4, 2) and frame.active_window == "Editor"
+            assert frame.to_image().getpixel((0, 0)) == (frame.seq % 256,) * 3
+            assert service.status()["running"]
+        finally:
+            service.stop()
+
+    assert not service.running
+    captured = service.status()["frames_captured"]
+    time.sleep(0.1)
+    assert service.status()["frames_captured"] == captured
+
+def test_ring_buffer_wraps_around():
+    service = CaptureService(buffer_size=3)
+    for _ in range(5):
+        service._push(_Shot(), time.time())
+
+    assert [f.seq for f in service.history()] == [3, 4, 5]
+    assert service.latest().seq == 5
+    status = service.status()
+    assert status["buffered"] == 3 and status["frames_captured"] == 5
+
+def test_latest_is_none_when_idle_and_empty():
+    service = CaptureService()
+    assert service.latest(wait=0.01) is None
+    assert service.status()["latest_age_s"] is None
+
+def test_capture_errors_reopen_the_handle():
+    class _Broken(_FakeMSS):
+        opened = 0
+
+        def __enter__(self):
+            _Broken.opened += 1
+            if _Broken.opened == 1:
+                raise RuntimeError("display gone")
+            return self
+
+    service = CaptureService(fps=50)
+    with patch("capture_service.mss.mss", _Broken):
+        service.start()
+        try:
+            assert service.latest(wait=2.0) is not None
+        finally:
+            service.stop()
+
+    assert service.errors == 1 and service.last_error == "display gone"
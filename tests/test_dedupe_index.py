@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from dedupe_index import DedupeIndex
+
+def test_canonical_params_collide():
+    index = DedupeIndex(window=0.5)
+    assert not index.seen("MOUSE_MOVE", {"x": 10, "y": 20.0}, now=100.0)
+    assert index.seen("MOUSE_MOVE", {"y": 20, "x": 10.0}, now=100.1)
+    assert not index.seen("MOUSE_MOVE", {"x": 11, "y": 20}, now=100.2)
+
+def test_window_expiry_and_counters():
+    index = DedupeIndex(window=0.5, bucket=0.25)
+    assert not index.seen("CLICK", None, now=100.0)
+    assert index.seen("CLICK", None, source="execute", now=100.3)
+    assert not index.seen("CLICK", None, now=100.6)  # window passed
+
+    # Old buckets are dropped as time moves on, not rescanned
+    for i in range(100):
+        index.seen("TYPE_TEXT", f"word {i}", now=200.0 + i)
+    assert len(index) <= 4
+
+    stats = index.stats()
+    assert stats["suppressed"] == 1
+    assert stats["suppressed_by_source"] == {"execute": 1}
+    assert stats["expired"] > 90
+
+def test_shared_between_threads():
+    index = DedupeIndex(window=0.01, bucket=0.005)
+    errors = []
+
+    def hammer(source):
+        try:
+            for i in range(2000):
+                index.seen("CLICK", {"x": i % 7}, source=source)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(f"t{n}",)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    stats = index.stats()
+    assert stats["checked"] == 8000
+    assert stats["suppressed"] == sum(stats["suppressed_by_source"].values())
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from screenshot_store import ScreenshotStore
+
+def test_dedupe_and_compact_format(tmp_path):
+    store = ScreenshotStore(str(tmp_path), fmt="webp", max_width=800)
+    screen = Image.new("RGB", (1600, 900), (30, 30, 30))
+
+    first = store.save(screen)
+    again = store.save(screen.copy())
+    assert not first["deduped"] and again["deduped"]
+    assert first["path"] == again["path"]
+    assert first["filename"].endswith(".webp")
+    assert Image.open(first["path"]).size == (800, 450)
+    assert len(os.listdir(tmp_path)) == 1
+
+def test_legacy_png_import(tmp_path):
+    legacy = tmp_path / "0187f662.png"
+    Image.new("RGB", (100, 50), (255, 0, 0)).save(legacy)
+    store = ScreenshotStore(str(tmp_path), fmt="jpeg")
+
+    result = store.import_file(str(legacy))
+    assert not legacy.exists()
+    assert result["path"].endswith(".jpg")
+
+def test_eviction_by_age_then_size(tmp_path):
+    store = ScreenshotStore(str(tmp_path), max_age=3600, max_bytes=10**9)
+    now = time.time()
+    paths = []
+    for i in range(3):
+        paths.append(store.save(Image.new("RGB", (64, 64), (i * 60, 0, 0)))["path"])
+    os.utime(paths[0], (now - 7200, now - 7200))  # too old
+
+    assert store.evict(now) == 1
+    assert not os.path.exists(paths[0])
+
+    os.utime(paths[1], (now - 60, now - 60))  # least recently captured
+    store.max_bytes = os.path.getsize(paths[2])
+    assert store.evict(now) == 1
+    assert os.path.exists(paths[2]) and not os.path.exists(paths[1])
+
+def test_eviction_reports_removed_paths(tmp_path):
+    store = ScreenshotStore(str(tmp_path), max_age=3600)
+    old = store.save(Image.new("RGB", (64, 64), (0, 0, 0)))["path"]
+    store.save(Image.new("RGB", (64, 64), (255, 255, 255)))
+    now = time.time()
+    os.utime(old, (now - 7200, now - 7200))
+
+    evicted = []
+    store.on_evict = evicted.extend
+    assert store.evict(now) == 1
+    assert evicted == [old]
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../local_kernel")))
+from telemetry import TelemetrySampler, diff
+
+def test_diff_only_changed_fields():
+    assert diff({"cpu": 1.0, "ram": 40.0}, {"cpu": 1.0, "ram": 41.5}) == {"ram": 41.5}
+
+def test_latest_is_cached():
+    sampler = TelemetrySampler(interval=60, window_fn=lambda: "Editor")
+    first = sampler.latest()
+    assert sampler.latest() is first
+    assert first["active_window"] == "Editor" and first["seq"] == 1
+
+@pytest.mark.asyncio
+async def test_push_stream_sends_snapshot_then_deltas():
+    window = {"title": "Editor"}
+    sampler = TelemetrySampler(interval=0.02, window_fn=lambda: window["title"])
+    sampler.start()
+    try:
+        stream = sampler.deltas()
+        first = await stream.__anext__()
+        assert first["type"] == "telemetry.snapshot"
+        assert first["data"]["active_window"] == "Editor"
+
+        window["title"] = "Browser"
+        # Samples where nothing but cpu/ts moved may come first
+        for _ in range(50):
+            update = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            assert update["type"] == "telemetry.delta"
+            assert "system" not in update["changes"]
+            assert "uptime" not in update["changes"]
+            if "active_window" in update["changes"]:
+                break
+        assert update["changes"]["active_window"] == "Browser"
+        assert sampler.status()["samples"] >= 2
+    finally:
+        await sampler.stop()
+
+@pytest.mark.asyncio
+async def test_uptime_alone_is_not_a_delta():
+    sampler = TelemetrySampler(interval=0.01)
+    sampler.start()
+    try:
+        stream = sampler.deltas()
+        first = (await stream.__anext__())["data"]
+        assert first["uptime"] == int(first["ts"] - first["boot_time"])
+
+        # Only uptime (and ts/seq) move between samples: nothing is pushed
+        sampler._sample = lambda: {**first, "uptime": first["uptime"] + 1, "ts": first["ts"] + 1}
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(stream.__anext__(), timeout=0.2)
+    finally:
+        await sampler.stop()
@@ -1,7 +1,9 @@
-
+import asyncio
+import json
 import sys
 import os
 import pytest
+import numpy as np
 from unittest.mock import MagicMock, patch, AsyncMock
 
 # Imports
@@ -31,6 +33,42 @@ async def test_deep_research_agent():
             assert "final_answer" in res or "steps" in res
             assert len(res.get("steps", [])) == 2
 
+@pytest.mark.asyncio
+async def test_deep_research_runs_independent_steps_in_parallel():
+    agent = DeepResearchAgent(concurrency=3)
+    running, peak, prompts = [0], [0], []
+
+    async def generate(prompt, *args, **kwargs):
+        if "Break down" in prompt:
+            return json.dumps({"steps": [
+                {"step": "history of asyncio", "depends_on": []},
+                {"step": "compare event loops", "depends_on": []},
+                {"step": "search notes on uvloop", "depends_on": []},
+                {"step": "summarize tradeoffs", "depends_on": [1, 2, 3]},
+            ]})
+        prompts.append(prompt)
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.1)
+        running[0] -= 1
+        return f"insight {len(prompts)}"
+
+    note = {"text": "uvloop is a libuv based loop", "source": "notes.md", "score": 0.2}
+    with patch("core.agents.deep_research_agent.local_engine.generate", side_effect=generate), \
+         patch("core.vector_store.vector_store.search", return_value=[note]) as search:
+        events = [e async for e in agent.stream("Research asyncio")]
+
+    assert [e["type"] for e in events] == ["research.plan"] + ["research.step"] * 4 + ["research.result"]
+    assert peak[0] == 2  # steps 1 and 2 together; step 4 waited for all three
+    search.assert_called_once_with("search notes on uvloop", k=3)
+    assert events[-2]["id"] == 4 and "Earlier findings" in prompts[2]
+    report = events[-1]["report"]
+    assert report["steps"] == ["history of asyncio", "compare event loops", "search notes on uvloop", "summarize tradeoffs"]
+    assert report["citations"] == [{"text": "uvloop is a libuv based loop", "source": "notes.md"}]
+    timings = report["timings"]["steps"]
+    assert timings[3]["started_ms"] >= timings[0]["duration_ms"]
+    assert report["timings"]["total_ms"] >= report["timings"]["plan_ms"]
+
 def test_system_tools():
     # Process List
     proc_tool = ProcessListTool()
@@ -64,6 +102,156 @@ async def test_voice_engine_mock():
          res = await engine.transcribe(b"fake_audio_bytes")
          assert res["text"] == "hello world"
 
+@pytest.mark.asyncio
+async def test_voice_model_loads_lazily():
+    with patch("core.voice.voice_engine.Model") as mock_model, \
+         patch("core.voice.voice_engine.KaldiRecognizer") as mock_rec, \
+         patch("os.path.exists", return_value=True):
+
+         from core.voice.voice_engine import VoiceEngine
+         engine = VoiceEngine()
+         mock_model.assert_not_called()
+         assert engine.diagnostics()["state"] == "unloaded"
+
+         mock_rec.return_value.FinalResult.return_value = '{"text": "hi"}'
+         await engine.transcribe(b"fake_audio_bytes")
+         await engine.transcribe(b"fake_audio_bytes")
+
+         mock_model.assert_called_once_with(engine.model_path)
+         diag = engine.diagnostics()
+         assert diag["state"] == "ready"
+         assert diag["load_ms"] >= 0 and diag["rss_bytes"] > 0
+         assert diag["inherited"] is False
+
+@pytest.mark.asyncio
+async def test_voice_stream_pooled():
+    with patch("core.voice.voice_engine.Model"), \
+         patch("core.voice.voice_engine.KaldiRecognizer") as mock_rec, \
+         patch("core.voice.voice_engine.config.VOICE_VAD", False), \
+         patch("os.path.exists", return_value=True):
+
+         from core.voice.voice_engine import VoiceEngine
+         engine = VoiceEngine()
+         engine.model = MagicMock()
+
+         rec = mock_rec.return_value
+         rec.AcceptWaveform.side_effect = [False, False, True]
+         rec.PartialResult.return_value = '{"partial": "hello"}'
+         rec.Result.return_value = '{"text": "hello world"}'
+
+         stream = engine.open_stream(16000)
+         assert await stream.feed(b"\x00" * 320) == [{"type": "partial", "text": "hello"}]
+         assert await stream.feed(b"\x00" * 320) == []  # unchanged partial
+         assert await stream.feed(b"\x00" * 320) == [{"type": "final", "text": "hello world"}]
+         stream.close()
+
+         # The recognizer is reset and reused, not rebuilt
+         engine.open_stream(16000).close()
+         assert mock_rec.call_count == 1
+         assert engine.pool.stats()["reused"] == 1
+         rec.Reset.assert_called()
+
+def _tone(ms, amplitude=3000, rate=16000):
+    t = np.arange(rate * ms // 1000)
+    return (amplitude * np.sin(2 * np.pi * 440 * t / rate)).astype(np.int16).tobytes()
+
+def _silence(ms, rate=16000):
+    return b"\x00\x00" * (rate * ms // 1000)
+
+def test_vad_trims_and_splits_on_pause():
+    from core.voice.vad import EnergyVAD, split_segments
+
+    vad = EnergyVAD(16000, frame_ms=30, threshold=300, padding_ms=90, pause_ms=300)
+    pcm = _silence(900) + _tone(300) + _silence(600) + _tone(300) + _silence(900)
+    segments = split_segments(vad, pcm)
+
+    assert len(segments) == 2
+    # Each segment: 90 ms pre-roll + speech + at most 90 ms hangover
+    for segment in segments:
+        assert len(segment) <= len(_tone(480))
+    stats = vad.stats()
+    assert stats["decoded_ratio"] < 0.5
+    assert stats["speech_ratio"] > 0.5
+
+@pytest.mark.asyncio
+async def test_voice_stream_finalizes_on_pause():
+    with patch("core.voice.voice_engine.Model"), \
+         patch("core.voice.voice_engine.KaldiRecognizer") as mock_rec, \
+         patch("core.voice.voice_engine.config.VOICE_VAD_PAUSE_MS", 300), \
+         patch("os.path.exists", return_value=True):
+
+         from core.voice.voice_engine import VoiceEngine
+         engine = VoiceEngine()
+         engine.model = MagicMock()
+
+         rec = mock_rec.return_value
+         rec.AcceptWaveform.return_value = False
+         rec.PartialResult.return_value = '{"partial": "open"}'
+         rec.FinalResult.return_value = '{"text": "open editor"}'
+
+         stream = engine.open_stream(16000)
+         assert await stream.feed(_silence(1000)) == []
+         rec.AcceptWaveform.assert_not_called()  # silence never decoded
+
+         results = await stream.feed(_tone(400) + _silence(400))
+         assert results == [{"type": "partial", "text": "open"}, {"type": "final", "text": "open editor"}]
+         stream.close()
+         assert engine.stats()["vad"]["frames_in"] > 0
+
+@pytest.mark.asyncio
+async def test_plan_confirmed_once_runs_as_batch():
+    from core.llm_service import LLMService
+
+    async def fake_batch(steps):
+        for i, step in enumerate(steps):
+            yield {"type": "batch.step", "index": i, "action": step["action"], "result": {"status": "success"}}
+        yield {"type": "batch.result", "result": {"status": "success", "steps_run": len(steps)}}
+
+    with patch("core.llm_service.local_engine.generate", new_callable=AsyncMock) as mock_gen, \
+         patch("core.llm_service.TaskAgent.run", new_callable=AsyncMock) as mock_task_run, \
+         patch("core.llm_service.config.PLAN_CONFIRM_MODE", "plan"), \
+         patch("api.ws_handlers.manager.broadcast_json", new_callable=AsyncMock) as mock_broadcast:
+        mock_gen.return_value = "TASK"
+        mock_task_run.return_value = [{"action": "A1"}, {"action": "A2"}, {"action": "A3"}]
+
+        llm = LLMService()
+        llm._run_batch = fake_batch
+        await llm.generate_response("Do A, B and C")
+
+        assert len(llm._pending_actions) == 1
+        confirmation = mock_broadcast.call_args.args[0]["payload"]
+        assert confirmation["intent"] == "PLAN"
+        assert len(confirmation["execution_data"]["steps"]) == 3
+
+        result = await llm.confirm_action(confirmation["action_id"])
+        assert result == "Executed 3/3 steps (success)"
+        assert not llm._pending_actions
+        plan_id = confirmation["sequence_id"]
+        assert llm._plan_progress[plan_id] == 3
+        step_results = [c.args[0] for c in mock_broadcast.call_args_list if c.args[0]["type"] == "action.step_result"]
+        assert len(step_results) == 3
+
+@pytest.mark.asyncio
+async def test_step_confirm_waits_for_kernel_result():
+    from core.llm_service import LLMService
+
+    with patch("core.llm_service.local_engine.generate", new_callable=AsyncMock) as mock_gen, \
+         patch("core.llm_service.TaskAgent.run", new_callable=AsyncMock) as mock_task_run, \
+         patch("core.llm_service.config.PLAN_CONFIRM_MODE", "step"), \
+         patch("api.ws_handlers.manager.broadcast_json", new_callable=AsyncMock), \
+         patch("core.kernel_client.kernel_client.run_action", new_callable=AsyncMock) as mock_run:
+        mock_gen.return_value = "TASK"
+        mock_task_run.return_value = [{"action": "A1", "params": "x"}]
+        mock_run.return_value = {"status": "failed", "reason": "Window not found"}
+
+        llm = LLMService()
+        await llm.generate_response("Do A")
+        action_id = list(llm._pending_actions.keys())[0]
+
+        result = await llm.confirm_action(action_id)
+        mock_run.assert_awaited_once_with("A1", "x", "REAL", wait=True)
+        assert result == "Executed (failed: Window not found)"
+
 @pytest.mark.asyncio
 async def test_autonomy_chaining():
     # Test LLMService state